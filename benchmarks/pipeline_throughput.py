@@ -0,0 +1,135 @@
+"""Measure whole-pipeline throughput on the in-memory stand-in backend.
+
+Builds a throwaway project (settings, template files, workspace) in a temp
+directory, seeds a synthetic network, and times run_batch for each worker
+count, once cold (caches and build manifest cleared) and once warm. No
+ArcGIS is needed. The latency model makes stand-in operations cost roughly
+what they do against the real geodatabases; --scale 0 disables it.
+
+    python benchmarks/pipeline_throughput.py
+    python benchmarks/pipeline_throughput.py --substations 8 --workers 1 2 4 --export-workers 2
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+
+import yaml
+
+# Add the project root directory to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+MAP_TYPES = ['Internal', 'External', 'InternalOverview', 'ExternalOverview']
+
+# Seconds per call and per row, loosely based on timings against file geodatabases
+LATENCY = {
+    'intersect': {'call': 1.5, 'per_row': 0.00002},
+    'copy': {'call': 0.5, 'per_row': 0.000005},
+    'statistics': {'call': 0.4, 'per_row': 0.00001},
+    'make_feature_layer': {'call': 0.2},
+    'table_to_numpy': {'call': 0.2, 'per_row': 0.000002},
+    'numpy_to_table': {'call': 0.2},
+    'search_cursor': {'call': 0.05, 'per_row': 0.000005},
+    'update_cursor': {'call': 0.05, 'per_row': 0.00002},
+    'add_field': {'call': 0.1},
+    'add_index': {'call': 0.1},
+    'get_count': {'call': 0.05},
+    'open_document': {'call': 2.0},
+    'export_pdf': {'call': 3.0}
+}
+
+def write_project(root: Path, substations, args) -> Path:
+    """Write settings.yaml and empty template files for a stand-in project."""
+    gdb_dir = root / "GDB"
+    gdb_dir.mkdir(parents=True)
+    # MapGenerator looks for templates next to the workspace folder
+    template_dir = gdb_dir / "MXD" / args.year
+    template_dir.mkdir(parents=True)
+    for map_type in MAP_TYPES:
+        (template_dir / f"Template{map_type}_{args.year}_11x17.mxd").write_text("stand-in template")
+
+    settings = {
+        'paths': {
+            'workspace': (gdb_dir / "Working.gdb").as_posix(),
+            'mxd_input': template_dir.as_posix(),
+            'aprx_input': template_dir.as_posix(),
+            'pdf_output': (template_dir / "Export").as_posix(),
+            'logs': root.as_posix(),
+            'circuit_index': (root / "circuit_index.sqlite").as_posix(),
+            # Keep stand-in timings out of the production history and ledger
+            'history': (root / "run_history.sqlite").as_posix(),
+            'ledger': (root / "run_ledger.csv").as_posix(),
+            'source_data': {
+                'xfmr': (root / "source" / "Electric.gdb" / "V_XFMR_PT").as_posix(),
+                'pricond': (root / "source" / "Electric.gdb" / "PriCondSGB_MergeMCD").as_posix(),
+                'mcd': (root / "source" / "Base.gdb" / "PECO_MCD_ServiceType").as_posix()
+            }
+        },
+        'options': {
+            'default_year': args.year,
+            'resolution': 300,
+            'export_workers': args.export_workers,
+            'document_cache_size': args.document_cache_size,
+            'stats_engine': args.stats_engine
+        },
+        'backend': {
+            'name': 'memory',
+            'latency': {'scale': args.scale, 'operations': LATENCY},
+            'seed': {'circuits_per_substation': args.circuits, 'seed': 0}
+        },
+        'substations': substations
+    }
+    settings_path = root / "settings.yaml"
+    with open(settings_path, 'w') as f:
+        yaml.safe_dump(settings, f)
+    return settings_path
+
+def clear_caches(root: Path):
+    """Forget the circuit index and build manifests so the next run starts cold."""
+    index = root / "circuit_index.sqlite"
+    if index.exists():
+        index.unlink()
+    for manifest in root.rglob(".build_manifest.json"):
+        manifest.unlink()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--substations', type=int, default=4, help='Number of substations')
+    parser.add_argument('--circuits', type=int, default=20, help='Circuits per substation')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4],
+                        help='Batch worker counts to compare')
+    parser.add_argument('--export-workers', type=int, default=1, help='Concurrent exports per substation')
+    parser.add_argument('--document-cache-size', type=int, default=4, help='Templates kept open per process')
+    parser.add_argument('--stats-engine', choices=['arcpy', 'numpy'], default='arcpy')
+    parser.add_argument('--scale', type=float, default=0.1, help='Latency model multiplier (0 = no delays)')
+    parser.add_argument('--year', default='2025')
+    args = parser.parse_args()
+
+    root = Path(tempfile.mkdtemp(prefix="mapgen_throughput_"))
+    substations = [f"SUB{i:02d}" for i in range(1, args.substations + 1)]
+    try:
+        os.environ['MAPGEN_SETTINGS'] = str(write_project(root, substations, args))
+        os.environ['MAPGEN_BACKEND'] = 'memory'
+
+        from scripts.batch_runner import run_batch
+
+        workspace = root / "GDB" / "Working.gdb"
+        print(f"{'Workers':>7} {'Run':<5} {'Wall (s)':>9} {'Subs/min':>9} {'Succeeded':>10}")
+        for workers in args.workers:
+            clear_caches(root)
+            for run in ('cold', 'warm'):
+                start = time.perf_counter()
+                results = run_batch(substations, args.year, workspace, workers=workers)
+                wall = time.perf_counter() - start
+                succeeded = sum(1 for r in results if r['status'] == 'Success')
+                print(f"{workers:>7} {run:<5} {wall:>9.2f} {len(substations) / wall * 60:>9.1f} "
+                      f"{succeeded:>6}/{len(results)}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""Benchmark circuit selection strategies against selection size.
+
+Without arguments, measures expression build time and length for each
+strategy on synthetic circuit IDs. With --dataset (requires arcpy), the
+circuit IDs are the dataset's distinct CIRCUIT1 values instead, and
+MakeFeatureLayer + GetCount on that dataset is also timed for each
+expression; the key table for the join strategy is written to the
+dataset's workspace. Selection sizes above half the dataset's circuits
+are skipped.
+
+    python benchmarks/selection_benchmark.py
+    python benchmarks/selection_benchmark.py --dataset C:\\scratch\\scratch.gdb\\PriCond_MCD
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# Add the project root directory to Python path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from scripts.selection import SelectionBuilder
+
+STRATEGIES = ['in', 'chunked', 'range', 'join']
+COUNTS = [10, 100, 500, 1000, 5000, 20000]
+
+def synthetic_universe(size: int):
+    return [f"{i // 100:03d}-{i % 100:02d}" for i in range(size)]
+
+def dataset_universe(dataset: str):
+    """Distinct CIRCUIT1 values of dataset, so the selections match real rows."""
+    import arcpy
+
+    with arcpy.da.SearchCursor(dataset, ["CIRCUIT1"]) as cursor:
+        return sorted({row[0] for row in cursor if row[0] is not None})
+
+def make_key_table_writer(dataset: str):
+    import arcpy
+
+    workspace, _ = dataset.rsplit("\\", 1)
+
+    def write(keys):
+        name = "SEL_Benchmark_Keys"
+        table = f"{workspace}\\{name}"
+        if arcpy.Exists(table):
+            arcpy.Delete_management(table)
+        arcpy.CreateTable_management(workspace, name)
+        arcpy.AddField_management(table, "CIRCUIT1", "TEXT", field_length=50)
+        with arcpy.da.InsertCursor(table, ["CIRCUIT1"]) as cursor:
+            for key in keys:
+                cursor.insertRow((key,))
+        return name
+    return write
+
+def time_selection(dataset: str, expression: str) -> float:
+    import arcpy
+
+    start = time.perf_counter()
+    layer = arcpy.MakeFeatureLayer_management(dataset, "benchmark_lyr", expression)
+    arcpy.GetCount_management(layer)
+    elapsed = time.perf_counter() - start
+    arcpy.Delete_management("benchmark_lyr")
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dataset', help='Feature class to run selections against (needs arcpy)')
+    parser.add_argument('--repeat', type=int, default=3, help='Repetitions per measurement')
+    args = parser.parse_args()
+
+    universe = dataset_universe(args.dataset) if args.dataset else synthetic_universe(max(COUNTS) * 2)
+    # Selections take every other circuit, so larger counts need a larger universe
+    counts = [count for count in COUNTS if count * 2 <= len(universe)] or [len(universe) // 2]
+    key_table_writer = make_key_table_writer(args.dataset) if args.dataset else (lambda keys: "SEL_Keys")
+    builder = SelectionBuilder(key_table_writer=key_table_writer)
+
+    header = f"{'Circuits':>9} {'Strategy':<8} {'Chosen':<7} {'Length':>9} {'Build (ms)':>11}"
+    if args.dataset:
+        header += f" {'Select (s)':>11}"
+    print(header)
+
+    for count in counts:
+        # Every other circuit: a realistic, non-contiguous selection
+        selected = universe[:count * 2:2]
+        chosen = builder.choose_strategy(sorted(selected), universe)
+
+        for strategy in STRATEGIES:
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                expression = builder.build(selected, universe, strategy=strategy)
+            build_ms = (time.perf_counter() - start) / args.repeat * 1000
+
+            line = (f"{count:>9} {strategy:<8} {'*' if strategy == chosen else '':<7} "
+                    f"{len(expression):>9} {build_ms:>11.2f}")
+            if args.dataset:
+                select_s = min(time_selection(args.dataset, expression) for _ in range(args.repeat))
+                line += f" {select_s:>11.3f}"
+            print(line)
+
+if __name__ == '__main__':
+    main()
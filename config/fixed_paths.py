@@ -11,6 +11,17 @@ APRX_INPUT_DIR = PROJECT_ROOT / "data" / "input" / "aprx"
 # Output directories
 PDF_OUTPUT_DIR = PROJECT_ROOT / "data" / "output" / "pdf"
 LOGS_DIR = PROJECT_ROOT / "data" / "output" / "logs"
+TRACES_DIR = LOGS_DIR / "traces"
+LEDGER_PATH = LOGS_DIR / "run_ledger.csv"
+
+# Local caches and indexes (safe to delete, rebuilt on demand)
+CACHE_DIR = PROJECT_ROOT / "data" / "cache"
+CIRCUIT_INDEX_PATH = CACHE_DIR / "circuit_index.sqlite"
+HISTORY_PATH = CACHE_DIR / "run_history.sqlite"
+DAEMON_KEY_PATH = CACHE_DIR / "daemon.key"
+
+# Work queue shared by workers (point queue.path at a share for several hosts)
+QUEUE_DIR = PROJECT_ROOT / "data" / "queue"
 
 # Config file path
 SETTINGS_PATH = PROJECT_ROOT / "config" / "settings.yaml"
@@ -1,9 +1,13 @@
+import time
 import click
 from pathlib import Path
-from scripts.file_handler import FileHandler
-from scripts.table_builder import TableBuilder
+from scripts.run_ledger import RunLedger
+from scripts.run_history import RunHistory
+from scripts.build_manifest import BuildManifest, export_fingerprint
 from scripts.helpers.logging_utils import setup_file_logger
 from scripts.helpers.config_utils import load_config
+from scripts.helpers.tracing import configure_from_settings, merge_trace
+from scripts.helpers.progress import Progress, configure_progress, PROGRESS_MODES
 from config.fixed_paths import (
     MXD_INPUT_DIR,
     APRX_INPUT_DIR,
@@ -16,8 +20,21 @@ from config.fixed_paths import (
 @click.option('--input-dir', type=click.Path(exists=True), help='Input directory containing map files')
 @click.option('--output-dir', type=click.Path(), help='Output directory for PDFs')
 @click.option('--resolution', default=300, help='PDF export resolution (DPI)')
-def main(input_dir, output_dir, resolution):
+@click.option('--force', is_flag=True, help='Re-export documents even if they are unchanged')
+@click.option('--trace', is_flag=True, help='Write stage timing traces for this run')
+@click.option('--workers', type=click.IntRange(min=1), default=1,
+              help='Worker processes exporting documents in parallel (1 = sequential)')
+@click.option('--progress', 'progress_mode', type=click.Choice(PROGRESS_MODES), default=None,
+              help='Progress output: log lines (default), a console status line, '
+                   'NDJSON on stdout, or none')
+def main(input_dir, output_dir, resolution, force, trace, workers, progress_mode):
     """Main entry point for the processing pipeline."""
+    if progress_mode:
+        configure_progress([progress_mode])
+    
+    # Imported here so --help doesn't pay for loading arcpy
+    from scripts.file_handler import FileHandler
+    
     # Ensure directories exist
     ensure_directories()
     
@@ -27,23 +44,76 @@ def main(input_dir, output_dir, resolution):
     
     # Initialize handlers
     file_handler = FileHandler()
-    table_builder = TableBuilder()
     
     # Load configuration
     config = load_config()
+    tracing = configure_from_settings(config, force=trace)
+    
+    # Every file's outcome is appended to the ledger as soon as it is known
+    ledger = RunLedger.from_config(config)
+    logger.info(f"Run {ledger.run_id} recording to {ledger.path}")
+    history = RunHistory.from_config(config)
     
     # Set up directories
     input_dir = Path(input_dir) if input_dir else MXD_INPUT_DIR
     output_dir = Path(output_dir) if output_dir else PDF_OUTPUT_DIR
     
-    # Process files
+    # Outputs whose document and export options are unchanged are skipped
+    manifest = BuildManifest.for_directory(output_dir)
+    
+    # Collect the documents that need exporting
+    jobs = []
+    fingerprints = {}
     for input_path in input_dir.glob('*.*'):
         if file_handler.validate_file(input_path):
             output_path = output_dir / f"{input_path.stem}.pdf"
+            fingerprint = export_fingerprint(input_path, resolution, {'format': 'PDF'})
+            
+            if not force and manifest.is_current(output_path, fingerprint):
+                logger.info(f"Skipped {input_path}: unchanged")
+                ledger.record(input_path, output_path, "Skipped", 0.0)
+                continue
+            
+            fingerprints[str(output_path)] = fingerprint
+            jobs.append((input_path, output_path))
+    
+    progress = Progress("Export", total_steps=len(jobs))
+    
+    def finish(result):
+        progress.update(message="Exporting documents")
+        if result['status'] == 'Success':
+            manifest.record(Path(result['output']), fingerprints[result['output']])
+            history.record(result['input'], 'export', result['duration'])
+        ledger.record_result(result)
+        logger.info(f"Processed {result['input']}: {result['status']}")
+    
+    if workers > 1 and len(jobs) > 1:
+        from scripts.export_worker import export_documents, largest_first
+        
+        # Start the slowest documents first so no long export is left for the end
+        outputs = dict(jobs)
+        order = largest_first(outputs, history.expected_all(map(str, outputs), 'export'))
+        for result in export_documents([(path, outputs[path]) for path in order],
+                                       resolution, workers, config):
+            finish(result)
+    else:
+        for input_path, output_path in jobs:
+            started = time.perf_counter()
             success = file_handler.process_file(input_path, output_path, resolution)
-            status = "Success" if success else "Failed"
-            logger.info(f"Processed {input_path}: {status}")
+            finish({
+                'input': str(input_path),
+                'output': str(output_path),
+                'status': "Success" if success else "Failed",
+                'duration': time.perf_counter() - started,
+                'worker': None,
+                'error': None if success else "Export failed"
+            })
     
+    progress.complete(f"Exported {len(jobs)} documents")
+    ledger.close()
+    history.close()
+    if tracing:
+        logger.info(f"Trace written to {merge_trace(*tracing)}")
     logger.info("Pipeline completed")
 
 if __name__ == "__main__":
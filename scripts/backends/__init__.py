@@ -0,0 +1,63 @@
+"""Geoprocessing backends: arcpy, or an in-process stand-in for benchmarks and tests.
+
+Pipeline modules get the process-wide backend from get_backend(). It is
+chosen by the MAPGEN_BACKEND environment variable, then the backend
+section of settings.yaml, and defaults to arcpy:
+
+    backend:
+      name: memory
+      latency: {scale: 1.0, operations: {intersect: {call: 2.0}}}
+      seed: {circuits_per_substation: 20, seed: 0}
+"""
+import os
+from typing import Dict, Optional
+from scripts.backends.base import BackendExecuteError, FieldInfo, GeoprocessingBackend
+from scripts.helpers.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+BACKENDS = ('arcpy', 'memory')
+
+# Backend used by this process, created on first use
+_backend: Optional[GeoprocessingBackend] = None
+
+def create_backend(name: str, options: Optional[Dict] = None,
+                   config: Optional[Dict] = None) -> GeoprocessingBackend:
+    """Create a backend by name.
+
+    For the memory backend, options may hold a latency model and a seed
+    section; with a seed section (and config) a synthetic network is loaded.
+    """
+    options = options or {}
+    if name == 'arcpy':
+        from scripts.backends.arcpy_backend import ArcpyBackend
+        return ArcpyBackend()
+    if name == 'memory':
+        from scripts.backends.memory_backend import InMemoryBackend, LatencyModel
+        backend = InMemoryBackend(LatencyModel.from_config(options.get('latency')))
+        if options.get('seed') is not None and config is not None:
+            from scripts.backends.synthetic import seed_network
+            counts = seed_network(backend, config, **dict(options['seed']))
+            logger.info(f"Seeded synthetic network: {counts}")
+        return backend
+    raise ValueError(f"Unknown backend: {name} (expected one of {', '.join(BACKENDS)})")
+
+def get_backend() -> GeoprocessingBackend:
+    """The backend for this process, created from the environment and settings on first use."""
+    global _backend
+    if _backend is None:
+        from scripts.helpers.config_utils import load_config
+        config = load_config()
+        options = config.get('backend') or {}
+        name = os.environ.get('MAPGEN_BACKEND') or options.get('name', 'arcpy')
+        _backend = create_backend(name, options, config)
+    return _backend
+
+def set_backend(backend: Optional[GeoprocessingBackend]) -> Optional[GeoprocessingBackend]:
+    """Install the backend for this process (None resets to the configured one).
+
+    Returns the previously installed backend.
+    """
+    global _backend
+    previous, _backend = _backend, backend
+    return previous
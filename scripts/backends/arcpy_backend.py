@@ -0,0 +1,107 @@
+from pathlib import Path
+from typing import Any, List, Optional, Sequence, Union
+from scripts.backends.base import FieldInfo, GeoprocessingBackend
+
+class ArcpyBackend(GeoprocessingBackend):
+    """Backend that forwards every operation to arcpy."""
+
+    name = 'arcpy'
+
+    def __init__(self):
+        import arcpy
+        self.arcpy = arcpy
+        self.env = arcpy.env
+        self.ExecuteError = arcpy.ExecuteError
+
+    def get_messages(self, severity: int = 2) -> str:
+        return self.arcpy.GetMessages(severity)
+
+    def exists(self, dataset: str) -> bool:
+        return bool(self.arcpy.Exists(dataset))
+
+    def delete(self, dataset: str):
+        self.arcpy.Delete_management(dataset)
+
+    def copy(self, source: str, destination: str):
+        self.arcpy.Copy_management(source, destination)
+
+    def create_file_gdb(self, folder: str, name: str) -> str:
+        self.arcpy.CreateFileGDB_management(folder, name)
+        return str(Path(folder) / name)
+
+    def table_to_geodatabase(self, tables: Sequence[str], output_gdb: str):
+        self.arcpy.TableToGeodatabase_conversion(list(tables), output_gdb)
+
+    def create_table(self, workspace: str, name: str) -> str:
+        self.arcpy.CreateTable_management(workspace, name)
+        return f"{workspace}\\{name}"
+
+    def get_count(self, dataset: str) -> int:
+        return int(self.arcpy.GetCount_management(dataset)[0])
+
+    def test_schema_lock(self, dataset: str) -> bool:
+        return bool(self.arcpy.TestSchemaLock(dataset))
+
+    def list_fields(self, dataset: str, wild_card: Optional[str] = None) -> List[FieldInfo]:
+        return [FieldInfo(f.name, f.type, f.length)
+                for f in self.arcpy.ListFields(dataset, wild_card)]
+
+    def add_field(self, dataset: str, name: str, field_type: str,
+                  field_length: Optional[int] = None):
+        if field_length:
+            self.arcpy.AddField_management(dataset, name, field_type, field_length=field_length)
+        else:
+            self.arcpy.AddField_management(dataset, name, field_type)
+
+    def list_indexes(self, dataset: str) -> List[List[str]]:
+        return [[f.name for f in index.fields] for index in self.arcpy.ListIndexes(dataset)]
+
+    def add_index(self, dataset: str, fields: Sequence[str], index_name: str):
+        self.arcpy.AddIndex_management(dataset, list(fields), index_name)
+
+    def intersect(self, inputs: Sequence[str], output: str, output_type: str = "INPUT"):
+        self.arcpy.Intersect_analysis(list(inputs), output, output_type=output_type)
+
+    def statistics(self, in_table: str, out_table: str, statistics_fields: Sequence,
+                   case_fields: Union[str, Sequence[str]]):
+        self.arcpy.Statistics_analysis(in_table, out_table, statistics_fields, case_fields)
+
+    def make_feature_layer(self, dataset: str, layer_name: str,
+                           where_clause: Optional[str] = None) -> str:
+        self.arcpy.MakeFeatureLayer_management(dataset, layer_name, where_clause)
+        return layer_name
+
+    def search_cursor(self, dataset: str, fields: Sequence[str],
+                      where_clause: Optional[str] = None):
+        return self.arcpy.da.SearchCursor(dataset, fields, where_clause)
+
+    def update_cursor(self, dataset: str, fields: Sequence[str],
+                      where_clause: Optional[str] = None):
+        return self.arcpy.da.UpdateCursor(dataset, fields, where_clause)
+
+    def insert_cursor(self, dataset: str, fields: Sequence[str]):
+        return self.arcpy.da.InsertCursor(dataset, fields)
+
+    def table_to_numpy(self, dataset: str, fields: Sequence[str], null_value=None):
+        return self.arcpy.da.FeatureClassToNumPyArray(
+            dataset, list(fields), skip_nulls=False, null_value=null_value
+        )
+
+    def numpy_to_table(self, array, out_table: str):
+        self.arcpy.da.NumPyArrayToTable(array, out_table)
+
+    def open_document(self, path: Union[str, Path]) -> Any:
+        if Path(path).suffix.lower() == '.mxd':
+            return self.arcpy.mapping.MapDocument(str(path))
+        return self.arcpy.mp.ArcGISProject(str(path))
+
+    def list_layouts(self, document: Any) -> List[Any]:
+        return document.listLayouts()
+
+    def export_pdf(self, target: Any, output_path: Union[str, Path], resolution: int = 300):
+        if hasattr(target, 'exportToPDF'):
+            # ArcGIS Pro layout
+            target.exportToPDF(str(output_path), resolution=resolution)
+        else:
+            # ArcMap MapDocument
+            self.arcpy.mapping.ExportToPDF(target, str(output_path), resolution=resolution)
@@ -0,0 +1,142 @@
+from abc import ABC, abstractmethod
+from collections import namedtuple
+from pathlib import Path
+from typing import Any, List, Optional, Sequence, Union
+
+# Mirrors the attributes of arcpy's Field objects that the pipeline reads.
+# type uses ListFields names: String, Double, Integer, SmallInteger, ...
+FieldInfo = namedtuple('FieldInfo', ['name', 'type', 'length'])
+
+class BackendExecuteError(Exception):
+    """Raised by non-arcpy backends where arcpy would raise ExecuteError."""
+    pass
+
+class GeoprocessingBackend(ABC):
+    """Interface for every geoprocessing operation the pipeline performs.
+
+    Pipeline code calls get_backend() instead of importing arcpy, so the
+    same code runs against ArcGIS (ArcpyBackend) or an in-process stand-in
+    (InMemoryBackend). Method names follow the arcpy tools they replace.
+    Every method is abstract, so a backend missing one fails when it is
+    created rather than part way through a run.
+    """
+
+    name = 'base'
+
+    # Exception class raised by failing tools; catch backend.ExecuteError
+    ExecuteError = BackendExecuteError
+
+    # Environment settings object (workspace, overwriteOutput, scratchWorkspace)
+    env: Any = None
+
+    @abstractmethod
+    def get_messages(self, severity: int = 2) -> str:
+        raise NotImplementedError
+
+    # Datasets and workspaces
+    @abstractmethod
+    def exists(self, dataset: str) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, dataset: str):
+        raise NotImplementedError
+
+    @abstractmethod
+    def copy(self, source: str, destination: str):
+        raise NotImplementedError
+
+    @abstractmethod
+    def create_file_gdb(self, folder: str, name: str) -> str:
+        raise NotImplementedError
+
+    @abstractmethod
+    def table_to_geodatabase(self, tables: Sequence[str], output_gdb: str):
+        """Copy tables into output_gdb under their own names, in one tool call."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def create_table(self, workspace: str, name: str) -> str:
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_count(self, dataset: str) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def test_schema_lock(self, dataset: str) -> bool:
+        """True if an exclusive schema lock could be acquired on dataset."""
+        raise NotImplementedError
+
+    # Fields and indexes
+    @abstractmethod
+    def list_fields(self, dataset: str, wild_card: Optional[str] = None) -> List[FieldInfo]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def add_field(self, dataset: str, name: str, field_type: str,
+                  field_length: Optional[int] = None):
+        raise NotImplementedError
+
+    @abstractmethod
+    def list_indexes(self, dataset: str) -> List[List[str]]:
+        """Field names of each attribute index, in index order."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def add_index(self, dataset: str, fields: Sequence[str], index_name: str):
+        raise NotImplementedError
+
+    # Analysis tools
+    @abstractmethod
+    def intersect(self, inputs: Sequence[str], output: str, output_type: str = "INPUT"):
+        raise NotImplementedError
+
+    @abstractmethod
+    def statistics(self, in_table: str, out_table: str, statistics_fields: Sequence,
+                   case_fields: Union[str, Sequence[str]]):
+        raise NotImplementedError
+
+    @abstractmethod
+    def make_feature_layer(self, dataset: str, layer_name: str,
+                           where_clause: Optional[str] = None) -> str:
+        raise NotImplementedError
+
+    # Cursors (context managers, like arcpy.da cursors)
+    @abstractmethod
+    def search_cursor(self, dataset: str, fields: Sequence[str],
+                      where_clause: Optional[str] = None):
+        raise NotImplementedError
+
+    @abstractmethod
+    def update_cursor(self, dataset: str, fields: Sequence[str],
+                      where_clause: Optional[str] = None):
+        raise NotImplementedError
+
+    @abstractmethod
+    def insert_cursor(self, dataset: str, fields: Sequence[str]):
+        raise NotImplementedError
+
+    # Bulk NumPy transfer
+    @abstractmethod
+    def table_to_numpy(self, dataset: str, fields: Sequence[str], null_value=None):
+        raise NotImplementedError
+
+    @abstractmethod
+    def numpy_to_table(self, array, out_table: str):
+        raise NotImplementedError
+
+    # Map documents
+    @abstractmethod
+    def open_document(self, path: Union[str, Path]) -> Any:
+        """Open an .mxd or .aprx document."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def list_layouts(self, document: Any) -> List[Any]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def export_pdf(self, target: Any, output_path: Union[str, Path], resolution: int = 300):
+        """Export an opened .mxd document or an .aprx layout to PDF."""
+        raise NotImplementedError
@@ -0,0 +1,470 @@
+import copy
+import time
+import fnmatch
+from collections import Counter
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from scripts.backends.base import BackendExecuteError, FieldInfo, GeoprocessingBackend
+from scripts.backends.where_clause import compile_where
+
+# AddField types -> ListFields type names
+FIELD_TYPES = {
+    'TEXT': 'String',
+    'DOUBLE': 'Double',
+    'FLOAT': 'Single',
+    'LONG': 'Integer',
+    'SHORT': 'SmallInteger',
+    'DATE': 'Date'
+}
+
+class LatencyModel:
+    """Simulated cost of stand-in operations: a fixed delay per call plus a delay per row.
+
+    Configured as
+        {'default_call': 0.0, 'scale': 1.0,
+         'operations': {'intersect': {'call': 2.0, 'per_row': 0.0001}, ...}}
+    where scale multiplies every delay (0 disables the model).
+    """
+
+    def __init__(self, operations: Optional[Dict[str, Dict[str, float]]] = None,
+                 default_call: float = 0.0, scale: float = 1.0):
+        self.operations = operations or {}
+        self.default_call = default_call
+        self.scale = scale
+        self.total_delay = 0.0
+
+    @classmethod
+    def from_config(cls, options: Optional[Dict]) -> "LatencyModel":
+        options = options or {}
+        return cls(
+            {op: dict(costs) for op, costs in (options.get('operations') or {}).items()},
+            options.get('default_call', 0.0),
+            options.get('scale', 1.0)
+        )
+
+    def cost(self, operation: str, rows: int = 0) -> float:
+        costs = self.operations.get(operation, {})
+        return (costs.get('call', self.default_call) + costs.get('per_row', 0.0) * rows) * self.scale
+
+    def wait(self, operation: str, rows: int = 0):
+        delay = self.cost(operation, rows)
+        if delay > 0:
+            self.total_delay += delay
+            time.sleep(delay)
+
+class MemoryTable:
+    """A table or feature class: field definitions plus rows keyed by UPPER-CASE name."""
+
+    def __init__(self, fields: Iterable[FieldInfo] = (), rows: Iterable[Dict[str, Any]] = ()):
+        self.fields: List[FieldInfo] = list(fields)
+        self.rows: List[Dict[str, Any]] = [dict(r) for r in rows]
+        self.indexes: List[List[str]] = []
+
+    def field(self, name: str) -> Optional[FieldInfo]:
+        for f in self.fields:
+            if f.name.upper() == name.upper():
+                return f
+        return None
+
+class MemoryDocument:
+    """Stand-in for an opened .mxd/.aprx (the file itself is never parsed): one layout."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.layouts = [self]
+
+class _Cursor:
+    def __init__(self, rows: List[Dict[str, Any]], fields: Sequence[str]):
+        self.rows = rows
+        self.keys = [f.upper() for f in fields]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+class _SearchCursor(_Cursor):
+    def __iter__(self):
+        for row in self.rows:
+            yield tuple(row.get(k) for k in self.keys)
+
+class _UpdateCursor(_Cursor):
+    def __iter__(self):
+        for row in self.rows:
+            self._current = row
+            yield [row.get(k) for k in self.keys]
+
+    def updateRow(self, values: Sequence[Any]):
+        self._current.update(zip(self.keys, values))
+
+class _InsertCursor(_Cursor):
+    def __init__(self, rows: List[Dict[str, Any]], fields: Sequence[str], table_fields: Sequence[str]):
+        super().__init__(rows, fields)
+        self.table_keys = [f.upper() for f in table_fields]
+
+    def insertRow(self, values: Sequence[Any]):
+        row = dict.fromkeys(self.table_keys)
+        row.update(zip(self.keys, values))
+        self.rows.append(row)
+        return len(self.rows)
+
+class InMemoryBackend(GeoprocessingBackend):
+    """Pure-Python stand-in backend working on in-memory tables.
+
+    Geometry is not modelled: SHAPE_Length is an ordinary field and
+    intersect() joins its first input to the first row of the second input
+    sharing intersect_key (CIRCUIT1), which is how transformer points pick
+    up their conductor's MCD attributes. Every operation is counted in
+    call_counts and delayed according to the latency model, so whole
+    pipeline runs can be timed on machines without ArcGIS.
+    """
+
+    name = 'memory'
+    ExecuteError = BackendExecuteError
+
+    def __init__(self, latency: Optional[LatencyModel] = None, intersect_key: str = 'CIRCUIT1'):
+        self.latency = latency or LatencyModel()
+        self.intersect_key = intersect_key.upper()
+        self.tables: Dict[str, MemoryTable] = {}
+        self.workspaces = set()
+        self.layers: Dict[str, Tuple[str, Any]] = {}
+        self.locked = set()
+        self.call_counts: Counter = Counter()
+        self.env = SimpleNamespace(workspace=None, scratchWorkspace=None,
+                                   overwriteOutput=True, addOutputsToMap=False)
+        self._messages = ""
+
+    # Helpers
+    def _key(self, path: Union[str, Path]) -> str:
+        key = _normalize(path)
+        if '\\' not in key and key.lower() not in self.layers and self.env.workspace:
+            key = f"{_normalize(self.env.workspace)}\\{key}"
+        return key.lower()
+
+    def _fail(self, message: str):
+        self._messages = message
+        raise BackendExecuteError(message)
+
+    def _table(self, dataset: str) -> MemoryTable:
+        layer = self.layers.get(str(dataset).lower())
+        key = layer[0] if layer else self._key(dataset)
+        if key not in self.tables:
+            self._fail(f"ERROR 000732: Dataset {dataset} does not exist or is not supported")
+        return self.tables[key]
+
+    def _rows(self, dataset: str, where_clause: Optional[str] = None) -> List[Dict[str, Any]]:
+        table = self._table(dataset)
+        layer = self.layers.get(str(dataset).lower())
+        rows = table.rows
+        if layer:
+            rows = [r for r in rows if layer[1](r)]
+        if where_clause:
+            predicate = compile_where(where_clause, self._subquery_resolver(dataset))
+            rows = [r for r in rows if predicate(r)]
+        return rows
+
+    def _subquery_resolver(self, dataset: str):
+        layer = self.layers.get(str(dataset).lower())
+        workspace = (layer[0] if layer else self._key(dataset)).rsplit('\\', 1)[0]
+        return lambda table, field: {r.get(field.upper()) for r in self.tables.get(
+            f"{workspace}\\{table.lower()}", MemoryTable()).rows}
+
+    def _store(self, output: str, table: MemoryTable):
+        key = self._key(output)
+        if key in self.tables and not self.env.overwriteOutput:
+            self._fail(f"ERROR 000258: Output {output} already exists")
+        self.tables[key] = table
+
+    def _op(self, operation: str, rows: int = 0):
+        self.call_counts[operation] += 1
+        self.latency.wait(operation, rows)
+
+    # Seeding
+    def register_workspace(self, path: Union[str, Path]) -> str:
+        key = self._key(path)
+        self.workspaces.add(key)
+        return str(path)
+
+    def load_table(self, path: Union[str, Path], fields: Iterable[Union[FieldInfo, Tuple]],
+                   rows: Iterable[Union[Dict[str, Any], Sequence[Any]]] = ()):
+        """Create or replace a table; rows are dicts or sequences in field order."""
+        fields = [f if isinstance(f, FieldInfo) else FieldInfo(*f) for f in fields]
+        names = [f.name.upper() for f in fields]
+        table = MemoryTable(fields)
+        for row in rows:
+            if isinstance(row, dict):
+                table.rows.append({k.upper(): v for k, v in row.items()})
+            else:
+                table.rows.append(dict(zip(names, row)))
+        self.register_workspace(self._key(path).rsplit('\\', 1)[0])
+        self.tables[self._key(path)] = table
+        return table
+
+    # Datasets and workspaces
+    def get_messages(self, severity: int = 2) -> str:
+        return self._messages
+
+    def exists(self, dataset: str) -> bool:
+        if str(dataset).lower() in self.layers:
+            return True
+        key = self._key(dataset)
+        return key in self.tables or key in self.workspaces
+
+    def delete(self, dataset: str):
+        self._op('delete')
+        if self.layers.pop(str(dataset).lower(), None):
+            return
+        key = self._key(dataset)
+        if key in self.workspaces:
+            self.workspaces.discard(key)
+            for table_key in [k for k in self.tables if k.startswith(key + '\\')]:
+                del self.tables[table_key]
+        elif self.tables.pop(key, None) is None:
+            self._fail(f"ERROR 000732: Dataset {dataset} does not exist or is not supported")
+
+    def copy(self, source: str, destination: str):
+        table = self._table(source)
+        rows = self._rows(source)
+        self._op('copy', len(rows))
+        self._store(destination, MemoryTable(table.fields, copy.deepcopy(rows)))
+
+    def create_file_gdb(self, folder: str, name: str) -> str:
+        self._op('create_file_gdb')
+        path = f"{folder}\\{name}"
+        self.register_workspace(path)
+        return path
+
+    def table_to_geodatabase(self, tables: Sequence[str], output_gdb: str):
+        copies = [(self._table(t), self._rows(t), _normalize(t).rsplit('\\', 1)[-1]) for t in tables]
+        self._op('table_to_geodatabase', sum(len(rows) for _, rows, _ in copies))
+        for table, rows, name in copies:
+            destination = f"{output_gdb}\\{name}"
+            # Like the tool, never overwrite: the copy gets a unique name
+            n = 0
+            while self.exists(destination):
+                n += 1
+                destination = f"{output_gdb}\\{name}_{n}"
+            self.tables[self._key(destination)] = MemoryTable(table.fields, copy.deepcopy(rows))
+
+    def create_table(self, workspace: str, name: str) -> str:
+        self._op('create_table')
+        path = f"{workspace}\\{name}"
+        self._store(path, MemoryTable())
+        return path
+
+    def get_count(self, dataset: str) -> int:
+        self._op('get_count')
+        return len(self._rows(dataset))
+
+    def test_schema_lock(self, dataset: str) -> bool:
+        return self._key(dataset) not in self.locked
+
+    # Fields and indexes
+    def list_fields(self, dataset: str, wild_card: Optional[str] = None) -> List[FieldInfo]:
+        fields = self._table(dataset).fields
+        if wild_card:
+            fields = [f for f in fields if fnmatch.fnmatch(f.name.upper(), wild_card.upper())]
+        return list(fields)
+
+    def add_field(self, dataset: str, name: str, field_type: str,
+                  field_length: Optional[int] = None):
+        self._op('add_field')
+        table = self._table(dataset)
+        if table.field(name):
+            self._fail(f"ERROR 000012: {name} already exists")
+        table.fields.append(FieldInfo(name, FIELD_TYPES.get(field_type.upper(), field_type),
+                                      field_length or 8))
+        for row in table.rows:
+            row.setdefault(name.upper(), None)
+
+    def list_indexes(self, dataset: str) -> List[List[str]]:
+        return [list(index) for index in self._table(dataset).indexes]
+
+    def add_index(self, dataset: str, fields: Sequence[str], index_name: str):
+        table = self._table(dataset)
+        self._op('add_index', len(table.rows))
+        table.indexes.append([table.field(f).name if table.field(f) else f for f in fields])
+
+    # Analysis tools
+    def intersect(self, inputs: Sequence[str], output: str, output_type: str = "INPUT"):
+        first, second = inputs[0], inputs[1]
+        first_rows, second_rows = self._rows(first), self._rows(second)
+        self._op('intersect', len(first_rows) + len(second_rows))
+
+        fields = list(self._table(first).fields)
+        names = {f.name.upper() for f in fields}
+        fields += [f for f in self._table(second).fields if f.name.upper() not in names]
+
+        key = self.intersect_key
+        matches = {}
+        for row in second_rows:
+            matches.setdefault(row.get(key), row)
+
+        rows = []
+        for row in first_rows:
+            match = matches.get(row.get(key))
+            if match is not None:
+                rows.append({**match, **row})
+        self._store(output, MemoryTable(fields, rows))
+
+    def statistics(self, in_table: str, out_table: str, statistics_fields: Sequence,
+                   case_fields: Union[str, Sequence[str]]):
+        rows = self._rows(in_table)
+        self._op('statistics', len(rows))
+        table = self._table(in_table)
+
+        if isinstance(statistics_fields, str):
+            statistics_fields = [s.split() for s in statistics_fields.split(';')]
+        if isinstance(case_fields, str):
+            case_fields = case_fields.split(';')
+        case_keys = [f.upper() for f in case_fields]
+
+        groups: Dict[tuple, List[Dict[str, Any]]] = {}
+        for row in rows:
+            groups.setdefault(tuple(row.get(k) for k in case_keys), []).append(row)
+
+        fields = [table.field(f) or FieldInfo(f, 'String', 255) for f in case_fields]
+        fields.append(FieldInfo('FREQUENCY', 'Integer', 4))
+        fields += [FieldInfo(f"{stat.upper()}_{field}", 'Double', 8) for field, stat in statistics_fields]
+
+        out_rows = []
+        # Nulls sort first, like the case field ordering of Statistics_analysis
+        for case in sorted(groups, key=lambda c: [(v is not None, v) for v in c]):
+            members = groups[case]
+            out = dict(zip(case_keys, case))
+            out['FREQUENCY'] = len(members)
+            for field, stat in statistics_fields:
+                values = [r.get(field.upper()) for r in members if r.get(field.upper()) is not None]
+                out[f"{stat.upper()}_{field}".upper()] = _aggregate(stat.upper(), values)
+            out_rows.append(out)
+        self._store(out_table, MemoryTable(fields, out_rows))
+
+    def make_feature_layer(self, dataset: str, layer_name: str,
+                           where_clause: Optional[str] = None) -> str:
+        self._op('make_feature_layer')
+        parent = self.layers.get(str(dataset).lower())
+        source = parent[0] if parent else self._key(dataset)
+        if source not in self.tables:
+            self._fail(f"ERROR 000732: Dataset {dataset} does not exist or is not supported")
+
+        predicate = compile_where(where_clause, self._subquery_resolver(dataset))
+        if parent:
+            parent_predicate = parent[1]
+            combined = lambda row: parent_predicate(row) and predicate(row)
+        else:
+            combined = predicate
+        self.layers[layer_name.lower()] = (source, combined)
+        return layer_name
+
+    # Cursors
+    def search_cursor(self, dataset: str, fields: Sequence[str],
+                      where_clause: Optional[str] = None):
+        rows = self._rows(dataset, where_clause)
+        self._op('search_cursor', len(rows))
+        return _SearchCursor(rows, fields)
+
+    def update_cursor(self, dataset: str, fields: Sequence[str],
+                      where_clause: Optional[str] = None):
+        rows = self._rows(dataset, where_clause)
+        self._op('update_cursor', len(rows))
+        return _UpdateCursor(rows, fields)
+
+    def insert_cursor(self, dataset: str, fields: Sequence[str]):
+        table = self._table(dataset)
+        self._op('insert_cursor')
+        return _InsertCursor(table.rows, fields, [f.name for f in table.fields])
+
+    # Bulk NumPy transfer
+    def table_to_numpy(self, dataset: str, fields: Sequence[str], null_value=None):
+        import numpy as np
+
+        table = self._table(dataset)
+        rows = self._rows(dataset)
+        self._op('table_to_numpy', len(rows))
+
+        dtype = []
+        for name in fields:
+            field = table.field(name)
+            if field is None:
+                self._fail(f"ERROR 000728: Field {name} does not exist within table")
+            dtype.append((field.name, _numpy_type(field)))
+
+        def fill(name, value):
+            if value is not None:
+                return value
+            if isinstance(null_value, dict):
+                return null_value.get(name)
+            return null_value
+
+        records = [tuple(fill(f, r.get(f.upper())) for f in fields) for r in rows]
+        return np.array(records, dtype=dtype)
+
+    def numpy_to_table(self, array, out_table: str):
+        if self.exists(out_table):
+            self._fail(f"ERROR 000258: Output {out_table} already exists")
+        self._op('numpy_to_table', len(array))
+        fields = [FieldInfo(name, *_field_type(array.dtype[name])) for name in array.dtype.names]
+        rows = [{name.upper(): _python_value(record[name]) for name in array.dtype.names}
+                for record in array]
+        self._store(out_table, MemoryTable(fields, rows))
+
+    # Map documents
+    def open_document(self, path: Union[str, Path]) -> Any:
+        self._op('open_document')
+        return MemoryDocument(Path(path))
+
+    def list_layouts(self, document: Any) -> List[Any]:
+        return document.layouts
+
+    def export_pdf(self, target: Any, output_path: Union[str, Path], resolution: int = 300):
+        self._op('export_pdf')
+        output_path = Path(output_path)
+        if not output_path.parent.exists():
+            self._fail(f"ERROR 000210: Cannot create output {output_path}")
+        output_path.write_bytes(
+            b"%PDF-1.4\n% Stand-in export of " + str(target.path).encode('utf-8') +
+            f" at {resolution} dpi\n%%EOF\n".encode('utf-8')
+        )
+
+def _normalize(path: Union[str, Path]) -> str:
+    return str(path).replace('/', '\\').rstrip('\\')
+
+def _aggregate(stat: str, values: List[Any]) -> Any:
+    if stat == 'COUNT':
+        return len(values)
+    if not values:
+        return None
+    if stat == 'SUM':
+        return sum(values)
+    if stat == 'MEAN':
+        return sum(values) / len(values)
+    if stat == 'MIN':
+        return min(values)
+    if stat == 'MAX':
+        return max(values)
+    if stat == 'FIRST':
+        return values[0]
+    if stat == 'LAST':
+        return values[-1]
+    raise BackendExecuteError(f"Unsupported statistic: {stat}")
+
+def _numpy_type(field: FieldInfo) -> str:
+    if field.type == 'String':
+        return f"U{field.length or 255}"
+    if field.type in ('Double', 'Single'):
+        return 'f8'
+    return 'i8'
+
+def _field_type(dtype) -> Tuple[str, int]:
+    if dtype.kind == 'U':
+        return 'String', dtype.itemsize // 4
+    if dtype.kind == 'f':
+        return 'Double', 8
+    return 'Integer', 4
+
+def _python_value(value: Any) -> Any:
+    value = value.item() if hasattr(value, 'item') else value
+    # NaN is how NumPy arrays carry nulls in float fields
+    return None if isinstance(value, float) and value != value else value
@@ -0,0 +1,67 @@
+import random
+from typing import Dict, List, Mapping
+from scripts.backends.memory_backend import InMemoryBackend
+
+ORIENTATIONS = ("OVERHEAD", "UNDERGROUND")
+
+PRICOND_FIELDS = [
+    ("CIRCUIT1", "String", 20),
+    ("MCD_CODE", "String", 10),
+    ("MCD_NAME", "String", 50),
+    ("ORIENTATION", "String", 20),
+    ("SHAPE_Length", "Double", 8)
+]
+XFMR_FIELDS = [
+    ("CIRCUIT1", "String", 20),
+    ("CUSTOMER_COUNT", "Integer", 4)
+]
+MCD_FIELDS = [
+    ("MCD_CODE", "String", 10),
+    ("MCD_NAME", "String", 50)
+]
+CIRCUIT_SUM_FIELDS = [
+    ("CIRCUIT1", "String", 20),
+    ("MCD_CODE", "String", 10)
+]
+
+def circuit_id(substation_number: int, circuit_number: int) -> str:
+    """Fixed-width circuit ids, so the selection builder can use range predicates."""
+    return f"{substation_number:02d}-{circuit_number:03d}"
+
+def seed_network(backend: InMemoryBackend, config: Mapping, circuits_per_substation: int = 20,
+                 segments_per_circuit: int = 25, transformers_per_segment: int = 2,
+                 mcd_count: int = 40, seed: int = 0) -> Dict[str, int]:
+    """Populate an InMemoryBackend with a synthetic network for the configured substations.
+
+    Creates the xfmr, pricond and mcd source datasets and each substation's
+    PriCond_MCD_{sub}_Sum circuit table in the workspace. The same seed
+    always produces the same network. Returns the row count of each table.
+    """
+    rng = random.Random(seed)
+    source_data = config['paths']['source_data']
+    workspace = config['paths']['workspace']
+
+    mcds = [(f"{n:05d}", f"MCD {n}") for n in range(1, mcd_count + 1)]
+    backend.load_table(source_data['mcd'], MCD_FIELDS, mcds)
+
+    pricond: List[tuple] = []
+    xfmr: List[tuple] = []
+    backend.register_workspace(workspace)
+    for sub_number, substation in enumerate(config['substations'], start=1):
+        circuit_rows = []
+        for circuit_number in range(1, circuits_per_substation + 1):
+            circuit = circuit_id(sub_number, circuit_number)
+            circuit_mcds = rng.sample(mcds, min(3, len(mcds)))
+            for _ in range(segments_per_circuit):
+                mcd_code, mcd_name = rng.choice(circuit_mcds)
+                pricond.append((circuit, mcd_code, mcd_name, rng.choice(ORIENTATIONS),
+                                rng.uniform(50.0, 2000.0)))
+                for _ in range(transformers_per_segment):
+                    xfmr.append((circuit, rng.randint(1, 40)))
+            circuit_rows += [(circuit, code) for code, _ in circuit_mcds]
+        backend.load_table(f"{workspace}\\PriCond_MCD_{substation.upper()}_Sum",
+                           CIRCUIT_SUM_FIELDS, circuit_rows)
+
+    backend.load_table(source_data['pricond'], PRICOND_FIELDS, pricond)
+    backend.load_table(source_data['xfmr'], XFMR_FIELDS, xfmr)
+    return {'mcd': len(mcds), 'pricond': len(pricond), 'xfmr': len(xfmr)}
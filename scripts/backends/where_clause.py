@@ -0,0 +1,185 @@
+"""Evaluates the SQL where-clause subset the pipeline generates, for InMemoryBackend.
+
+Supported: AND / OR / NOT, parentheses, = <> != < <= > >=, [NOT] IN (...),
+IN (SELECT field FROM table), BETWEEN ... AND ..., IS [NOT] NULL, and
+string / numeric literals. Field names and keywords are case-insensitive.
+"""
+import re
+from typing import Any, Callable, Dict, List, Optional, Set
+
+Row = Dict[str, Any]
+Predicate = Callable[[Row], bool]
+SubqueryResolver = Callable[[str, str], Set[Any]]
+
+TOKEN_RE = re.compile(r"""
+    \s*(?:
+        (?P<string>'(?:[^']|'')*')
+      | (?P<number>-?\d+(?:\.\d+)?)
+      | (?P<op><>|!=|<=|>=|=|<|>)
+      | (?P<punct>[(),])
+      | (?P<word>[A-Za-z_][A-Za-z0-9_.@]*)
+    )""", re.VERBOSE)
+
+KEYWORDS = {'AND', 'OR', 'NOT', 'IN', 'IS', 'NULL', 'BETWEEN', 'SELECT', 'FROM'}
+
+class WhereClauseError(ValueError):
+    pass
+
+def _tokenize(text: str) -> List[tuple]:
+    tokens, pos = [], 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = TOKEN_RE.match(text, pos)
+        if not match:
+            raise WhereClauseError(f"Unexpected input at position {pos}: {text[pos:pos + 20]!r}")
+        pos = match.end()
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == 'string':
+            tokens.append(('literal', value[1:-1].replace("''", "'")))
+        elif kind == 'number':
+            tokens.append(('literal', float(value) if '.' in value else int(value)))
+        elif kind == 'word' and value.upper() in KEYWORDS:
+            tokens.append(('kw', value.upper()))
+        elif kind == 'word':
+            tokens.append(('field', value))
+        else:
+            tokens.append((kind, value))
+    return tokens
+
+class _Parser:
+    def __init__(self, tokens: List[tuple], resolve_subquery: Optional[SubqueryResolver]):
+        self.tokens = tokens
+        self.pos = 0
+        self.resolve_subquery = resolve_subquery
+
+    def peek(self, offset: int = 0) -> tuple:
+        index = self.pos + offset
+        return self.tokens[index] if index < len(self.tokens) else ('eof', None)
+
+    def take(self, kind: str, value: Any = None) -> Any:
+        token = self.peek()
+        if token[0] != kind or (value is not None and token[1] != value):
+            raise WhereClauseError(f"Expected {value or kind}, found {token[1]!r}")
+        self.pos += 1
+        return token[1]
+
+    def accept(self, kind: str, value: Any = None) -> bool:
+        token = self.peek()
+        if token[0] == kind and (value is None or token[1] == value):
+            self.pos += 1
+            return True
+        return False
+
+    def parse(self) -> Predicate:
+        predicate = self.or_expr()
+        if self.peek()[0] != 'eof':
+            raise WhereClauseError(f"Unexpected {self.peek()[1]!r}")
+        return predicate
+
+    def or_expr(self) -> Predicate:
+        parts = [self.and_expr()]
+        while self.accept('kw', 'OR'):
+            parts.append(self.and_expr())
+        return parts[0] if len(parts) == 1 else (lambda row: any(p(row) for p in parts))
+
+    def and_expr(self) -> Predicate:
+        parts = [self.not_expr()]
+        while self.accept('kw', 'AND'):
+            parts.append(self.not_expr())
+        return parts[0] if len(parts) == 1 else (lambda row: all(p(row) for p in parts))
+
+    def not_expr(self) -> Predicate:
+        if self.accept('kw', 'NOT'):
+            inner = self.not_expr()
+            return lambda row: not inner(row)
+        if self.peek() == ('punct', '('):
+            self.pos += 1
+            inner = self.or_expr()
+            self.take('punct', ')')
+            return inner
+        return self.comparison()
+
+    def operand(self) -> Callable[[Row], Any]:
+        token = self.peek()
+        if token[0] == 'literal':
+            self.pos += 1
+            value = token[1]
+            return lambda row: value
+        name = self.take('field')
+        key = name.upper()
+        return lambda row: row.get(key)
+
+    def comparison(self) -> Predicate:
+        left = self.operand()
+
+        if self.accept('kw', 'IS'):
+            negate = self.accept('kw', 'NOT')
+            self.take('kw', 'NULL')
+            return (lambda row: left(row) is not None) if negate else (lambda row: left(row) is None)
+
+        negate = self.accept('kw', 'NOT')
+        if self.accept('kw', 'IN'):
+            values = self.in_values()
+            if negate:
+                return lambda row: left(row) is not None and left(row) not in values
+            return lambda row: left(row) in values
+
+        if self.accept('kw', 'BETWEEN'):
+            low = self.operand()
+            self.take('kw', 'AND')
+            high = self.operand()
+            inside = lambda row: _compare(left(row), '>=', low(row)) and _compare(left(row), '<=', high(row))
+            return (lambda row: not inside(row)) if negate else inside
+        if negate:
+            raise WhereClauseError("NOT must be followed by IN or BETWEEN here")
+
+        op = self.take('op')
+        right = self.operand()
+        return lambda row: _compare(left(row), op, right(row))
+
+    def in_values(self) -> Set[Any]:
+        self.take('punct', '(')
+        if self.accept('kw', 'SELECT'):
+            field = self.take('field')
+            self.take('kw', 'FROM')
+            table = self.take('field')
+            self.take('punct', ')')
+            if self.resolve_subquery is None:
+                raise WhereClauseError("Subqueries are not supported here")
+            return set(self.resolve_subquery(table, field))
+
+        values = set()
+        while True:
+            values.add(self.take('literal'))
+            if self.accept('punct', ')'):
+                return values
+            self.take('punct', ',')
+
+def _compare(left: Any, op: str, right: Any) -> bool:
+    # SQL semantics: comparisons with NULL are never true
+    if left is None or right is None:
+        return False
+    try:
+        if op == '=':
+            return left == right
+        if op in ('<>', '!='):
+            return left != right
+        if op == '<':
+            return left < right
+        if op == '<=':
+            return left <= right
+        if op == '>':
+            return left > right
+        if op == '>=':
+            return left >= right
+    except TypeError:
+        return False
+    raise WhereClauseError(f"Unknown operator {op}")
+
+def compile_where(where_clause: Optional[str],
+                  resolve_subquery: Optional[SubqueryResolver] = None) -> Predicate:
+    """Compile a where clause into a predicate over rows keyed by UPPER-CASE field name."""
+    if not where_clause or not where_clause.strip():
+        return lambda row: True
+    return _Parser(_tokenize(where_clause), resolve_subquery).parse()
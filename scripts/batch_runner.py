@@ -0,0 +1,166 @@
+import os
+import csv
+import time
+import shutil
+import tempfile
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+from scripts.helpers.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+# Scratch geodatabase owned by the current worker process (set by _init_worker)
+_worker_scratch: Optional[Path] = None
+
+# MapGenerator of the current worker process, reused so its open templates
+# and caches carry over from one substation to the next
+_worker_generator = None
+
+def _init_worker(scratch_root: str, settings=None):
+    """Start a geoprocessing session with a private scratch workspace for this worker."""
+    global _worker_scratch
+    from scripts.backends import get_backend
+    from scripts.helpers.config_utils import prime_config
+
+    # Reuse the parent's parsed settings instead of re-reading settings.yaml
+    if settings is not None:
+        prime_config(settings)
+
+    backend = get_backend()
+    worker_dir = Path(tempfile.mkdtemp(prefix=f"worker_{os.getpid()}_", dir=scratch_root))
+    backend.create_file_gdb(str(worker_dir), "scratch.gdb")
+    _worker_scratch = worker_dir / "scratch.gdb"
+
+    backend.env.scratchWorkspace = str(_worker_scratch)
+    backend.env.overwriteOutput = True
+    logger.info(f"Worker {os.getpid()} using scratch workspace: {_worker_scratch}")
+
+def _get_generator(workspace: Path):
+    global _worker_generator
+    from scripts.map_generator import MapGenerator
+
+    if _worker_generator is None or _worker_generator.workspace != workspace:
+        _worker_generator = MapGenerator(workspace, scratch_workspace=_worker_scratch)
+    _worker_generator.last_exports = []
+    return _worker_generator
+
+def run_substation(source_sub: str, year: str, workspace: Union[str, Path],
+                   export_workers: Optional[int] = None, force: bool = False,
+                   resume: bool = False) -> Dict:
+    """Run intersections and map generation for one substation.
+
+    Returns a result record; exceptions are captured rather than raised so a
+    single bad substation never takes down the whole batch. Its 'exports'
+    entry holds the export record of each map. With resume, the stages an
+    interrupted run completed are not redone.
+    """
+    start = time.time()
+    result = {
+        'substation': source_sub,
+        'year': year,
+        'status': 'Failed',
+        'duration': 0.0,
+        'worker': os.getpid(),
+        'error': None,
+        'exports': []
+    }
+
+    generator = None
+    try:
+        generator = _get_generator(Path(workspace))
+
+        if not generator.process_intersections(force):
+            result['error'] = "Failed to process intersections"
+        elif not generator.generate_maps(source_sub, year, export_workers, force, resume):
+            result['error'] = "Failed to generate maps"
+        else:
+            result['status'] = 'Success'
+
+    except Exception as e:
+        logger.error(f"Unhandled error for {source_sub}: {e}")
+        logger.error(traceback.format_exc())
+        result['error'] = str(e)
+
+    if generator is not None:
+        result['exports'] = generator.last_exports
+    result['duration'] = round(time.time() - start, 2)
+    return result
+
+def run_batch(substations: List[str], year: str, workspace: Union[str, Path],
+              workers: Optional[int] = None, export_workers: Optional[int] = None,
+              force: bool = False, ledger=None, resume: bool = False) -> List[Dict]:
+    """Generate maps for several substations in parallel worker processes.
+
+    Export records are appended to ledger (a RunLedger), when given, as each
+    substation finishes; only this process writes to it.
+    """
+    workers = max(1, min(workers or os.cpu_count() or 1, len(substations)))
+    scratch_root = tempfile.mkdtemp(prefix="mapgen_batch_")
+    logger.info(f"Starting batch of {len(substations)} substations with {workers} workers")
+
+    from scripts.helpers.config_utils import load_config
+    from scripts.source_mirror import refresh_mirror
+    from scripts.run_history import RunHistory, longest_first
+    settings = load_config()
+
+    # Start the substations that took longest last time first, so a large
+    # one doesn't start last and stretch the whole batch
+    history = RunHistory.from_config(settings)
+    expected = history.expected_all([sub.upper() for sub in substations], 'generate_maps')
+    history.close()
+    schedule = longest_first(substations, {sub: expected[sub.upper()]
+                                           for sub in substations if sub.upper() in expected})
+    if expected:
+        logger.info(f"Scheduled by expected duration: {', '.join(schedule)}")
+
+    # Refresh the local mirror once here rather than racing in every worker
+    refresh_mirror(settings)
+
+    results = []
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(scratch_root, settings)) as pool:
+            futures = {
+                pool.submit(run_substation, sub, year, str(workspace), export_workers, force, resume): sub
+                for sub in schedule
+            }
+            for future in as_completed(futures):
+                sub = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # Worker process died (e.g. arcpy crash) before returning a record
+                    result = {'substation': sub, 'year': year, 'status': 'Failed',
+                              'duration': 0.0, 'worker': None, 'error': str(e)}
+                results.append(result)
+                if ledger is not None:
+                    for record in result.get('exports', []):
+                        ledger.record_result(record)
+                logger.info(f"{sub}: {result['status']} in {result['duration']:.1f}s")
+    finally:
+        shutil.rmtree(scratch_root, ignore_errors=True)
+
+    # Report in the order the substations were requested
+    order = {sub: i for i, sub in enumerate(substations)}
+    return sorted(results, key=lambda r: order[r['substation']])
+
+def format_report(results: List[Dict]) -> str:
+    """Format batch results as a plain-text table."""
+    lines = [f"{'Substation':<20} {'Status':<8} {'Time (s)':>9}  Error"]
+    for r in results:
+        lines.append(f"{r['substation']:<20} {r['status']:<8} {r['duration']:>9.1f}  {r['error'] or ''}")
+
+    succeeded = sum(1 for r in results if r['status'] == 'Success')
+    lines.append(f"{succeeded}/{len(results)} substations succeeded")
+    return "\n".join(lines)
+
+def export_report(results: List[Dict], output_path: Path):
+    """Write batch results to a CSV file."""
+    fields = ['substation', 'year', 'status', 'duration', 'worker', 'error']
+    with open(output_path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fields, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(results)
+    logger.info(f"Exported batch report to: {output_path}")
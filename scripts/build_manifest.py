@@ -0,0 +1,39 @@
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Union
+from scripts.helpers.fingerprint import FingerprintStore, compute_fingerprint, path_fingerprint
+from scripts.helpers.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+MANIFEST_NAME = ".build_manifest.json"
+
+def export_fingerprint(template_path: Union[str, Path], resolution: int,
+                       options: Optional[Dict[str, Any]] = None,
+                       sources: Iterable[Dict[str, Any]] = ()) -> str:
+    """Fingerprint everything that determines the content of an exported PDF.
+    
+    sources are pre-computed dataset fingerprints, so callers can compute them
+    once and share them across all maps of a run.
+    """
+    return compute_fingerprint(
+        path_fingerprint(template_path),
+        {'resolution': resolution, **(options or {})},
+        list(sources)
+    )
+
+class BuildManifest(FingerprintStore):
+    """Records the fingerprint each output PDF was last built from."""
+    
+    @classmethod
+    def for_directory(cls, output_dir: Union[str, Path]) -> "BuildManifest":
+        return cls(Path(output_dir) / MANIFEST_NAME)
+    
+    def is_current(self, output_path: Union[str, Path], fingerprint: str) -> bool:
+        """True if output_path exists and was built from the same fingerprint."""
+        output_path = Path(output_path)
+        return output_path.exists() and self.matches(output_path.name, fingerprint)
+    
+    def record(self, output_path: Union[str, Path], fingerprint: str):
+        """Record a successful build and persist the manifest."""
+        self.set(Path(output_path).name, fingerprint)
+        self.save()
@@ -0,0 +1,71 @@
+"""Stage checkpoints of a substation's map generation, for resuming a run.
+
+Each completed stage of a substation and year (the vegetation summary
+tables, then each map export) is recorded with its outputs and the
+fingerprint of its inputs in .checkpoint.json in the substation's export
+folder, so a run started on another host can resume it as well. A resumed
+run skips the stages that completed from the same inputs and whose outputs
+are still valid; everything after the first incomplete stage is redone.
+The intersections are shared by all substations and have their own cache.
+"""
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, Union
+from scripts.helpers.fingerprint import FingerprintStore
+from scripts.helpers.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+CHECKPOINT_NAME = ".checkpoint.json"
+
+VEGETATION = 'vegetation'
+
+def export_stage(map_type: str) -> str:
+    return f"export:{map_type}"
+
+def valid_pdf(path: Union[str, Path]) -> bool:
+    """True if path is a non-empty file starting with a PDF header."""
+    try:
+        with open(path, 'rb') as f:
+            return f.read(5) == b'%PDF-'
+    except OSError:
+        return False
+
+class StageCheckpoint(FingerprintStore):
+    """Completed stages of one substation and year: stage -> fingerprint, outputs, time."""
+
+    @classmethod
+    def for_directory(cls, output_dir: Union[str, Path]) -> "StageCheckpoint":
+        return cls(Path(output_dir) / CHECKPOINT_NAME)
+
+    def complete(self, stage: str, fingerprint: str, outputs: List[str]):
+        """Record a finished stage and persist the checkpoint."""
+        self.set(stage, {
+            'fingerprint': fingerprint,
+            'outputs': [str(output) for output in outputs],
+            'completed': datetime.now().isoformat(timespec='seconds')
+        })
+        self.save()
+
+    def reset(self):
+        """Forget every stage, e.g. when a run starts over."""
+        for stage in list(self._entries):
+            self.remove(stage)
+        self.save()
+
+    def is_complete(self, stage: str, fingerprint: str,
+                    exists: Callable[[str], bool]) -> bool:
+        """True if stage completed from the same inputs and its outputs are still valid.
+
+        PDFs must be non-empty and start with a PDF header; other outputs
+        (tables) are checked with exists, e.g. the backend's.
+        """
+        entry = self.get(stage)
+        if not entry or entry.get('fingerprint') != fingerprint:
+            return False
+        for output in entry.get('outputs', []):
+            valid = valid_pdf(output) if output.lower().endswith('.pdf') else exists(output)
+            if not valid:
+                logger.info(f"Redoing {stage}: {output} is missing or invalid")
+                return False
+        return True
@@ -0,0 +1,109 @@
+import time
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from scripts.helpers.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+# Pseudo-substation holding every circuit in the network (see set_universe)
+UNIVERSE = '*'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    substation TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS circuits (
+    substation TEXT NOT NULL,
+    circuit TEXT NOT NULL,
+    mcd_code TEXT NOT NULL,
+    PRIMARY KEY (substation, circuit, mcd_code)
+);
+"""
+
+class CircuitIndex:
+    """Persistent substation -> circuit -> MCD code index stored in SQLite.
+    
+    Each substation is stored with the fingerprint of the data it was built
+    from, so the index is refreshed one substation at a time and only when
+    that substation's source changes. Lookups are served from an in-memory
+    map loaded once per process.
+    """
+    
+    def __init__(self, db_path: Union[str, Path]):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # Generous timeout: batch workers may refresh different substations at once
+        self.conn = sqlite3.connect(str(self.db_path), timeout=30)
+        self.conn.executescript(SCHEMA)
+        self._circuits: Optional[Dict[str, Dict[str, List[str]]]] = None
+    
+    def _load(self) -> Dict[str, Dict[str, List[str]]]:
+        """Load the whole index into memory (substation -> circuit -> MCD codes)."""
+        if self._circuits is None:
+            circuits: Dict[str, Dict[str, List[str]]] = {}
+            rows = self.conn.execute(
+                "SELECT substation, circuit, mcd_code FROM circuits "
+                "ORDER BY substation, circuit, mcd_code"
+            )
+            for substation, circuit, mcd_code in rows:
+                circuits.setdefault(substation, {}).setdefault(circuit, []).append(mcd_code)
+            for substation, in self.conn.execute("SELECT substation FROM sources"):
+                circuits.setdefault(substation, {})
+            self._circuits = circuits
+        return self._circuits
+    
+    def is_current(self, substation: str, fingerprint: str) -> bool:
+        """True if substation was indexed from data with this fingerprint."""
+        row = self.conn.execute(
+            "SELECT fingerprint FROM sources WHERE substation = ?", (substation.upper(),)
+        ).fetchone()
+        return row is not None and row[0] == fingerprint
+    
+    def update_substation(self, substation: str, rows: Iterable[Tuple[str, str]], 
+                          fingerprint: str):
+        """Replace the circuits and MCD codes recorded for one substation."""
+        substation = substation.upper()
+        entries = {(substation, str(circuit), str(mcd_code)) for circuit, mcd_code in rows}
+        
+        with self.conn:
+            self.conn.execute("DELETE FROM circuits WHERE substation = ?", (substation,))
+            self.conn.executemany("INSERT INTO circuits VALUES (?, ?, ?)", entries)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sources VALUES (?, ?, ?)",
+                (substation, fingerprint, time.time())
+            )
+        
+        self._circuits = None
+        logger.info(f"Indexed {len(entries)} circuit/MCD pairs for {substation}")
+    
+    def set_universe(self, circuits: Iterable[str], fingerprint: str):
+        """Record every circuit in the network, used to build range selections."""
+        self.update_substation(UNIVERSE, ((circuit, '') for circuit in circuits), fingerprint)
+    
+    def universe(self) -> List[str]:
+        """Every circuit in the network (empty until set_universe is called)."""
+        return self.circuits(UNIVERSE)
+    
+    def circuits(self, substation: str) -> List[str]:
+        """Sorted circuits for a substation (empty if not indexed)."""
+        return list(self._load().get(substation.upper(), {}))
+    
+    def mcd_codes(self, substation: str, circuit: Optional[str] = None) -> List[str]:
+        """MCD codes for a substation, optionally limited to one circuit."""
+        by_circuit = self._load().get(substation.upper(), {})
+        if circuit is not None:
+            return list(by_circuit.get(circuit, []))
+        return sorted({code for codes in by_circuit.values() for code in codes})
+    
+    def substations(self) -> List[str]:
+        """All indexed substations."""
+        return sorted(sub for sub in self._load() if sub != UNIVERSE)
+    
+    def __contains__(self, substation: str) -> bool:
+        return substation.upper() != UNIVERSE and substation.upper() in self._load()
+    
+    def close(self):
+        self.conn.close()
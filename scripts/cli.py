@@ -1,6 +1,5 @@
 import click
 from pathlib import Path
-from scripts.file_handler import FileHandler
 from scripts.helpers.config_utils import (
     load_config, 
     validate_substation, 
@@ -9,16 +8,23 @@ from scripts.helpers.config_utils import (
 from scripts.helpers.logging_utils import get_logger
 import sys
 from scripts.helpers.verify_setup import run_verification
-from scripts.process_mxd import MXDProcessor
-from scripts.process_aprx import APRXProcessor
-from scripts.map_generator import MapGenerator
+from scripts.helpers.tracing import configure_from_settings, merge_trace
+from scripts.helpers.progress import configure_progress, PROGRESS_MODES
+from config.fixed_paths import CIRCUIT_INDEX_PATH
+
+# Modules that import arcpy or pandas are imported inside the commands that
+# need them, so --help, verify and gui start without loading ArcGIS.
 
 logger = get_logger(__name__)
 
 @click.group()
-def cli():
+@click.option('--progress', type=click.Choice(PROGRESS_MODES), default=None,
+              help='Progress output: log lines (default), a console status line, '
+                   'NDJSON on stdout, or none')
+def cli(progress: str):
     """Map processing pipeline CLI."""
-    pass
+    if progress:
+        configure_progress([progress])
 
 @cli.command()
 def verify():
@@ -66,31 +72,414 @@ def process_maps():
         sys.exit(1)
 
 @cli.command()
-@click.argument('source_sub')
+@click.argument('source_sub', required=False)
 @click.option('--year', default='2024', help='Processing year')
-def generate_maps(source_sub: str, year: str):
-    """Generate maps for a given substation."""
+@click.option('--all', 'all_subs', is_flag=True, help='Generate maps for every configured substation')
+@click.option('--workers', type=int, default=None, help='Worker processes for --all (default: CPU count)')
+@click.option('--report', type=click.Path(), help='Write the --all per-substation report to a CSV file')
+@click.option('--export-workers', type=click.IntRange(min=1), default=None,
+              help='Map exports to run concurrently per substation (default: from settings)')
+@click.option('--force', is_flag=True, help='Rebuild intersections and re-export maps even if inputs are unchanged')
+@click.option('--trace', is_flag=True, help='Write stage timing traces for this run (see tracing in settings)')
+@click.option('--resume', is_flag=True, help='Continue an interrupted run from its first incomplete stage')
+def generate_maps(source_sub: str, year: str, all_subs: bool, workers: int, report: str,
+                  export_workers: int, force: bool, trace: bool, resume: bool):
+    """Generate maps for a given substation, or every substation with --all."""
+    from scripts.run_ledger import RunLedger
+    
+    tracing = None
+    ledger = None
     try:
         config = load_config()
+        workspace = Path(config['paths']['workspace'])
+        tracing = configure_from_settings(config, force=trace)
+        ledger = RunLedger.from_config(config)
+        
+        if all_subs:
+            _generate_all(config['substations'], year, workspace, workers, report, 
+                          export_workers, force, ledger, resume)
+            return
         
-        if not validate_substation(source_sub, config):
+        if not source_sub:
+            raise click.UsageError("Provide a SOURCE_SUB or use --all")
+        
+        from scripts.map_generator import MapGenerator
+        from scripts.circuit_index import CircuitIndex
+        from scripts.source_mirror import refresh_mirror
+        
+        circuit_index = CircuitIndex(config['paths'].get('circuit_index', CIRCUIT_INDEX_PATH))
+        if not validate_substation(source_sub, config, circuit_index):
             raise click.ClickException(f"Invalid substation: {source_sub}")
             
-        workspace = Path(config['paths']['workspace'])
-        generator = MapGenerator(workspace)
+        refresh_mirror(config)
+        generator = MapGenerator(workspace, ledger=ledger)
         
-        if not generator.process_intersections():
+        if not generator.process_intersections(force):
             raise click.ClickException("Failed to process intersections")
             
-        if not generator.generate_maps(source_sub, year):
+        if not generator.generate_maps(source_sub, year, export_workers, force, resume):
             raise click.ClickException("Failed to generate maps")
             
+    except click.ClickException:
+        raise
     except ConfigurationError as e:
         logger.error(f"Configuration error: {e}")
         raise click.ClickException(str(e))
     except Exception as e:
         logger.error(f"Failed to generate maps: {e}")
         raise click.ClickException(str(e))
+    finally:
+        if ledger is not None:
+            ledger.close()
+            if ledger.count:
+                click.echo(f"Run {ledger.run_id} recorded in {ledger.path}")
+        if tracing:
+            click.echo(f"Trace written to {merge_trace(*tracing)}")
+
+def _generate_all(substations, year: str, workspace: Path, workers: int, report: str,
+                  export_workers: int, force: bool, ledger=None, resume: bool = False):
+    """Run every substation through the batch runner and report the results."""
+    from scripts.batch_runner import run_batch, format_report, export_report
+    
+    results = run_batch(list(substations), year, workspace, workers, export_workers, force,
+                        ledger=ledger, resume=resume)
+    click.echo(format_report(results))
+    
+    if report:
+        export_report(results, Path(report))
+    
+    failed = [r['substation'] for r in results if r['status'] != 'Success']
+    if failed:
+        raise click.ClickException(f"Map generation failed for: {', '.join(failed)}")
+
+@cli.command()
+@click.argument('substations', nargs=-1)
+def build_index(substations):
+    """Refresh the circuit index for the given (default: all configured) substations."""
+    try:
+        from scripts.map_generator import MapGenerator
+        
+        config = load_config()
+        generator = MapGenerator(Path(config['paths']['workspace']))
+        
+        for source_sub in substations or config['substations']:
+            circuits = generator.get_circuits(source_sub)
+            click.echo(f"{source_sub}: {len(circuits)} circuits")
+    except Exception as e:
+        logger.error(f"Failed to build circuit index: {e}")
+        raise click.ClickException(str(e))
+
+@cli.group()
+def mirror():
+    """Manage the local mirror of source datasets and templates."""
+    pass
+
+def _get_mirror():
+    from scripts.source_mirror import SourceMirror
+    source_mirror = SourceMirror.from_config(load_config())
+    if source_mirror is None:
+        raise click.ClickException("The local mirror is disabled (mirror.enabled in settings.yaml)")
+    return source_mirror
+
+@mirror.command('refresh')
+@click.option('--force', is_flag=True, help='Copy every dataset even if unchanged')
+def mirror_refresh(force: bool):
+    """Refresh mirrored datasets whose sources changed."""
+    results = _get_mirror().refresh(force=force)
+    for name, result in results.items():
+        click.echo(f"{name:<12} {result}")
+    if 'failed' in results.values():
+        raise click.ClickException("Some datasets could not be mirrored")
+
+@mirror.command('status')
+@click.option('--no-check', is_flag=True, help="Don't query sources for changes")
+def mirror_status(no_check: bool):
+    """Show how stale each mirrored item is."""
+    for row in _get_mirror().status(check_sources=not no_check):
+        if not row['mirrored']:
+            state, age = "not mirrored", ""
+        else:
+            state = {True: "STALE", False: "current", None: "unknown"}[row['stale']]
+            age = f"{row['age'] / 3600:.1f}h old"
+        click.echo(f"{row['name']:<12} {state:<13} {age:<10} {row['source']}")
+
+@cli.group()
+def ledger():
+    """Inspect the run ledger of processed files."""
+    pass
+
+def _ledger_path():
+    return load_config()['paths'].get('ledger') or None
+
+@ledger.command('runs')
+@click.option('--last', type=int, default=10, help='Number of most recent runs to show')
+def ledger_runs(last: int):
+    """Summarise recent runs."""
+    from scripts.run_ledger import read_ledger, summarize_runs, LEDGER_PATH
+    
+    summary = summarize_runs(read_ledger(_ledger_path() or LEDGER_PATH))
+    if not summary:
+        click.echo("The ledger is empty")
+        return
+    click.echo(f"{'Run':<24} {'Files':>6} {'Failed':>7} {'Skipped':>8} {'Total (s)':>10} "
+               f"{'Median (s)':>11} {'MB':>8}")
+    for row in summary[-last:]:
+        median = f"{row['median_duration']:.2f}" if row['median_duration'] is not None else "-"
+        click.echo(f"{row['run_id']:<24} {row['files']:>6} {row['failed']:>7} {row['skipped']:>8} "
+                   f"{row['total_duration']:>10.2f} {median:>11} {row['output_bytes'] / 1e6:>8.1f}")
+
+@ledger.command('compare')
+@click.argument('baseline', required=False)
+@click.argument('candidate', required=False)
+@click.option('--threshold', type=float, default=1.25, help='Slowdown ratio to report')
+@click.option('--min-duration', type=float, default=0.5, help='Ignore files faster than this (seconds)')
+def ledger_compare(baseline: str, candidate: str, threshold: float, min_duration: float):
+    """Report files that got slower between two runs (default: the last two)."""
+    from scripts.run_ledger import read_ledger, list_runs, compare_runs, LEDGER_PATH
+    
+    records = read_ledger(_ledger_path() or LEDGER_PATH)
+    runs = list_runs(records)
+    if not candidate:
+        if len(runs) < 2:
+            raise click.ClickException("The ledger needs at least two runs to compare")
+        # A lone argument is the baseline for the latest run
+        baseline, candidate = baseline or runs[-2], runs[-1]
+    for run_id in (baseline, candidate):
+        if run_id not in runs:
+            raise click.ClickException(f"Unknown run: {run_id}")
+    
+    slowdowns = compare_runs(records, baseline, candidate, threshold, min_duration)
+    if not slowdowns:
+        click.echo(f"No files slowed down by {threshold}x or more from {baseline} to {candidate}")
+        return
+    for row in slowdowns:
+        click.echo(f"{row['ratio']:>6.2f}x {row['baseline']:>8.2f}s -> {row['candidate']:>8.2f}s  {row['file']}")
+    raise click.ClickException(f"{len(slowdowns)} files slowed down from {baseline} to {candidate}")
+
+@ledger.command('compact')
+@click.option('--output', type=click.Path(), help='Parquet file (default: next to the ledger)')
+def ledger_compact(output: str):
+    """Write the ledger as a Parquet file (needs pyarrow)."""
+    from scripts.run_ledger import compact_ledger, LEDGER_PATH
+    
+    path = compact_ledger(_ledger_path() or LEDGER_PATH, output)
+    if path is None:
+        raise click.ClickException("Parquet output needs pandas with pyarrow installed")
+    click.echo(f"Wrote {path}")
+
+@cli.group()
+def daemon():
+    """Run jobs on a daemon that keeps arcpy and the templates loaded."""
+    pass
+
+def _daemon_client():
+    from scripts.daemon import DaemonClient, DaemonError
+
+    try:
+        return DaemonClient()
+    except DaemonError as e:
+        raise click.ClickException(f"{e} (start it with: daemon start)")
+
+def _daemon_request(method, *args, **kwargs):
+    from scripts.daemon import DaemonError
+
+    try:
+        return method(*args, **kwargs)
+    except DaemonError as e:
+        raise click.ClickException(str(e))
+
+def _echo_jobs(jobs):
+    from scripts.daemon import _describe
+
+    for job in jobs:
+        line = f"{job['id']:>5} {job['type']:<9} {job['status']:<10} {job['duration']:>8.1f}s  {_describe(job)}"
+        if job['error']:
+            line += f"  ({job['error']})"
+        click.echo(line)
+
+def _submit_to_daemon(job_type: str, wait: bool, **args):
+    client = _daemon_client()
+    job = _daemon_request(client.submit, job_type, **args)
+    click.echo(f"Queued job {job['id']}")
+    if wait:
+        job = _daemon_request(client.wait, job['id'])
+        _echo_jobs([job])
+        if job['status'] != 'Success':
+            raise click.ClickException(f"Job {job['id']} {job['status'].lower()}")
+
+@daemon.command('start')
+@click.option('--workers', type=click.IntRange(min=1), default=None,
+              help='Warm worker processes (default: daemon.workers in settings)')
+@click.option('--year', default=None, help='Year of the templates to open up front (default: default_year)')
+def daemon_start(workers: int, year: str):
+    """Run the daemon in this terminal until it is stopped."""
+    from scripts.daemon import MapDaemon, connect
+
+    if connect() is not None:
+        raise click.ClickException("A map daemon is already running")
+    config = load_config()
+    map_daemon = MapDaemon(
+        Path(config['paths']['workspace']),
+        workers or (config.get('daemon') or {}).get('workers', 1),
+        settings=config,
+        year=year or config['options'].get('default_year')
+    )
+    try:
+        map_daemon.start()
+    except OSError as e:
+        map_daemon.close()
+        raise click.ClickException(f"Could not start the daemon: {e}")
+    click.echo(f"Map daemon ready with {map_daemon.workers} workers (Ctrl+C to stop)")
+    map_daemon.serve_forever()
+
+@daemon.command('stop')
+@click.option('--now', is_flag=True, help='Cancel queued jobs instead of running them first')
+def daemon_stop(now: bool):
+    """Stop the daemon once its jobs are done."""
+    pending = _daemon_request(_daemon_client().stop, now)
+    click.echo(f"Daemon stopping after {len(pending)} remaining jobs" if pending else "Daemon stopping")
+
+@daemon.command('status')
+@click.argument('job_id', type=int, required=False)
+def daemon_status(job_id: int):
+    """Show the daemon's jobs, or one job."""
+    jobs = _daemon_request(_daemon_client().status, job_id)
+    if not jobs:
+        click.echo("No jobs")
+    _echo_jobs(jobs)
+
+@daemon.command('cancel')
+@click.argument('job_id', type=int)
+def daemon_cancel(job_id: int):
+    """Cancel a queued job."""
+    job = _daemon_request(_daemon_client().cancel, job_id)
+    if job['status'] != 'Cancelled':
+        raise click.ClickException(f"Job {job_id} is {job['status'].lower()} and can't be cancelled")
+    click.echo(f"Cancelled job {job_id}")
+
+@daemon.command('submit')
+@click.argument('source_sub')
+@click.option('--year', default='2024', help='Processing year')
+@click.option('--force', is_flag=True, help='Rebuild intersections and re-export maps even if inputs are unchanged')
+@click.option('--resume', is_flag=True, help='Continue an interrupted run from its first incomplete stage')
+@click.option('--wait', is_flag=True, help='Wait for the job to finish')
+def daemon_submit(source_sub: str, year: str, force: bool, resume: bool, wait: bool):
+    """Generate maps for a substation on the daemon."""
+    _submit_to_daemon('generate', wait, source_sub=source_sub, year=year, force=force, resume=resume)
+
+@daemon.command('export')
+@click.argument('input_path', type=click.Path(exists=True))
+@click.argument('output_path', type=click.Path())
+@click.option('--resolution', type=int, default=300, help='Output resolution (DPI)')
+@click.option('--wait', is_flag=True, help='Wait for the export to finish')
+def daemon_export(input_path: str, output_path: str, resolution: int, wait: bool):
+    """Export one map document to PDF on the daemon."""
+    _submit_to_daemon('export', wait, input_path=str(Path(input_path).resolve()),
+                      output_path=str(Path(output_path).resolve()), resolution=resolution)
+
+@cli.group()
+def queue():
+    """Share map jobs between hosts through a queue on shared storage."""
+    pass
+
+def _work_queue():
+    from scripts.work_queue import WorkQueue, QueueError
+
+    try:
+        return WorkQueue.from_config(load_config())
+    except QueueError as e:
+        raise click.ClickException(str(e))
+
+@queue.command('enqueue')
+@click.argument('substations', nargs=-1)
+@click.option('--year', default='2024', help='Processing year')
+@click.option('--force', is_flag=True, help='Rebuild intersections and re-export maps even if inputs are unchanged')
+@click.option('--resume', is_flag=True, help='Continue interrupted runs from their first incomplete stage')
+def queue_enqueue(substations, year: str, force: bool, resume: bool):
+    """Queue map generation for SUBSTATIONS (default: every configured substation)."""
+    from scripts.run_history import RunHistory, longest_first
+
+    config = load_config()
+    substations = list(substations) or list(config['substations'])
+    # Longest first, so a large substation doesn't start last
+    history = RunHistory.from_config(config)
+    expected = history.expected_all([sub.upper() for sub in substations], 'generate_maps')
+    history.close()
+    schedule = longest_first(substations, {sub: expected[sub.upper()]
+                                           for sub in substations if sub.upper() in expected})
+
+    work_queue = _work_queue()
+    for sub in schedule:
+        work_queue.enqueue('generate', source_sub=sub, year=year, force=force, resume=resume)
+    click.echo(f"Queued {len(schedule)} substations in {work_queue.root}")
+
+@queue.command('export')
+@click.argument('input_paths', nargs=-1, required=True, type=click.Path(exists=True))
+@click.option('--output-dir', type=click.Path(file_okay=False), required=True,
+              help='Folder for the PDFs (must be reachable from every worker)')
+@click.option('--resolution', type=int, default=300, help='Output resolution (DPI)')
+def queue_export(input_paths, output_dir: str, resolution: int):
+    """Queue PDF exports of map documents."""
+    from scripts.export_worker import largest_first
+    from scripts.run_history import RunHistory
+
+    work_queue = _work_queue()
+    output_dir = Path(output_dir).resolve()
+    output_dir.mkdir(parents=True, exist_ok=True)
+    inputs = [Path(path).resolve() for path in input_paths]
+    history = RunHistory.from_config(load_config())
+    durations = history.expected_all([str(path) for path in inputs], 'export')
+    history.close()
+    for input_path in largest_first(inputs, durations):
+        work_queue.enqueue('export', input_path=str(input_path),
+                           output_path=str(output_dir / f"{Path(input_path).stem}.pdf"),
+                           resolution=resolution)
+    click.echo(f"Queued {len(inputs)} exports in {work_queue.root}")
+
+@queue.command('status')
+@click.option('--done', 'show_done', is_flag=True, help='Also list finished jobs')
+def queue_status(show_done: bool):
+    """Show queued, running and failed jobs."""
+    import time
+    from scripts.work_queue import LEASED, FAILED, DONE
+
+    work_queue = _work_queue()
+    counts = work_queue.counts()
+    click.echo(', '.join(f"{count} {state}" for state, count in counts.items()))
+    for job in work_queue.jobs(LEASED):
+        lease = job.get('lease', {})
+        click.echo(f"  running  {job['id']}  on {lease.get('worker', '?')} for "
+                   f"{time.time() - lease.get('since', time.time()):.0f}s "
+                   f"(attempt {job.get('attempts', 1)})")
+    for job in work_queue.jobs(FAILED):
+        click.echo(f"  failed   {job['id']}  {job.get('error') or ''}")
+    if show_done:
+        for job in work_queue.jobs(DONE):
+            click.echo(f"  done     {job['id']}  {job['result'].get('duration', 0.0):.1f}s")
+
+@queue.command('retry')
+def queue_retry():
+    """Queue the failed jobs again."""
+    click.echo(f"Requeued {_work_queue().retry_failed()} failed jobs")
+
+@cli.command()
+@click.option('--max-jobs', type=click.IntRange(min=1), default=None, help='Stop after this many jobs')
+@click.option('--exit-when-empty', is_flag=True, help='Stop once the queue is empty instead of waiting for work')
+def worker(max_jobs: int, exit_when_empty: bool):
+    """Run jobs from the work queue until stopped (Ctrl+C)."""
+    from scripts.work_queue import WorkQueue, QueueWorker, DEFAULT_OPTIONS
+
+    config = load_config()
+    options = config.get('queue') or {}
+    queue_worker = QueueWorker(WorkQueue.from_config(config), Path(config['paths']['workspace']),
+                               settings=config,
+                               poll_interval=options.get('poll_interval', DEFAULT_OPTIONS['poll_interval']))
+    try:
+        completed = queue_worker.run(max_jobs, exit_when_empty)
+    except KeyboardInterrupt:
+        click.echo("Stopped; the job in progress was returned to the queue")
+        return
+    click.echo(f"Worker finished {completed} jobs")
 
 @cli.command()
 def gui():
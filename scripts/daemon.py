@@ -0,0 +1,425 @@
+"""Long-running map daemon with warm geoprocessing workers.
+
+    python -m scripts.cli daemon start                 # in its own terminal
+    python -m scripts.cli daemon submit EMILIE --year 2025 --wait
+    python -m scripts.cli daemon export in.mxd out.pdf --wait
+    python -m scripts.cli daemon status
+    python -m scripts.cli daemon stop                  # after running jobs finish
+
+The daemon's worker processes import arcpy, start their geoprocessing
+session and open the year's templates once, then run jobs until the daemon
+stops, so a job costs only its own geoprocessing and export time. Clients
+connect over a local socket (or a named pipe on Windows) and authenticate
+with a key the daemon writes to DAEMON_KEY_PATH, readable only by its user.
+The daemon is the only writer of the run ledger for the jobs it runs.
+"""
+import os
+import time
+import shutil
+import secrets
+import itertools
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+from scripts.helpers.logging_utils import get_logger
+from scripts.job_runner import QUEUED, RUNNING, SUCCESS, FAILED, CANCELLED
+from config.fixed_paths import DAEMON_KEY_PATH
+
+logger = get_logger(__name__)
+
+DEFAULT_ADDRESS = "localhost:6120"
+
+# Job types and their required arguments
+JOB_TYPES = {
+    'generate': ('source_sub', 'year'),
+    'export': ('input_path', 'output_path')
+}
+
+# Finished jobs kept for status queries
+KEEP_FINISHED = 200
+
+class DaemonError(Exception):
+    """Raised when the daemon is unreachable or rejects a request."""
+    pass
+
+def parse_address(address: str) -> Union[Tuple[str, int], str]:
+    """host:port as a TCP address; anything else is a socket file or named pipe."""
+    host, _, port = address.rpartition(':')
+    if host and port.isdigit() and not address.startswith('\\\\'):
+        return host, int(port)
+    return address
+
+def daemon_address(settings: Dict) -> Union[Tuple[str, int], str]:
+    return parse_address((settings.get('daemon') or {}).get('address') or DEFAULT_ADDRESS)
+
+def _init_worker(scratch_root: str, settings, workspace: str, year: Optional[str]):
+    """Start a worker's geoprocessing session and open the templates of year."""
+    from scripts import batch_runner, export_worker
+
+    batch_runner._init_worker(scratch_root, settings)
+    export_worker._init_worker()
+    if year:
+        try:
+            batch_runner._get_generator(Path(workspace)).open_templates(year)
+        except Exception as e:
+            # The first job will report the real problem
+            logger.warning(f"Could not open the {year} templates: {e}")
+
+def _worker_ready() -> int:
+    return os.getpid()
+
+def _run_generate(source_sub: str, year: str, workspace: str, force: bool = False,
+                  resume: bool = False) -> Dict:
+    from scripts.batch_runner import run_substation
+    return run_substation(source_sub, year, workspace, force=force, resume=resume)
+
+def _run_export(input_path: str, output_path: str, resolution: int = 300) -> Dict:
+    from scripts.export_worker import export_document
+    return export_document(input_path, output_path, resolution)
+
+class MapDaemon:
+    """Serves map jobs to local clients from a pool of warm worker processes.
+
+    Jobs are dicts (see status) held in submission order. The daemon hands
+    at most one job per worker to the pool, so a queued job really is
+    waiting here and can still be cancelled. Stopping drains: new jobs are
+    refused and the daemon exits once the queued and running ones are done,
+    or once the running ones are done when stopped with now.
+    """
+
+    def __init__(self, workspace: Path, workers: int = 1, address=None,
+                 settings: Optional[Dict] = None, year: Optional[str] = None,
+                 key_path: Path = DAEMON_KEY_PATH):
+        from scripts.helpers.config_utils import load_config
+
+        self.settings = settings if settings is not None else load_config()
+        self.workspace = Path(workspace)
+        self.workers = max(1, workers)
+        self.address = address or daemon_address(self.settings)
+        self.year = year
+        self.key_path = Path(key_path)
+        self.jobs: Dict[int, Dict] = {}
+        self.draining = False
+        self._ids = itertools.count(1)
+        # Reentrant: a future that fails on submit runs its callback at once
+        self._lock = threading.RLock()
+        self._drained = threading.Event()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._listener: Optional[Listener] = None
+        self._authkey = secrets.token_bytes(32)
+        self._scratch_root: Optional[str] = None
+        self._ledger = None
+        self._history = None
+
+    def start(self):
+        """Start and warm up the workers, then listen for clients."""
+        from scripts.run_ledger import RunLedger
+        from scripts.run_history import RunHistory
+
+        self._scratch_root = tempfile.mkdtemp(prefix="mapgen_daemon_")
+        start = time.time()
+        self._pool = self._new_pool()
+        pids = {future.result() for future in
+                [self._pool.submit(_worker_ready) for _ in range(self.workers)]}
+        logger.info(f"{len(pids)} workers ready in {time.time() - start:.1f}s")
+
+        self._ledger = RunLedger.from_config(self.settings)
+        self._history = RunHistory.from_config(self.settings)
+        self._listener = Listener(self.address, authkey=self._authkey)
+        self.key_path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.key_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_encode_key(self._listener.address, self._authkey))
+        logger.info(f"Map daemon listening on {self._listener.address}")
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                   initargs=(self._scratch_root, self.settings,
+                                             str(self.workspace), self.year))
+
+    def serve_forever(self):
+        """Answer clients until the daemon has drained."""
+        try:
+            while not self._drained.is_set():
+                try:
+                    conn = self._listener.accept()
+                except (OSError, EOFError, AuthenticationError) as e:
+                    # A client that failed authentication or hung up
+                    logger.warning(f"Rejected connection: {e}")
+                    continue
+                if self._drained.is_set():
+                    conn.close()
+                    break
+                threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+        except KeyboardInterrupt:
+            logger.info("Interrupted, waiting for running jobs to finish")
+            self.stop(now=True)
+            self._drained.wait()
+        finally:
+            self.close()
+
+    def close(self):
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+        if self.key_path.exists():
+            self.key_path.unlink()
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+        if self._ledger is not None:
+            self._ledger.close()
+            if self._ledger.count:
+                logger.info(f"Run {self._ledger.run_id} recorded in {self._ledger.path}")
+        if self._history is not None:
+            self._history.close()
+        if self._scratch_root:
+            shutil.rmtree(self._scratch_root, ignore_errors=True)
+        logger.info("Map daemon stopped")
+
+    def _serve(self, conn):
+        with conn:
+            try:
+                request = conn.recv()
+                conn.send(self.handle(request))
+            except (OSError, EOFError) as e:
+                logger.warning(f"Client connection lost: {e}")
+
+    def handle(self, request: Dict) -> Dict:
+        """Answer one client request; errors are returned rather than raised."""
+        op = request.get('op')
+        try:
+            if op == 'ping':
+                return {'ok': True, 'pid': os.getpid(), 'workers': self.workers}
+            if op == 'submit':
+                return {'ok': True, 'job': self.submit(request['type'], **request.get('args', {}))}
+            if op == 'status':
+                return {'ok': True, 'jobs': self.status(request.get('job_id'))}
+            if op == 'cancel':
+                return {'ok': True, 'job': self.cancel(request['job_id'])}
+            if op == 'stop':
+                return {'ok': True, 'jobs': self.stop(request.get('now', False))}
+            raise DaemonError(f"Unknown request: {op}")
+        except (DaemonError, KeyError, TypeError) as e:
+            return {'ok': False, 'error': str(e)}
+
+    def submit(self, job_type: str, **args) -> Dict:
+        """Queue a job: 'generate' (source_sub, year, force, resume) or 'export' (input_path, output_path, resolution)."""
+        if job_type not in JOB_TYPES:
+            raise DaemonError(f"Unknown job type: {job_type}")
+        missing = [name for name in JOB_TYPES[job_type] if not args.get(name)]
+        if missing:
+            raise DaemonError(f"Missing {', '.join(missing)} for a {job_type} job")
+        with self._lock:
+            if self.draining:
+                raise DaemonError("The daemon is shutting down")
+            job = {
+                'id': next(self._ids),
+                'type': job_type,
+                'args': args,
+                'status': QUEUED,
+                'submitted': time.time(),
+                'duration': 0.0,
+                'error': None,
+                'result': None
+            }
+            self.jobs[job['id']] = job
+            self._dispatch()
+            logger.info(f"Job {job['id']}: {job_type} {_describe(job)} queued")
+            return dict(job)
+
+    def status(self, job_id: Optional[int] = None) -> List[Dict]:
+        """Copies of one job, or of every job still held."""
+        with self._lock:
+            if job_id is None:
+                return [dict(job) for job in self.jobs.values()]
+            if job_id not in self.jobs:
+                raise DaemonError(f"No such job: {job_id}")
+            return [dict(self.jobs[job_id])]
+
+    def cancel(self, job_id: int) -> Dict:
+        """Cancel a queued job; a running job always finishes."""
+        with self._lock:
+            if job_id not in self.jobs:
+                raise DaemonError(f"No such job: {job_id}")
+            job = self.jobs[job_id]
+            if job['status'] == QUEUED:
+                job['status'] = CANCELLED
+                logger.info(f"Job {job_id} cancelled")
+                self._check_drained()
+            return dict(job)
+
+    def stop(self, now: bool = False) -> List[Dict]:
+        """Refuse new jobs and exit once the queue (or with now, the running jobs) is done."""
+        with self._lock:
+            self.draining = True
+            if now:
+                for job in self.jobs.values():
+                    if job['status'] == QUEUED:
+                        job['status'] = CANCELLED
+            pending = [dict(job) for job in self.jobs.values() if job['status'] in (QUEUED, RUNNING)]
+            logger.info(f"Draining, {len(pending)} jobs left")
+            self._check_drained()
+            return pending
+
+    def _dispatch(self):
+        """Hand queued jobs to free workers (called with the lock held)."""
+        running = sum(1 for job in self.jobs.values() if job['status'] == RUNNING)
+        if not running and any(job['status'] == QUEUED and job['type'] == 'generate'
+                               for job in self.jobs.values()):
+            # Between jobs no worker is reading the mirror, so it can be brought up to date
+            self._refresh_mirror()
+        for job in self.jobs.values():
+            if running >= self.workers:
+                break
+            if job['status'] != QUEUED:
+                continue
+            try:
+                future = self._submit(job)
+            except BrokenProcessPool:
+                # A worker process died (e.g. arcpy crash); start over with fresh ones
+                logger.error("Worker pool broken, starting new workers")
+                self._pool.shutdown(wait=False)
+                self._pool = self._new_pool()
+                future = self._submit(job)
+            job['status'] = RUNNING
+            job['started'] = time.time()
+            running += 1
+            future.add_done_callback(lambda f, job=job: self._finished(job, f))
+
+    def _refresh_mirror(self):
+        from scripts.source_mirror import refresh_mirror
+        try:
+            refresh_mirror(self.settings)
+        except Exception as e:
+            # Jobs then read the sources, or the previous copies
+            logger.error(f"Could not refresh the mirror: {e}")
+
+    def _submit(self, job: Dict):
+        if job['type'] == 'generate':
+            return self._pool.submit(_run_generate, workspace=str(self.workspace), **job['args'])
+        return self._pool.submit(_run_export, **job['args'])
+
+    def _finished(self, job: Dict, future):
+        try:
+            result = future.result()
+        except Exception as e:
+            # Worker process died before returning a record
+            result = {'status': FAILED, 'error': str(e) or type(e).__name__, 'duration': 0.0}
+
+        with self._lock:
+            job['status'] = SUCCESS if result.get('status') == SUCCESS else FAILED
+            job['error'] = result.get('error')
+            job['duration'] = round(time.time() - job['started'], 2)
+            job['result'] = result
+            logger.info(f"Job {job['id']}: {_describe(job)} {job['status']} in {job['duration']:.1f}s")
+            self._record(job, result)
+            self._forget_finished()
+            self._dispatch()
+            self._check_drained()
+
+    def _record(self, job: Dict, result: Dict):
+        try:
+            if job['type'] == 'export':
+                self._ledger.record_result(result)
+                if result['status'] == SUCCESS:
+                    self._history.record(result['input'], 'export', result['duration'])
+            else:
+                for record in result.get('exports', []):
+                    self._ledger.record_result(record)
+        except Exception as e:
+            logger.error(f"Could not record job {job['id']}: {e}")
+
+    def _forget_finished(self):
+        finished = [job_id for job_id, job in self.jobs.items()
+                    if job['status'] not in (QUEUED, RUNNING)]
+        for job_id in finished[:max(0, len(finished) - KEEP_FINISHED)]:
+            del self.jobs[job_id]
+
+    def _check_drained(self):
+        if self.draining and not any(job['status'] in (QUEUED, RUNNING)
+                                     for job in self.jobs.values()):
+            self._drained.set()
+            self._wake()
+
+    def _wake(self):
+        # Unblock accept() so serve_forever sees the daemon has drained
+        def connect():
+            try:
+                Client(self._listener.address, authkey=self._authkey).close()
+            except Exception:
+                pass
+        if self._listener is not None:
+            threading.Thread(target=connect, daemon=True).start()
+
+def _encode_key(address, authkey: bytes) -> bytes:
+    if isinstance(address, tuple):
+        address = f"{address[0]}:{address[1]}"
+    return f"{address}\n{authkey.hex()}\n".encode('utf-8')
+
+def _describe(job: Dict) -> str:
+    args = job['args']
+    if job['type'] == 'generate':
+        return f"{args.get('source_sub')} {args.get('year')}"
+    return Path(args.get('input_path', '')).name
+
+class DaemonClient:
+    """Sends requests to a running map daemon, one connection per request."""
+
+    def __init__(self, key_path: Path = DAEMON_KEY_PATH):
+        try:
+            address, key = Path(key_path).read_text(encoding='utf-8').split()
+        except (OSError, ValueError):
+            raise DaemonError("The map daemon is not running")
+        self.address = parse_address(address)
+        self.authkey = bytes.fromhex(key)
+
+    def request(self, op: str, **fields) -> Dict:
+        try:
+            with Client(self.address, authkey=self.authkey) as conn:
+                conn.send(dict(fields, op=op))
+                reply = conn.recv()
+        except (OSError, EOFError) as e:
+            raise DaemonError(f"Could not reach the map daemon: {e}")
+        if not reply.get('ok'):
+            raise DaemonError(reply.get('error'))
+        return reply
+
+    def ping(self) -> Dict:
+        return self.request('ping')
+
+    def submit(self, job_type: str, **args) -> Dict:
+        return self.request('submit', type=job_type, args=args)['job']
+
+    def status(self, job_id: Optional[int] = None) -> List[Dict]:
+        return self.request('status', job_id=job_id)['jobs']
+
+    def cancel(self, job_id: int) -> Dict:
+        return self.request('cancel', job_id=job_id)['job']
+
+    def stop(self, now: bool = False) -> List[Dict]:
+        return self.request('stop', now=now)['jobs']
+
+    def wait(self, job_id: int, timeout: Optional[float] = None, interval: float = 0.5) -> Dict:
+        """Poll until a job has finished; raises DaemonError on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job, = self.status(job_id)
+            if job['status'] not in (QUEUED, RUNNING):
+                return job
+            if deadline is not None and time.monotonic() >= deadline:
+                raise DaemonError(f"Job {job_id} still {job['status'].lower()}")
+            time.sleep(interval)
+
+def connect(key_path: Path = DAEMON_KEY_PATH) -> Optional[DaemonClient]:
+    """A client for the running daemon, or None if there isn't one."""
+    try:
+        client = DaemonClient(key_path)
+        client.ping()
+        return client
+    except DaemonError:
+        return None
@@ -0,0 +1,73 @@
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Tuple, Union
+from scripts.helpers.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_CACHE_SIZE = 4
+
+class DocumentCache:
+    """LRU cache of opened map documents keyed by template path and mtime.
+    
+    The opener is called with the template path on a miss and must return an
+    opened processor (anything with a close() method). A template whose mtime
+    changes is treated as a new document and the stale entry is closed.
+    """
+    
+    def __init__(self, opener: Callable[[Path], Any], max_size: int = DEFAULT_CACHE_SIZE):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.opener = opener
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._documents: "OrderedDict[Tuple[str, float], Any]" = OrderedDict()
+    
+    def get(self, path: Union[str, Path]) -> Any:
+        """Return an opened document for path, opening it on a cache miss."""
+        path = Path(path)
+        key = (str(path), path.stat().st_mtime)
+        
+        if key in self._documents:
+            self._documents.move_to_end(key)
+            self.hits += 1
+            logger.debug(f"Document cache hit: {path}")
+            return self._documents[key]
+        
+        # Template changed on disk since it was cached
+        self.discard(path)
+        
+        self.misses += 1
+        document = self.opener(path)
+        self._documents[key] = document
+        
+        while len(self._documents) > self.max_size:
+            oldest_key = next(iter(self._documents))
+            self._close(oldest_key)
+        
+        return document
+    
+    def discard(self, path: Union[str, Path]):
+        """Close and drop every cached version of path."""
+        for key in [k for k in self._documents if k[0] == str(Path(path))]:
+            self._close(key)
+    
+    def clear(self):
+        """Close all cached documents."""
+        for key in list(self._documents):
+            self._close(key)
+    
+    def _close(self, key: Tuple[str, float]):
+        document = self._documents.pop(key)
+        try:
+            document.close()
+            logger.debug(f"Closed cached document: {key[0]}")
+        except Exception as e:
+            logger.warning(f"Could not close cached document {key[0]}: {e}")
+    
+    def __contains__(self, path: Union[str, Path]) -> bool:
+        return any(k[0] == str(Path(path)) for k in self._documents)
+    
+    def __len__(self) -> int:
+        return len(self._documents)
@@ -0,0 +1,115 @@
+import os
+import time
+import statistics
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from scripts.helpers.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+# One handler per worker process, created on first use
+_file_handler = None
+
+def _init_worker(settings=None):
+    """Load settings and start the geoprocessing session once per worker process."""
+    global _file_handler
+    from scripts.helpers.config_utils import prime_config
+    from scripts.file_handler import FileHandler
+    from scripts.run_history import track_stage_durations
+
+    # Reuse the parent's parsed settings instead of re-reading settings.yaml
+    if settings is not None:
+        prime_config(settings)
+    _file_handler = FileHandler()
+    # pdf_export spans of substation maps feed the run history too
+    track_stage_durations()
+
+def export_document(input_path: Union[str, Path], output_path: Union[str, Path],
+                    resolution: int = 300, trace_attrs: Optional[Dict] = None) -> Dict:
+    """Export a single map document to PDF and return a result record.
+
+    Runs in a worker process, so arguments and the result are plain,
+    picklable values and errors are reported rather than raised.
+    trace_attrs are added to the export's pdf_export span.
+    """
+    global _file_handler
+    start = time.time()
+    result = {
+        'input': str(input_path),
+        'output': str(output_path),
+        'status': 'Failed',
+        'duration': 0.0,
+        'worker': os.getpid(),
+        'error': None
+    }
+
+    try:
+        if _file_handler is None:
+            from scripts.file_handler import FileHandler
+            _file_handler = FileHandler()
+
+        if _file_handler.process_file(input_path, output_path, resolution, trace_attrs):
+            result['status'] = 'Success'
+        else:
+            result['error'] = "Export failed, see worker log for details"
+
+    except Exception as e:
+        logger.error(f"Error exporting {input_path}: {e}")
+        result['error'] = str(e)
+
+    result['duration'] = round(time.time() - start, 2)
+    return result
+
+def largest_first(input_paths: Iterable[Union[str, Path]],
+                  durations: Optional[Dict[str, float]] = None) -> List[Path]:
+    """Order documents so the slowest are exported first.
+
+    durations maps input paths to their expected export time (see
+    scripts.run_history). Documents without history are estimated
+    from their file size at the median seconds per byte of those with it,
+    or simply ordered by size when there is no history at all.
+    """
+    durations = durations or {}
+    sizes = {}
+    for path in map(Path, input_paths):
+        try:
+            sizes[path] = path.stat().st_size
+        except OSError:
+            sizes[path] = 0
+
+    rates = [durations[str(p)] / size for p, size in sizes.items()
+             if str(p) in durations and size]
+    rate = statistics.median(rates) if rates else 1.0
+
+    def expected(path: Path) -> float:
+        return durations.get(str(path), sizes[path] * rate)
+
+    return sorted(sizes, key=expected, reverse=True)
+
+def export_documents(jobs: List[Tuple[Union[str, Path], Union[str, Path]]], resolution: int = 300,
+                     workers: int = 1, settings: Optional[Dict] = None) -> Iterator[Dict]:
+    """Export (input, output) pairs in a pool of long-lived worker processes.
+
+    Each worker starts its geoprocessing session once and exports many
+    documents. Jobs start in the given order and result records are yielded
+    as they finish, not in job order.
+    """
+    workers = max(1, min(workers, len(jobs)))
+    logger.info(f"Exporting {len(jobs)} documents with {workers} workers")
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(settings,)) as pool:
+        futures = {
+            pool.submit(export_document, str(input_path), str(output_path), resolution):
+                (input_path, output_path)
+            for input_path, output_path in jobs
+        }
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                # Worker process died (e.g. arcpy crash) before returning a record
+                input_path, output_path = futures[future]
+                yield {'input': str(input_path), 'output': str(output_path), 'status': 'Failed',
+                       'duration': 0.0, 'worker': None, 'error': str(e)}
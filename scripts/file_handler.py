@@ -1,19 +1,32 @@
-import arcpy
 from pathlib import Path
-from typing import Optional, Union
+from typing import Dict, Optional, Union
 from scripts.helpers.logging_utils import get_logger
 from scripts.process_mxd import MXDProcessor
 from scripts.process_aprx import APRXProcessor
-from scripts.helpers.progress_bar import ProgressBar  # Changed from ProgressTracker
-import yaml
+from scripts.document_cache import DocumentCache, DEFAULT_CACHE_SIZE
+from scripts.helpers.index_manager import ensure_indexes
+from scripts.helpers.fingerprint import FingerprintStore, compute_fingerprint, dataset_fingerprint
+from scripts.backends import get_backend
+from scripts.helpers.tracing import span
+from scripts.stats_engine import ArcpyStatsEngine
+from scripts.helpers.progress_tracker import ProgressTracker
+from scripts.intermediate import is_memory
+from scripts.lock_coordinator import is_lock_error
 
 logger = get_logger(__name__)
 
+# Fingerprints of intersections built in the memory workspace, which only
+# live as long as this process
+_memory_intersections = FingerprintStore(None)
+
 class FileHandler:
     """Handles processing of both .mxd and .aprx files."""
     
-    def __init__(self):
+    def __init__(self, cache_size: int = DEFAULT_CACHE_SIZE):
+        """Create a handler; cache_size of 0 reopens templates on every export."""
         self.supported_extensions = {'.mxd', '.aprx'}
+        self.backend = get_backend()
+        self.document_cache = DocumentCache(self._open_processor, cache_size) if cache_size else None
     
     def validate_file(self, file_path: Union[str, Path]) -> bool:
         """Validates if the file exists and has a supported extension."""
@@ -27,8 +40,11 @@ class FileHandler:
         return True
 
     def process_file(self, input_path: Union[str, Path], output_path: Union[str, Path], 
-                    resolution: int = 300) -> bool:
-        """Process a single map file (.mxd or .aprx)."""
+                    resolution: int = 300, trace_attrs: Optional[Dict] = None) -> bool:
+        """Process a single map file (.mxd or .aprx).
+        
+        trace_attrs (e.g. substation, map_type) are added to the pdf_export span.
+        """
         input_path = Path(input_path)
         output_path = Path(output_path)
         
@@ -36,152 +52,176 @@ class FileHandler:
             return False
             
         try:
-            if input_path.suffix.lower() == '.mxd':
-                processor = MXDProcessor(input_path)
-            else:  # .aprx
-                processor = APRXProcessor(input_path)
+            if self.document_cache is not None:
+                processor = self.document_cache.get(input_path)
+            else:
+                processor = self._open_processor(input_path)
             
             # Process the file
-            processor.open_file()
-            result = processor.export_to_pdf(output_path, resolution)
-            processor.close()
+            with span("pdf_export", template=input_path.name, output=str(output_path),
+                      resolution=resolution, **(trace_attrs or {})) as export_span:
+                result = processor.export_to_pdf(output_path, resolution)
+                if result is not None and output_path.exists():
+                    export_span.set(output_bytes=output_path.stat().st_size)
+            
+            if self.document_cache is None:
+                processor.close()
+            elif result is None:
+                # Don't keep reusing a document that failed to export
+                self.document_cache.discard(input_path)
             
             return result is not None
             
         except Exception as e:
             logger.error(f"Error processing {input_path}: {e}")
+            if self.document_cache is not None:
+                self.document_cache.discard(input_path)
             return False
 
-    def process_intersections(self, in_xfmr: str, in_pricond: str, source_gdb: str) -> bool:
-        """Process intersections between transformer and primary conductor layers."""
+    def _open_processor(self, input_path: Path):
+        """Create and open the processor matching the file type."""
+        with span("template_open", template=input_path.name):
+            if input_path.suffix.lower() == '.mxd':
+                processor = MXDProcessor(input_path)
+            else:  # .aprx
+                processor = APRXProcessor(input_path)
+            processor.open_file()
+            return processor
+
+    def close(self):
+        """Close any documents held open by the cache."""
+        if self.document_cache is not None:
+            self.document_cache.clear()
+
+    def process_intersections(self, in_xfmr: str, in_pricond: str, source_gdb: str,
+                              force: bool = False) -> bool:
+        """Process intersections between transformer and primary conductor layers.
+        
+        XFMR_MCD and PriCond_MCD are kept in source_gdb and only rebuilt when
+        the fingerprint of the inputs (row counts and schemas)
+        changes, or when force is set.
+        """
         try:
             logger.info(f"Starting intersection processing for {source_gdb}")
-            progress = ProgressBar(total_steps=5, operation_name="Intersection Processing")
+            progress = ProgressTracker(total_steps=5, operation_name="Intersection Processing")
             
             # Validate inputs
-            progress.update(1, "Validating network paths")  # Changed from message= to status
-            if not Path(in_xfmr).parent.exists():
+            progress.update(1, "Validating network paths")
+            backend = self.backend
+            if not backend.exists(str(Path(in_xfmr).parent)):
                 logger.error(f"Cannot access network path: {Path(in_xfmr).parent}")
                 return False
                 
-            if not Path(in_pricond).parent.exists():
+            if not backend.exists(str(Path(in_pricond).parent)):
                 logger.error(f"Cannot access network path: {Path(in_pricond).parent}")
                 return False
+            
+            transformer_mcd = f"{source_gdb}\\XFMR_MCD"
+            pricond_mcd = f"{source_gdb}\\PriCond_MCD"
+            
+            # Reuse the previous results when the inputs haven't changed
+            cache = self._intersection_cache(source_gdb)
+            xfmr_fingerprint = dataset_fingerprint(in_xfmr)
+            pricond_fingerprint = dataset_fingerprint(in_pricond)
+            fingerprint = compute_fingerprint(xfmr_fingerprint, pricond_fingerprint)
+            if (not force and cache.matches(source_gdb, fingerprint)
+                    and backend.exists(transformer_mcd) and backend.exists(pricond_mcd)):
+                progress.complete("Inputs unchanged, reusing cached intersection results")
+                ensure_indexes(transformer_mcd)
+                ensure_indexes(pricond_mcd)
+                return True
+            
+            # Invalidate first so an interrupted rebuild is never mistaken for a cached one
+            cache.remove(source_gdb)
+            cache.save()
                 
             # Create Transformer_MCD intersection
             progress.update(2, "Creating Transformer_MCD intersection")  # Fixed update calls
-            transformer_mcd = f"{source_gdb}\\XFMR_MCD"
             
             # Delete existing if needed
-            if arcpy.Exists(transformer_mcd):
+            if backend.exists(transformer_mcd):
                 progress.update(3, "Removing existing Transformer_MCD")
-                arcpy.Delete_management(transformer_mcd)
+                backend.delete(transformer_mcd)
             
             # Perform intersection
             progress.update(4, "Performing intersection analysis")
-            arcpy.Intersect_analysis(
-                [in_xfmr, in_pricond],
-                transformer_mcd,
-                output_type="POINT"
-            )
+            with span("intersect", dataset=transformer_mcd,
+                      xfmr_rows=xfmr_fingerprint['row_count'],
+                      pricond_rows=pricond_fingerprint['row_count']) as intersect_span:
+                backend.intersect(
+                    [in_xfmr, in_pricond],
+                    transformer_mcd,
+                    output_type="POINT"
+                )
+                if intersect_span.recording:
+                    intersect_span.set(rows=backend.get_count(transformer_mcd))
             
             # Copy primary conductor
             progress.update(5, "Copying primary conductor layers")
-            pricond_mcd = f"{source_gdb}\\PriCond_MCD"
             
-            if arcpy.Exists(pricond_mcd):
+            if backend.exists(pricond_mcd):
                 progress.update(5, "Removing existing PriCond_MCD")
-                arcpy.Delete_management(pricond_mcd)
+                backend.delete(pricond_mcd)
                 
-            arcpy.Copy_management(in_pricond, pricond_mcd)
+            with span("copy", dataset=pricond_mcd, rows=pricond_fingerprint['row_count']):
+                backend.copy(in_pricond, pricond_mcd)
+            
+            ensure_indexes(transformer_mcd)
+            ensure_indexes(pricond_mcd)
             
-            progress.update(5, "All intersection operations completed successfully")
+            cache.set(source_gdb, fingerprint)
+            cache.save()
+            
+            progress.complete("All intersection operations completed successfully")
             return True
             
-        except arcpy.ExecuteError:
-            logger.error(f"ArcPy error: {arcpy.GetMessages(2)}")
+        except self.backend.ExecuteError as e:
+            if is_lock_error(e):
+                # Another run holds the data; the caller decides whether to wait
+                raise
+            logger.error(f"Geoprocessing error: {self.backend.get_messages(2)}")
             return False
         except Exception as e:
             logger.error(f"Error in process_intersections: {str(e)}")
             return False
-        finally:
-            # Clean up temporary layers
-            for layer in [transformer_mcd, pricond_mcd]:
-                if arcpy.Exists(layer):
-                    try:
-                        arcpy.Delete_management(layer)
-                    except:
-                        logger.warning(f"Could not clean up layer: {layer}")
+
+    def _intersection_cache(self, source_gdb: str) -> FingerprintStore:
+        """Fingerprint store kept next to the geodatabase holding the results."""
+        if is_memory(source_gdb):
+            return _memory_intersections
+        gdb_path = Path(source_gdb)
+        return FingerprintStore(gdb_path.parent / f"{gdb_path.stem}_intersections.json")
+    
+    def intersection_fingerprint(self, source_gdb: str) -> Optional[str]:
+        """Fingerprint of the inputs the intersections in source_gdb were built from."""
+        return self._intersection_cache(source_gdb).get(source_gdb)
 
     def process_veg(self, in_pricond: str, in_xfmr: str, expression: str, 
-                   source_sub: str, source_gdb: str) -> bool:
-        """Process vegetation management data."""
+                   source_sub: str, source_gdb: str, stats_engine=None) -> bool:
+        """Process vegetation management data.
+        
+        stats_engine selects how summaries are computed (see scripts.stats_engine);
+        the Statistics_analysis based engine is used by default.
+        """
         try:
+            engine = stats_engine or ArcpyStatsEngine()
+            
             # Create output names
             out_pricond_sum = f"{source_gdb}\\PriCond_MCD_{source_sub}_Sum"
             out_xfmr_sum = f"{source_gdb}\\XFMR_MCD_{source_sub}_Sum"
             
             # Process primary conductor statistics
-            arcpy.Statistics_analysis(
-                in_pricond,
-                out_pricond_sum,
-                "SHAPE_Length SUM",
-                "CIRCUIT1;MCD_CODE;MCD_NAME"
-            )
+            engine.summarize_table(in_pricond, out_pricond_sum, "SHAPE_Length", 
+                                   source_sub, to_miles=True)
             
             # Process transformer statistics
-            arcpy.Statistics_analysis(
-                in_xfmr,
-                out_xfmr_sum,
-                "CUSTOMER_COUNT SUM",
-                "CIRCUIT1;MCD_CODE;MCD_NAME"
-            )
+            engine.summarize_table(in_xfmr, out_xfmr_sum, "CUSTOMER_COUNT", source_sub)
             
-            # Add and calculate fields
-            self._add_and_calculate_fields(out_pricond_sum, out_xfmr_sum, source_sub)
+            ensure_indexes(out_pricond_sum)
+            ensure_indexes(out_xfmr_sum)
             
             return True
             
         except Exception as e:
             logger.error(f"Error in process_veg: {e}")
             return False
-
-    def _add_and_calculate_fields(self, pricond_sum: str, xfmr_sum: str, source_sub: str):
-        """Helper method to add and calculate fields for vegetation processing."""
-        # Add fields to primary conductor summary
-        field_definitions = [
-            ("Circuit_MCD", "TEXT", 150),
-            ("Miles", "DOUBLE"),
-            ("SUB", "TEXT", 20)
-        ]
-        
-        for table in [pricond_sum, xfmr_sum]:
-            for field_name, field_type, *field_length in field_definitions:
-                if not arcpy.ListFields(table, field_name):
-                    if field_length:
-                        arcpy.AddField_management(table, field_name, field_type, 
-                                               field_length=field_length[0])
-                    else:
-                        arcpy.AddField_management(table, field_name, field_type)
-        
-        # Calculate fields for primary conductor
-        with arcpy.da.UpdateCursor(pricond_sum, 
-            ['Circuit_MCD', 'CIRCUIT1', 'MCD_NAME', 'Miles', 'SUM_SHAPE_Length', 'SUB']) as cursor:
-            for row in cursor:
-                row[0] = f"{row[1]}_{row[2]}"  # Circuit_MCD
-                row[3] = round(row[4] / 5280, 2)  # Miles
-                row[5] = source_sub  # SUB
-                cursor.updateRow(row)
-        
-        # Calculate fields for transformer
-        with arcpy.da.UpdateCursor(xfmr_sum, 
-            ['Circuit_MCD', 'CIRCUIT1', 'MCD_NAME', 'SUB']) as cursor:
-            for row in cursor:
-                row[0] = f"{row[1]}_{row[2]}"  # Circuit_MCD
-                row[3] = source_sub  # SUB
-                cursor.updateRow(row)
-
-def load_config():
-    with open('config/settings.yaml', 'r') as f:
-        config = yaml.safe_load(f)
-    return config
@@ -1,7 +1,12 @@
+import os
 import yaml
+from collections.abc import Mapping
 from pathlib import Path
-from typing import Dict, List, Optional
+from types import MappingProxyType
+from typing import Any, Dict, List, Optional, Union
 from scripts.helpers.logging_utils import get_logger
+from scripts.helpers.tracing import span
+from config.fixed_paths import SETTINGS_PATH
 
 logger = get_logger(__name__)
 
@@ -9,19 +14,104 @@ class ConfigurationError(Exception):
     """Custom exception for configuration errors."""
     pass
 
-def load_config() -> Dict:
-    """Load and validate configuration from YAML file."""
+def _freeze(value: Any) -> Any:
+    """Recursively convert dicts and lists to read-only equivalents."""
+    if isinstance(value, Mapping):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+def _thaw(value: Any) -> Any:
+    """Inverse of _freeze, giving plain dicts and lists back."""
+    if isinstance(value, Mapping):
+        return {k: _thaw(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(v) for v in value]
+    return value
+
+class Settings(Mapping):
+    """Immutable, parsed settings.yaml.
+    
+    Behaves like the nested dict load_config used to return, and adds
+    precomputed lookups. Pickles as plain data, so worker processes receive
+    it without re-reading or re-validating the YAML file.
+    """
+    
+    __slots__ = ('_data', 'path', 'mtime', 'substations', 'substation_set')
+    
+    def __init__(self, data: Dict, path: Optional[Union[str, Path]] = None,
+                 mtime: Optional[float] = None):
+        set_ = object.__setattr__
+        set_(self, '_data', _freeze(data))
+        set_(self, 'path', str(path) if path else None)
+        set_(self, 'mtime', mtime)
+        set_(self, 'substations', tuple(data.get('substations') or ()))
+        set_(self, 'substation_set', frozenset(sub.upper() for sub in self.substations))
+    
+    def __setattr__(self, name, value):
+        raise AttributeError("Settings are read-only")
+    
+    def __getitem__(self, key: str) -> Any:
+        return self._data[key]
+    
+    def __iter__(self):
+        return iter(self._data)
+    
+    def __len__(self) -> int:
+        return len(self._data)
+    
+    def __reduce__(self):
+        return (Settings, (self.to_dict(), self.path, self.mtime))
+    
+    def __repr__(self) -> str:
+        return f"Settings(path={self.path!r}, mtime={self.mtime!r})"
+    
+    @property
+    def paths(self) -> Mapping:
+        return self._data['paths']
+    
+    @property
+    def options(self) -> Mapping:
+        return self._data['options']
+    
+    def is_valid_substation(self, substation: str) -> bool:
+        return substation.upper() in self.substation_set
+    
+    def to_dict(self) -> Dict:
+        """Mutable deep copy of the settings."""
+        return _thaw(self._data)
+
+# Parsed settings per file, reused until the file's mtime changes
+_config_cache: Dict[str, Settings] = {}
+
+def load_config(config_path: Optional[Union[str, Path]] = None) -> Settings:
+    """Load and validate configuration from YAML file.
+    
+    The result is cached per process and only re-read when the file's
+    modification time changes. The MAPGEN_SETTINGS environment variable
+    overrides the default settings file.
+    """
+    config_path = Path(config_path or os.environ.get('MAPGEN_SETTINGS') or SETTINGS_PATH)
     try:
-        config_path = Path("config/settings.yaml")
-        if not config_path.exists():
+        try:
+            mtime = config_path.stat().st_mtime
+        except FileNotFoundError:
             raise ConfigurationError(f"Configuration file not found: {config_path}")
+        
+        cached = _config_cache.get(str(config_path))
+        if cached is not None and cached.mtime == mtime:
+            return cached
             
-        with open(config_path, 'r') as f:
-            config = yaml.safe_load(f)
-            
-        # Validate configuration
-        validate_config(config)
-        return config
+        with span("config_load", path=str(config_path)):
+            with open(config_path, 'r') as f:
+                config = yaml.safe_load(f)
+                
+            # Validate configuration
+            validate_config(config)
+            settings = Settings(config, config_path, mtime)
+        _config_cache[str(config_path)] = settings
+        return settings
         
     except yaml.YAMLError as e:
         logger.error(f"Error parsing configuration file: {e}")
@@ -30,8 +120,19 @@ def load_config() -> Dict:
         logger.error(f"Error loading configuration: {e}")
         raise ConfigurationError(f"Configuration error: {e}")
 
+def prime_config(settings: Settings):
+    """Install settings received from another process into this process's cache."""
+    if settings.path:
+        _config_cache[settings.path] = settings
+
+def clear_config_cache():
+    """Forget all cached settings so the next load_config re-reads the file."""
+    _config_cache.clear()
+
 def validate_config(config: Dict) -> None:
     """Validate configuration structure and required fields."""
+    if not isinstance(config, dict):
+        raise ConfigurationError("Configuration must be a mapping")
     required_sections = ['paths', 'options', 'substations']
     required_paths = ['workspace', 'mxd_input', 'aprx_input', 'pdf_output', 'logs']
     
@@ -63,6 +164,23 @@ def validate_config(config: Dict) -> None:
         raise ConfigurationError("Missing default_year in options")
     if not isinstance(config['options'].get('resolution', 300), int):
         raise ConfigurationError("Resolution must be an integer")
+    export_workers = config['options'].get('export_workers', 1)
+    if not isinstance(export_workers, int) or export_workers < 1:
+        raise ConfigurationError("export_workers must be a positive integer")
+    cache_size = config['options'].get('document_cache_size', 4)
+    if not isinstance(cache_size, int) or cache_size < 0:
+        raise ConfigurationError("document_cache_size must be a non-negative integer")
+    if config['options'].get('stats_engine', 'arcpy') not in ('arcpy', 'numpy'):
+        raise ConfigurationError("stats_engine must be 'arcpy' or 'numpy'")
+    selection = config['options'].get('selection') or {}
+    for key, value in selection.items():
+        if key not in ('in_list_limit', 'chunk_size', 'max_ranges', 'join_threshold'):
+            raise ConfigurationError(f"Unknown selection option: {key}")
+        if not isinstance(value, int) or value < 1:
+            raise ConfigurationError(f"Selection option {key} must be a positive integer")
+    backend = config.get('backend') or {}
+    if backend.get('name', 'arcpy') not in ('arcpy', 'memory'):
+        raise ConfigurationError("backend name must be 'arcpy' or 'memory'")
     
     # Validate substations
     if not isinstance(config['substations'], list):
@@ -70,16 +188,30 @@ def validate_config(config: Dict) -> None:
     if not config['substations']:
         raise ConfigurationError("Substations list is empty")
 
-def validate_substation(substation: str, config: Optional[Dict] = None) -> bool:
-    """Validate if a substation exists in configuration."""
+def validate_substation(substation: str, config: Optional[Dict] = None, 
+                        circuit_index=None) -> bool:
+    """Validate if a substation exists in configuration.
+    
+    When a CircuitIndex is given, substations it has indexed are accepted too.
+    """
     if config is None:
         config = load_config()
     
     try:
-        valid_substations = set(sub.upper() for sub in config['substations'])
         substation = substation.upper()
+        if isinstance(config, Settings):
+            configured = config.substation_set
+        else:
+            configured = frozenset(sub.upper() for sub in config['substations'])
+        
+        valid = substation in configured
+        if not valid and circuit_index is not None:
+            valid = substation in circuit_index
         
-        if substation not in valid_substations:
+        if not valid:
+            valid_substations = set(configured)
+            if circuit_index is not None:
+                valid_substations.update(circuit_index.substations())
             logger.error(f"Invalid substation: {substation}")
             logger.info(f"Valid substations: {', '.join(sorted(valid_substations))}")
             return False
@@ -0,0 +1,121 @@
+import os
+import json
+import hashlib
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+from scripts.helpers.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+def _stat_target(path: Path) -> Optional[Path]:
+    """Return the on-disk item to stat for path.
+    
+    Datasets inside a file geodatabase (e.g. Working.gdb\\XFMR_MCD) are not
+    files of their own, so they are fingerprinted through their .gdb folder.
+    """
+    if path.exists():
+        return path
+    for parent in path.parents:
+        if parent.suffix.lower() == '.gdb' and parent.exists():
+            return parent
+    return None
+
+def path_fingerprint(path: Union[str, Path]) -> Dict[str, Any]:
+    """Build a cheap, stat-based fingerprint for a file, folder or dataset."""
+    path = Path(path)
+    target = _stat_target(path)
+    if target is None:
+        return {'path': str(path), 'exists': False}
+    
+    if target.is_dir():
+        # Newest file wins: a geodatabase rewrites its table files on edit.
+        # Lock files come and go whenever anyone merely reads it, so skip them
+        entries = [e.stat() for e in os.scandir(target)
+                   if e.is_file() and not e.name.lower().endswith('.lock')]
+        size = sum(st.st_size for st in entries)
+        mtime = max((st.st_mtime for st in entries), default=target.stat().st_mtime)
+    else:
+        st = target.stat()
+        size, mtime = st.st_size, st.st_mtime
+    
+    return {'path': str(path), 'exists': True, 'size': size, 'mtime': mtime}
+
+def dataset_fingerprint(dataset: str) -> Dict[str, Any]:
+    """Fingerprint a dataset by row count and schema.
+    
+    Datasets inside a geodatabase are not stat'ed: the .gdb folder changes
+    whenever any of its datasets is edited. Standalone files (shapefiles,
+    tables) also add their size and modification time.
+    """
+    from scripts.backends import get_backend
+    backend = get_backend()
+    if not backend.exists(dataset):
+        return {'path': str(dataset), 'exists': False}
+    
+    fingerprint = {
+        'path': str(dataset),
+        'exists': True,
+        'row_count': backend.get_count(dataset),
+        'fields': [[f.name, f.type, f.length] for f in backend.list_fields(dataset)]
+    }
+    if Path(dataset).is_file():
+        fingerprint.update(path_fingerprint(dataset))
+    return fingerprint
+
+def compute_fingerprint(*parts: Any) -> str:
+    """Hash any JSON-serialisable parts into a stable hex digest."""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class FingerprintStore:
+    """Persistent key -> fingerprint mapping stored as a JSON file.
+    
+    Without a path the entries only live as long as the store, for
+    datasets that don't outlive the process either.
+    """
+    
+    def __init__(self, path: Optional[Union[str, Path]]):
+        self.path = Path(path) if path is not None else None
+        self._entries: Dict[str, Any] = self._load()
+    
+    def _load(self) -> Dict[str, Any]:
+        if self.path is None or not self.path.exists():
+            return {}
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            # A corrupt store only costs a rebuild, never a failed run
+            logger.warning(f"Ignoring unreadable fingerprint store {self.path}: {e}")
+            return {}
+    
+    def get(self, key: str) -> Optional[Any]:
+        return self._entries.get(key)
+    
+    def set(self, key: str, fingerprint: Any):
+        self._entries[key] = fingerprint
+    
+    def remove(self, key: str):
+        self._entries.pop(key, None)
+    
+    def items(self):
+        return self._entries.items()
+    
+    def matches(self, key: str, fingerprint: Any) -> bool:
+        return key in self._entries and self._entries[key] == fingerprint
+    
+    def save(self):
+        """Write the store atomically so a crash never leaves a partial file."""
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(self._entries, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+    
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+    
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,76 @@
+"""Declares and maintains attribute indexes on the pipeline's working datasets."""
+import fnmatch
+from typing import Dict, Iterable, List
+from scripts.helpers.logging_utils import get_logger
+from scripts.backends import get_backend
+
+logger = get_logger(__name__)
+
+# Dataset name pattern -> fields needing an attribute index. File geodatabases
+# only use single-field indexes, so each field gets its own index.
+REQUIRED_INDEXES: Dict[str, List[str]] = {
+    # Filtered by MakeFeatureLayer and grouped by Statistics_analysis
+    'XFMR_MCD': ['CIRCUIT1', 'MCD_CODE', 'MCD_NAME', 'ORIENTATION'],
+    'PriCond_MCD': ['CIRCUIT1', 'MCD_CODE', 'MCD_NAME', 'ORIENTATION'],
+    # Per-substation summary tables, e.g. PriCond_EMILIE_MCD_Sum / PriCond_MCD_EMILIE_Sum
+    '*_Sum': ['CIRCUIT1', 'MCD_CODE']
+}
+
+def required_fields(dataset: str) -> List[str]:
+    """Fields that must be indexed for a dataset, based on its name."""
+    name = dataset.replace('/', '\\').rsplit('\\', 1)[-1]
+    fields: List[str] = []
+    for pattern, pattern_fields in REQUIRED_INDEXES.items():
+        if fnmatch.fnmatchcase(name.upper(), pattern.upper()):
+            fields.extend(f for f in pattern_fields if f not in fields)
+    return fields
+
+def missing_fields(required: Iterable[str], indexed: Iterable[str]) -> List[str]:
+    """Required fields that no existing index leads with."""
+    indexed_upper = {f.upper() for f in indexed}
+    return [f for f in required if f.upper() not in indexed_upper]
+
+def ensure_indexes(dataset: str) -> Dict[str, str]:
+    """Create any missing required indexes on dataset.
+    
+    Returns the status of each required field: 'hit' (index existed),
+    'created', 'no field' or 'failed'. Index problems are logged, never
+    raised, because a missing index only costs speed.
+    """
+    from scripts.intermediate import is_memory
+    
+    status: Dict[str, str] = {}
+    required = required_fields(dataset)
+    # The memory workspace doesn't support attribute indexes
+    if not required or is_memory(dataset):
+        return status
+    
+    backend = get_backend()
+    try:
+        existing_fields = {f.name.upper() for f in backend.list_fields(dataset)}
+        # An index helps a query when the field is its leading column
+        indexed = [fields[0] for fields in backend.list_indexes(dataset) if fields]
+    except Exception as e:
+        logger.warning(f"Could not inspect indexes on {dataset}: {e}")
+        return status
+    
+    missing = missing_fields(required, indexed)
+    for field in required:
+        if field not in missing:
+            status[field] = 'hit'
+        elif field.upper() not in existing_fields:
+            status[field] = 'no field'
+        else:
+            try:
+                backend.add_index(dataset, [field], f"IDX_{field}")
+                status[field] = 'created'
+            except Exception as e:
+                logger.warning(f"Could not create index on {dataset}.{field}: {e}")
+                status[field] = 'failed'
+    
+    hits = sum(1 for s in status.values() if s == 'hit')
+    logger.info(
+        f"Indexes on {dataset}: {hits}/{len(required)} hit" +
+        "".join(f", {field} {s}" for field, s in status.items() if s != 'hit')
+    )
+    return status
@@ -1,33 +1,305 @@
+import os
+import gzip
+import time
+import queue
+import atexit
+import shutil
 import logging
+import threading
+from logging.handlers import QueueHandler
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 
+FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Overridden by the logging section of settings.yaml (see setup_file_logger)
+DEFAULT_OPTIONS = {
+    'max_bytes': 10 * 1024 * 1024,  # rotate when a file grows past this
+    'rotate_hours': 24,             # ... or when it has been written to for this long
+    'batch_size': 500,              # records buffered before a write is forced
+    'flush_interval': 2.0,          # seconds between writes otherwise
+    'retention_days': 14,           # rotated and old run logs are deleted after this
+    'compress': True                # gzip rotated and old run logs
+}
+
+# Unwritten records kept while the log directory is unreachable
+MAX_PENDING = 50000
+
+# Logs of earlier runs are compressed once untouched for this long, since
+# another process may still be writing to them
+COMPRESS_AFTER = 86400
+
+def _compress(path: Path):
+    """Gzip a log file in place (path -> path.gz)."""
+    try:
+        with open(path, 'rb') as src, gzip.open(f"{path}.gz", 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        path.unlink()
+    except OSError as e:
+        logging.getLogger(__name__).warning(f"Could not compress {path}: {e}")
+
+def housekeep_logs(log_dir: Path, pattern: str, retention_days: float, compress: bool,
+                   exclude: Optional[Path] = None, compress_after: float = 0):
+    """Compress finished logs matching pattern and delete those past retention.
+
+    Replaces the log-cleanup.sh cron job for the pipeline's own logs.
+    """
+    now = time.time()
+    for path in Path(log_dir).glob(pattern):
+        if exclude is not None and path == exclude:
+            continue
+        try:
+            age = now - path.stat().st_mtime
+            if age > retention_days * 86400:
+                path.unlink()
+            elif compress and path.suffix == '.log' and age >= compress_after:
+                _compress(path)
+        except OSError:
+            pass
+
+def _in_background(target, *args):
+    threading.Thread(target=target, args=args, daemon=True).start()
+
+class BatchingRotatingFileHandler(logging.Handler):
+    """Log file handler that writes buffered records in batches.
+
+    Meant to run on the log listener thread: emit only buffers, and flush
+    writes the buffer with a single write. The file is rotated when it
+    grows past max_bytes or after rotate_hours; rotated files are gzipped
+    and expired ones deleted on a background thread. If the directory is
+    unreachable (e.g. a network share drops) records are kept and written
+    on a later flush.
+    """
+
+    def __init__(self, path: Path, max_bytes: int = DEFAULT_OPTIONS['max_bytes'],
+                 rotate_hours: float = DEFAULT_OPTIONS['rotate_hours'],
+                 batch_size: int = DEFAULT_OPTIONS['batch_size'],
+                 retention_days: float = DEFAULT_OPTIONS['retention_days'],
+                 compress: bool = DEFAULT_OPTIONS['compress'], **_):
+        super().__init__()
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_hours * 3600
+        self.batch_size = batch_size
+        self.retention_days = retention_days
+        self.compress = compress
+        self.buffer: List[str] = []
+        self.dropped = 0
+        self._opened_at = time.time()
+        self.setFormatter(logging.Formatter(FORMAT))
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            self.buffer.append(self.format(record))
+        except Exception:
+            self.handleError(record)
+            return
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        data = "\n".join(self.buffer) + "\n"
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            if self._should_rotate(len(data)):
+                self._rotate()
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(data)
+            self.buffer = []
+        except OSError:
+            # Keep the records for the next flush, dropping the oldest past MAX_PENDING
+            if len(self.buffer) > MAX_PENDING:
+                self.dropped += len(self.buffer) - MAX_PENDING
+                self.buffer = self.buffer[-MAX_PENDING:]
+
+    def _should_rotate(self, incoming: int) -> bool:
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            return False
+        return (size > 0 and size + incoming > self.max_bytes) or \
+            time.time() - self._opened_at >= self.rotate_seconds
+
+    def _rotate(self):
+        self._opened_at = time.time()
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        rotated = self.path.with_name(f"{self.path.stem}.{stamp}{self.path.suffix}")
+        n = 0
+        while rotated.exists() or Path(f"{rotated}.gz").exists():
+            n += 1
+            rotated = self.path.with_name(f"{self.path.stem}.{stamp}-{n}{self.path.suffix}")
+        try:
+            os.replace(self.path, rotated)
+        except OSError:
+            # e.g. another process has the file open on Windows; keep appending
+            return
+        _in_background(housekeep_logs, self.path.parent, f"{self.path.stem}.*",
+                       self.retention_days, self.compress, self.path)
+
+    def close(self):
+        self.flush()
+        super().close()
+
+class LogListener:
+    """Writes queued log records to its handlers on a background thread.
+
+    Records are handed to every handler as they arrive; handlers are
+    flushed every flush_interval (and at once after an error), so a burst
+    of records becomes one write per file.
+    """
+
+    def __init__(self, log_queue: "queue.Queue",
+                 flush_interval: float = DEFAULT_OPTIONS['flush_interval']):
+        self.queue = log_queue
+        self.flush_interval = flush_interval
+        self.handlers: List[logging.Handler] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._last_flush = time.monotonic()
+
+    def add_handler(self, handler: logging.Handler):
+        with self._lock:
+            self.handlers.append(handler)
+
+    def remove_handler(self, handler: logging.Handler):
+        with self._lock:
+            if handler in self.handlers:
+                self.handlers.remove(handler)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="log-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Write everything still queued and stop the thread."""
+        if self._thread is not None and self._thread.is_alive():
+            self.queue.put(None)
+            self._thread.join()
+        self._flush()
+
+    def _run(self):
+        while True:
+            timeout = max(0.0, self._last_flush + self.flush_interval - time.monotonic())
+            try:
+                record = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                self._flush()
+                continue
+            if record is None:
+                return
+            with self._lock:
+                for handler in self.handlers:
+                    if record.levelno >= handler.level:
+                        handler.handle(record)
+            if (record.levelno >= logging.ERROR
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                # Errors shouldn't wait in a buffer if the process is about to die
+                self._flush()
+
+    def _flush(self):
+        with self._lock:
+            for handler in self.handlers:
+                try:
+                    handler.flush()
+                except Exception:
+                    pass
+        self._last_flush = time.monotonic()
+
+class _QueueHandler(QueueHandler):
+    """Queues records for this process's listener, starting one if needed.
+
+    A forked worker inherits the handler but not the listener thread, so
+    the listener is started per process.
+    """
+
+    def enqueue(self, record: logging.LogRecord):
+        _get_listener().queue.put_nowait(record)
+
+_queue_handler = _QueueHandler(None)
+_listener: Optional[LogListener] = None
+_listener_pid: Optional[int] = None
+_listener_lock = threading.Lock()
+
+def _get_listener() -> LogListener:
+    """The log listener of this process, with console output."""
+    global _listener, _listener_pid
+    if _listener_pid != os.getpid():
+        with _listener_lock:
+            if _listener_pid != os.getpid():
+                # Records queued in the parent before a fork belong to the parent
+                listener = LogListener(queue.Queue())
+                console_handler = logging.StreamHandler()
+                console_handler.setLevel(logging.INFO)
+                console_handler.setFormatter(logging.Formatter(FORMAT))
+                listener.add_handler(console_handler)
+                listener.start()
+                _listener, _listener_pid = listener, os.getpid()
+                _queue_handler.queue = listener.queue
+    return _listener
+
+def flush_logs():
+    """Write every record logged so far (e.g. before exiting)."""
+    if _listener is not None and _listener_pid == os.getpid():
+        _listener.stop()
+        _listener.start()
+
+@atexit.register
+def _stop_listener():
+    if _listener is not None and _listener_pid == os.getpid():
+        _listener.stop()
+
 def get_logger(name: str, log_file: Optional[Path] = None) -> logging.Logger:
-    """Sets up and returns a logger instance."""
+    """Sets up and returns a logger instance.
+
+    Records are queued and written by a background listener, so logging
+    never waits on the console or a slow log directory.
+    """
     logger = logging.getLogger(name)
-    
+
     if not logger.handlers:
         logger.setLevel(logging.INFO)
-        
-        # Console handler
-        console_handler = logging.StreamHandler()
-        console_handler.setLevel(logging.INFO)
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        console_handler.setFormatter(formatter)
-        logger.addHandler(console_handler)
-        
+        logger.addHandler(_queue_handler)
+        _get_listener()
+
         # File handler (if log_file is provided)
         if log_file:
-            file_handler = logging.FileHandler(log_file)
-            file_handler.setLevel(logging.INFO)
-            file_handler.setFormatter(formatter)
-            logger.addHandler(file_handler)
-    
+            add_log_file(log_file)
+
     return logger
 
-def setup_file_logger(name: str, log_dir: Path) -> logging.Logger:
-    """Sets up a logger with both console and file output."""
+def add_log_file(log_file: Path, options: Optional[Dict] = None) -> BatchingRotatingFileHandler:
+    """Write this process's log records to log_file as well as the console."""
+    options = dict(DEFAULT_OPTIONS, **(options or {}))
+    handler = BatchingRotatingFileHandler(Path(log_file), **options)
+    handler.setLevel(logging.INFO)
+    listener = _get_listener()
+    listener.flush_interval = options['flush_interval']
+    listener.add_handler(handler)
+    return handler
+
+def _logging_options() -> Dict:
+    """The logging section of settings.yaml, or the defaults if unavailable."""
+    try:
+        from scripts.helpers.config_utils import load_config
+        return load_config().get('logging') or {}
+    except Exception:
+        return {}
+
+def setup_file_logger(name: str, log_dir: Path, options: Optional[Dict] = None) -> logging.Logger:
+    """Sets up a logger with both console and file output.
+
+    The file receives every record of the process. Earlier logs of the same
+    name are compressed, and deleted after retention_days, in the background.
+    """
+    options = dict(DEFAULT_OPTIONS, **(options if options is not None else _logging_options()))
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     log_file = log_dir / f"{name}_{timestamp}.log"
-    return get_logger(name, log_file)
+
+    logger = get_logger(name)
+    add_log_file(log_file, options)
+    _in_background(housekeep_logs, log_dir, f"{name}_*.log*", options['retention_days'],
+                   options['compress'], log_file, COMPRESS_AFTER)
+    return logger
@@ -0,0 +1,227 @@
+"""Progress events with pluggable, rate-limited sinks.
+
+    progress = Progress("Map Generation", total_steps=100)
+    progress.update(10, "Building SQL expression...")
+    for row in cursor:
+        progress.advance()   # cheap; most calls return without emitting
+    progress.complete("Done")
+
+Updates go to the sinks of the process (configure_progress, or the
+MAPGEN_PROGRESS environment variable inherited by worker processes):
+"log" (the default), "console", "ndjson" or "none". Each sink coalesces
+updates: a new stage message or the final update is always delivered,
+otherwise at most one update per min_interval per operation, so progress
+calls can sit in row loops without measurable overhead.
+"""
+import os
+import sys
+import json
+import time
+from collections import namedtuple
+from typing import Callable, Dict, List, Optional, Sequence
+from scripts.helpers.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+PROGRESS_ENV = 'MAPGEN_PROGRESS'
+PROGRESS_MODES = ('log', 'console', 'ndjson', 'none')
+
+# total is None when the number of steps is not known up front (e.g. cursor rows);
+# remaining is the estimated seconds left, or None
+ProgressEvent = namedtuple('ProgressEvent', ['operation', 'step', 'total', 'message',
+                                             'elapsed', 'remaining', 'done', 'pid'])
+
+def percent(event: ProgressEvent) -> Optional[float]:
+    if not event.total:
+        return None
+    return min(100.0, event.step / event.total * 100)
+
+def _hms(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "Unknown"
+    return time.strftime("%H:%M:%S", time.gmtime(seconds))
+
+def _position(event: ProgressEvent) -> str:
+    if event.total:
+        return f"{percent(event):.1f}% complete ({event.step}/{event.total})"
+    return f"{event.step} done"
+
+class ProgressSink:
+    """Receives progress events, passing at most one per min_interval to emit."""
+
+    min_interval = 0.0
+
+    def __init__(self, min_interval: Optional[float] = None):
+        if min_interval is not None:
+            self.min_interval = min_interval
+        # Per operation: (time of the last emitted event, its message)
+        self._last: Dict[str, tuple] = {}
+
+    def handle(self, event: ProgressEvent):
+        now = time.monotonic()
+        last_time, last_message = self._last.get(event.operation, (None, None))
+        if (event.done or last_time is None or event.message != last_message
+                or now - last_time >= self.min_interval):
+            self._last[event.operation] = (now, event.message)
+            if event.done:
+                del self._last[event.operation]
+            self.emit(event)
+
+    def emit(self, event: ProgressEvent):
+        raise NotImplementedError
+
+class LogSink(ProgressSink):
+    """Logs stage changes and, within a stage, one line a minute."""
+
+    min_interval = 60.0
+
+    def emit(self, event: ProgressEvent):
+        if event.done:
+            logger.info(f"{event.operation} completed in {_hms(event.elapsed)}\n"
+                        f"Final status: {event.message}")
+            return
+        message = (f"{event.operation}: {_position(event)}\n"
+                   f"Elapsed: {_hms(event.elapsed)}, Estimated remaining: {_hms(event.remaining)}")
+        if event.message:
+            message += f"\nCurrent activity: {event.message}"
+        logger.info(message)
+
+class ConsoleSink(ProgressSink):
+    """A single status line on a terminal, rewritten in place."""
+
+    min_interval = 0.2
+
+    def __init__(self, stream=None, min_interval: Optional[float] = None):
+        super().__init__(min_interval)
+        self.stream = stream or sys.stderr
+
+    def emit(self, event: ProgressEvent):
+        position = f"{percent(event):5.1f}%" if event.total else f"{event.step:>6}"
+        line = f"{event.operation}: {position} {event.message}"
+        if event.remaining and not event.done:
+            line += f" (~{_hms(event.remaining)} left)"
+        line = line[:100]
+        self.stream.write(f"\r{line:<100}" + ("\n" if event.done else ""))
+        self.stream.flush()
+
+class NdjsonSink(ProgressSink):
+    """One JSON object per line (on stdout by default) for orchestrators."""
+
+    min_interval = 1.0
+
+    def __init__(self, stream=None, min_interval: Optional[float] = None):
+        super().__init__(min_interval)
+        self.stream = stream or sys.stdout
+
+    def emit(self, event: ProgressEvent):
+        record = dict(event._asdict(), elapsed=round(event.elapsed, 3), time=time.time())
+        # One write per line so lines from worker processes don't interleave
+        self.stream.write(json.dumps(record) + "\n")
+        self.stream.flush()
+
+class CallbackSink(ProgressSink):
+    """Passes events to a function, e.g. to queue them for another thread."""
+
+    def __init__(self, callback: Callable[[ProgressEvent], None], min_interval: float = 0.1):
+        super().__init__(min_interval)
+        self.callback = callback
+
+    def emit(self, event: ProgressEvent):
+        self.callback(event)
+
+SINKS = {
+    'log': LogSink,
+    'console': ConsoleSink,
+    'ndjson': NdjsonSink
+}
+
+# Sinks for this process, created from the environment on first use
+_sinks: Optional[List[ProgressSink]] = None
+
+def get_sinks() -> List[ProgressSink]:
+    """The process-wide sinks, as chosen by MAPGEN_PROGRESS (default: log)."""
+    global _sinks
+    if _sinks is None:
+        modes = os.environ.get(PROGRESS_ENV) or 'log'
+        _sinks = [SINKS[mode]() for mode in modes.split(',') if mode in SINKS]
+    return _sinks
+
+def configure_progress(modes: Sequence[str]):
+    """Choose the sinks for this process and the worker processes it starts."""
+    global _sinks
+    unknown = [mode for mode in modes if mode not in PROGRESS_MODES]
+    if unknown:
+        raise ValueError(f"Unknown progress output: {', '.join(unknown)}")
+    os.environ[PROGRESS_ENV] = ','.join(modes)
+    _sinks = None
+
+class Progress:
+    """Progress of one operation, published to sinks as ProgressEvents.
+
+    update() sets the step and stage message, advance() counts steps in a
+    loop. Calls between sink deadlines that don't change the message return
+    after a clock read, without building an event. With an expected
+    duration (e.g. from scripts.run_history) the time remaining is that
+    minus the time elapsed; otherwise, or once it is overrun, it is
+    extrapolated from the fraction of steps done.
+    """
+
+    def __init__(self, operation_name: str, total_steps: Optional[int] = 100,
+                 sinks: Optional[List[ProgressSink]] = None,
+                 expected_duration: Optional[float] = None):
+        self.operation_name = operation_name
+        self.total_steps = total_steps
+        self.expected_duration = expected_duration
+        self.current_step = 0
+        self.message = ""
+        self.sinks = get_sinks() if sinks is None else sinks
+        self.start_time = time.time()
+        self._started = time.monotonic()
+        self._interval = min((s.min_interval for s in self.sinks), default=float('inf'))
+        self._next_due = 0.0
+
+    def update(self, step: Optional[int] = None, message: str = ""):
+        """Set the current step (default: one more) and stage message."""
+        self.current_step = step if step is not None else self.current_step + 1
+        if message == self.message and time.monotonic() < self._next_due:
+            return
+        self.message = message
+        self._publish(False)
+
+    def advance(self, count: int = 1):
+        """Count steps done within the current stage."""
+        self.current_step += count
+        if time.monotonic() >= self._next_due:
+            self._publish(False)
+
+    def expect(self, seconds: Optional[float]):
+        """Set how long the whole operation is expected to take."""
+        self.expected_duration = seconds
+
+    def remaining(self, elapsed: float) -> Optional[float]:
+        """Estimated seconds left, given the seconds elapsed."""
+        if self.expected_duration is not None and elapsed < self.expected_duration:
+            return self.expected_duration - elapsed
+        if not self.total_steps or self.current_step <= 0:
+            return None
+        return max(0.0, elapsed / self.current_step * (self.total_steps - self.current_step))
+
+    def complete(self, message: str = "Operation completed"):
+        """Publish the final update."""
+        if self.total_steps:
+            self.current_step = self.total_steps
+        self.message = message
+        self._publish(True)
+
+    def _publish(self, done: bool):
+        now = time.monotonic()
+        self._next_due = now + self._interval
+        elapsed = now - self._started
+        event = ProgressEvent(self.operation_name, self.current_step, self.total_steps,
+                              self.message, elapsed, 0.0 if done else self.remaining(elapsed),
+                              done, os.getpid())
+        for sink in self.sinks:
+            try:
+                sink.handle(event)
+            except Exception as e:
+                logger.error(f"Error updating progress: {e}")
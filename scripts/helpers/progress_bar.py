@@ -2,16 +2,40 @@ import tkinter as tk
 from tkinter import ttk
 from typing import Optional
 from scripts.helpers.logging_utils import get_logger
+from scripts.helpers.progress import Progress, ProgressEvent, ProgressSink
 
 logger = get_logger(__name__)
 
-class ProgressBar:
-    """Progress bar widget with status updates."""
+class TkSink(ProgressSink):
+    """Shows progress events in a progress bar and status label.
+    
+    Must be fed from the Tk thread; the bar repaints when the event loop
+    next runs, so updates never force a redraw.
+    """
+    
+    min_interval = 0.05
+    
+    def __init__(self, progress: ttk.Progressbar, status_var: tk.StringVar,
+                 min_interval: Optional[float] = None):
+        super().__init__(min_interval)
+        self.progress = progress
+        self.status_var = status_var
+    
+    def emit(self, event: ProgressEvent):
+        if event.total:
+            self.progress["maximum"] = event.total
+            self.progress["value"] = event.step
+        if event.message:
+            self.status_var.set(event.message)
+
+class ProgressBar(Progress):
+    """Progress bar widget with status updates.
+    
+    Without a parent there is no widget and updates go to the process's
+    progress sinks, as with ProgressTracker.
+    """
     
     def __init__(self, parent: Optional[tk.Widget] = None, total_steps: int = 100, operation_name: str = ""):
-        self.total_steps = total_steps
-        self.operation_name = operation_name
-        
         if parent is not None:
             # GUI mode
             self.frame = ttk.Frame(parent)
@@ -26,38 +50,25 @@ class ProgressBar:
             self.status_label = ttk.Label(self.frame, textvariable=self.status_var)
             self.progress.pack(fill=tk.X, padx=5, pady=2)
             self.status_label.pack(fill=tk.X, padx=5)
+            sinks = [TkSink(self.progress, self.status_var)]
         else:
             # CLI mode
             self.frame = None
             self.progress = None
             self.status_var = None
+            sinks = None
+        super().__init__(operation_name, total_steps, sinks)
             
     def pack(self, **kwargs):
         """Pack the progress bar frame if in GUI mode."""
         if self.frame:
             self.frame.pack(**kwargs)
-        
-    def update(self, step: int, status: Optional[str] = None):
-        """Update progress bar and status."""
-        try:
-            if self.progress:
-                # GUI mode
-                self.progress["value"] = step
-                if status:
-                    self.status_var.set(status)
-                if hasattr(self.frame, 'master'):
-                    self.frame.master.update_idletasks()
-            else:
-                # CLI mode
-                percent = (step / self.total_steps) * 100
-                logger.info(f"{self.operation_name}: {percent:.0f}% - {status}")
-        except Exception as e:
-            logger.error(f"Error updating progress: {e}")
     
     def reset(self):
         """Reset progress bar to initial state."""
+        self.current_step = 0
+        self.message = ""
+        self._next_due = 0.0
         if self.progress:
             self.progress["value"] = 0
             self.status_var.set("Ready")
-            if hasattr(self.frame, 'master'):
-                self.frame.master.update_idletasks()
@@ -0,0 +1,252 @@
+"""Span-based stage timing for pipeline runs.
+
+    with span("intersect", substation="EMILIE", rows=12000) as intersect_span:
+        ...
+        intersect_span.set(output_rows=11873)
+
+Spans are always timed. When tracing is enabled (configure_tracing, or the
+MAPGEN_TRACE_DIR environment variable inherited by worker processes) each
+finished span is appended to <trace_dir>/<run_id>.<pid>.jsonl; merge_trace
+combines a run's files into a Chrome trace (<run_id>.trace.json) that opens
+as a timeline in chrome://tracing or https://ui.perfetto.dev. Listeners
+receive every finished span whether or not tracing is enabled.
+"""
+import os
+import json
+import time
+import uuid
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from scripts.helpers.logging_utils import get_logger
+from config.fixed_paths import TRACES_DIR
+
+logger = get_logger(__name__)
+
+TRACE_DIR_ENV = 'MAPGEN_TRACE_DIR'
+TRACE_RUN_ENV = 'MAPGEN_TRACE_RUN'
+
+class Span:
+    """One timed stage: name, attributes, wall-clock start and duration in seconds."""
+
+    __slots__ = ('name', 'attrs', 'span_id', 'parent_id', 'start', 'duration',
+                 'status', 'error', 'pid', 'tid', 'recording')
+
+    def __init__(self, name: str, attrs: Dict[str, Any], parent_id: Optional[str] = None,
+                 recording: bool = False):
+        self.name = name
+        self.attrs = attrs
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.start = time.time()
+        self.duration: Optional[float] = None
+        self.status = 'ok'
+        self.error: Optional[str] = None
+        self.pid = os.getpid()
+        self.tid = threading.get_ident()
+        # False when nothing will see the span; skip costly attributes then
+        self.recording = recording
+
+    def set(self, **attrs):
+        """Add or replace attributes."""
+        self.attrs.update(attrs)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'start': self.start,
+            'duration': self.duration,
+            'status': self.status,
+            'error': self.error,
+            'pid': self.pid,
+            'tid': self.tid,
+            'attrs': self.attrs
+        }
+
+class JsonlSink:
+    """Appends finished spans to one JSON-lines file per process."""
+
+    def __init__(self, trace_dir: Union[str, Path], run_id: str):
+        self.trace_dir = Path(trace_dir)
+        self.run_id = run_id
+        self._lock = threading.Lock()
+        self._file = None
+        self._pid = None
+
+    @property
+    def path(self) -> Path:
+        return self.trace_dir / f"{self.run_id}.{os.getpid()}.jsonl"
+
+    def write(self, span: Span):
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            # A forked worker must not share the parent's file handle
+            if self._file is None or self._pid != os.getpid():
+                self.trace_dir.mkdir(parents=True, exist_ok=True)
+                self._file = open(self.path, 'a', encoding='utf-8')
+                self._pid = os.getpid()
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None and self._pid == os.getpid():
+                self._file.close()
+            self._file = None
+
+class Tracer:
+    """Creates spans and hands finished ones to the sink and listeners."""
+
+    def __init__(self):
+        self.sink: Optional[JsonlSink] = None
+        self.listeners: List[Callable[[Span], None]] = []
+        self._local = threading.local()
+
+    @property
+    def enabled(self) -> bool:
+        return self.sink is not None
+
+    def add_listener(self, listener: Callable[[Span], None]):
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[Span], None]):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def _stack(self) -> List[Span]:
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def span(self, name: str, **attrs) -> Iterator[Span]:
+        """Time the enclosed block as a span nested under the current one."""
+        stack = self._stack()
+        current = Span(name, attrs, stack[-1].span_id if stack else None,
+                       recording=self.enabled or bool(self.listeners))
+        stack.append(current)
+        started = time.perf_counter()
+        try:
+            yield current
+        except BaseException as e:
+            current.status = 'error'
+            current.error = str(e) or type(e).__name__
+            raise
+        finally:
+            current.duration = time.perf_counter() - started
+            stack.pop()
+            self._finish(current)
+
+    def _finish(self, span: Span):
+        if self.sink is not None:
+            try:
+                self.sink.write(span)
+            except Exception as e:
+                logger.warning(f"Could not write trace span {span.name}: {e}")
+        for listener in list(self.listeners):
+            try:
+                listener(span)
+            except Exception as e:
+                logger.warning(f"Trace listener failed on {span.name}: {e}")
+
+# Tracer for this process, configured from the environment on first use
+_tracer: Optional[Tracer] = None
+
+def get_tracer() -> Tracer:
+    """The process-wide tracer; worker processes pick up tracing from the environment."""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer()
+        trace_dir = os.environ.get(TRACE_DIR_ENV)
+        if trace_dir:
+            _tracer.sink = JsonlSink(trace_dir, os.environ.get(TRACE_RUN_ENV) or new_run_id())
+    return _tracer
+
+def new_run_id() -> str:
+    return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}"
+
+def configure_tracing(trace_dir: Union[str, Path], run_id: Optional[str] = None) -> str:
+    """Enable tracing for this process and any worker processes it starts later.
+
+    Returns the run id, which names the run's trace files.
+    """
+    run_id = run_id or new_run_id()
+    os.environ[TRACE_DIR_ENV] = str(trace_dir)
+    os.environ[TRACE_RUN_ENV] = run_id
+
+    tracer = get_tracer()
+    if tracer.sink is not None:
+        tracer.sink.close()
+    tracer.sink = JsonlSink(trace_dir, run_id)
+    return run_id
+
+def configure_from_settings(config: Dict, force: bool = False) -> Optional[Tuple[Path, str]]:
+    """Enable tracing if the tracing section (or force, e.g. --trace) asks for it.
+
+    Returns (trace_dir, run_id) for merge_trace, or None when tracing is off.
+    """
+    settings = config.get('tracing') or {}
+    if not (force or settings.get('enabled', False)):
+        return None
+    trace_dir = Path(settings.get('path') or TRACES_DIR)
+    return trace_dir, configure_tracing(trace_dir)
+
+def disable_tracing():
+    """Stop writing spans in this process and in workers started from now on."""
+    os.environ.pop(TRACE_DIR_ENV, None)
+    os.environ.pop(TRACE_RUN_ENV, None)
+    tracer = get_tracer()
+    if tracer.sink is not None:
+        tracer.sink.close()
+        tracer.sink = None
+
+def span(name: str, **attrs):
+    """Shortcut for get_tracer().span(...)."""
+    return get_tracer().span(name, **attrs)
+
+def read_spans(paths: Iterable[Union[str, Path]]) -> List[Dict[str, Any]]:
+    """Load spans from JSON-lines files, skipping a torn final line."""
+    spans = []
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    spans.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping incomplete span in {path}")
+    return sorted(spans, key=lambda s: s['start'])
+
+def chrome_trace(spans: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Convert spans to Chrome trace event format (complete 'X' events, microseconds)."""
+    events = []
+    for s in spans:
+        args = dict(s['attrs'])
+        if s['status'] != 'ok':
+            args['error'] = s['error']
+        events.append({
+            'name': s['name'],
+            'cat': s['status'],
+            'ph': 'X',
+            'ts': round(s['start'] * 1e6),
+            'dur': round((s['duration'] or 0) * 1e6),
+            'pid': s['pid'],
+            'tid': s['tid'],
+            'args': args
+        })
+    return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+def merge_trace(trace_dir: Union[str, Path], run_id: str,
+                output_path: Optional[Union[str, Path]] = None) -> Path:
+    """Merge every process's spans for a run into one Chrome trace file."""
+    trace_dir = Path(trace_dir)
+    output_path = Path(output_path) if output_path else trace_dir / f"{run_id}.trace.json"
+    spans = read_spans(sorted(trace_dir.glob(f"{run_id}.*.jsonl")))
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(chrome_trace(spans), f, default=str)
+    logger.info(f"Wrote {len(spans)} spans to {output_path}")
+    return output_path
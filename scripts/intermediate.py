@@ -0,0 +1,106 @@
+"""Storage tier for intermediate datasets and promotion of deliverables.
+
+The intersections (XFMR_MCD, PriCond_MCD), the selection key tables and
+the per-substation *_Sum tables are rebuilt on every run. The
+options.intermediate setting chooses where they are written:
+
+    workspace  the working geodatabase (intersections go to the worker's
+               scratch geodatabase in batch runs)
+    scratch    a local file geodatabase: the worker's scratch geodatabase
+               in batch runs, otherwise data/cache/scratch/intermediate.gdb
+    memory     arcpy's memory workspace, gone when the process exits
+
+With scratch or memory, only the *_Sum tables reach the working
+geodatabase, copied there together by one TableToGeodatabase call once
+they are all built.
+"""
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+from scripts.backends import get_backend
+from scripts.helpers.config_utils import ConfigurationError
+from scripts.helpers.index_manager import ensure_indexes
+from scripts.helpers.logging_utils import get_logger
+from scripts.helpers.tracing import span
+from config.fixed_paths import CACHE_DIR
+
+logger = get_logger(__name__)
+
+TIERS = ('workspace', 'scratch', 'memory')
+MEMORY_WORKSPACE = "memory"
+SCRATCH_GDB = CACHE_DIR / "scratch" / "intermediate.gdb"
+
+def is_memory(dataset: Union[str, Path]) -> bool:
+    """True for datasets in the memory workspace (memory\\X or in_memory\\X)."""
+    return str(dataset).replace('/', '\\').split('\\', 1)[0].lower() in ('memory', 'in_memory')
+
+def _name(dataset: str) -> str:
+    return dataset.replace('/', '\\').rsplit('\\', 1)[-1]
+
+class IntermediateStore:
+    """Where a run writes its intermediate datasets and summary tables.
+
+    intersection_workspace holds the intersections and key tables,
+    table_workspace the summary tables. Summary tables built outside the
+    working geodatabase are promoted to it by flush().
+    """
+
+    def __init__(self, workspace: Union[str, Path], tier: str = 'workspace',
+                 scratch_workspace: Optional[Union[str, Path]] = None):
+        if tier not in TIERS:
+            raise ConfigurationError(f"Unknown intermediate tier '{tier}', expected one of: {', '.join(TIERS)}")
+        self.workspace = str(workspace)
+        self.tier = tier
+        self.backend = get_backend()
+        self.pending: List[str] = []
+
+        if tier == 'memory':
+            self.intersection_workspace = self.table_workspace = MEMORY_WORKSPACE
+        elif tier == 'scratch':
+            self.intersection_workspace = self.table_workspace = str(scratch_workspace or self._local_gdb())
+        else:
+            self.intersection_workspace = str(scratch_workspace or workspace)
+            self.table_workspace = self.workspace
+
+    @classmethod
+    def from_config(cls, config: Dict, workspace: Union[str, Path],
+                    scratch_workspace: Optional[Union[str, Path]] = None) -> "IntermediateStore":
+        """Store for the options.intermediate tier (default: workspace)."""
+        return cls(workspace, config['options'].get('intermediate') or 'workspace', scratch_workspace)
+
+    def _local_gdb(self) -> Path:
+        if not self.backend.exists(str(SCRATCH_GDB)):
+            SCRATCH_GDB.parent.mkdir(parents=True, exist_ok=True)
+            self.backend.create_file_gdb(str(SCRATCH_GDB.parent), SCRATCH_GDB.name)
+        return SCRATCH_GDB
+
+    @property
+    def in_memory(self) -> bool:
+        return self.tier == 'memory'
+
+    def table(self, name: str) -> str:
+        """Path of a summary table."""
+        return f"{self.table_workspace}\\{name}"
+
+    def promote(self, table: str):
+        """Mark a finished summary table as a deliverable of the run."""
+        if self.table_workspace == self.workspace:
+            ensure_indexes(table)
+        elif table not in self.pending:
+            self.pending.append(table)
+
+    def flush(self) -> List[str]:
+        """Copy the promoted tables into the working geodatabase in one bulk copy."""
+        if not self.pending:
+            return []
+        targets = [f"{self.workspace}\\{_name(table)}" for table in self.pending]
+        with span("promote_tables", tier=self.tier, tables=len(targets)):
+            # TableToGeodatabase renames rather than overwrites existing tables
+            for target in targets:
+                if self.backend.exists(target):
+                    self.backend.delete(target)
+            self.backend.table_to_geodatabase(self.pending, self.workspace)
+        for target in targets:
+            ensure_indexes(target)
+        logger.info(f"Promoted {len(targets)} tables to {self.workspace}")
+        self.pending = []
+        return targets
@@ -0,0 +1,176 @@
+import time
+import queue
+import itertools
+import threading
+import traceback
+from pathlib import Path
+from typing import Dict, List, Optional
+from scripts.helpers.logging_utils import get_logger
+from scripts.helpers.progress import Progress, CallbackSink, get_sinks
+
+logger = get_logger(__name__)
+
+QUEUED, RUNNING, SUCCESS, FAILED, CANCELLED = 'Queued', 'Running', 'Success', 'Failed', 'Cancelled'
+
+# Seconds between status queries for jobs run on the map daemon
+DAEMON_POLL_INTERVAL = 0.5
+
+_job_ids = itertools.count(1)
+
+class Job:
+    """One substation's map generation run."""
+
+    def __init__(self, source_sub: str, year: str, force: bool = False):
+        self.job_id = next(_job_ids)
+        self.source_sub = source_sub
+        self.year = year
+        self.force = force
+        self.status = QUEUED
+        self.error: Optional[str] = None
+        self.duration = 0.0
+
+    def __repr__(self):
+        return f"Job({self.job_id}, {self.source_sub}, {self.year}, {self.status})"
+
+class JobRunner:
+    """Runs queued map generation jobs one at a time on a background thread.
+
+    Nothing here touches Tk: the runner reports through events, a queue of
+    dicts with a 'type' of 'started', 'progress' or 'finished' and the job,
+    which the GUI drains from its own event loop. All geoprocessing happens
+    on the runner thread, which keeps one MapGenerator (and its open
+    templates and circuit index) for every job of the session.
+
+    With daemon (a scripts.daemon.DaemonClient) jobs run on the map
+    daemon's warm workers instead; a job the daemon has already started
+    can't be cancelled and runs to the end.
+    """
+
+    def __init__(self, workspace: Path, daemon=None):
+        self.workspace = Path(workspace)
+        self.daemon = daemon
+        self.events: "queue.Queue[Dict]" = queue.Queue()
+        self.jobs: List[Job] = []
+        self.current: Optional[Job] = None
+        self.cancel_event = threading.Event()
+        self._queue: "queue.Queue[Optional[Job]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._generator = None
+
+    def submit(self, source_sub: str, year: str, force: bool = False) -> Job:
+        """Queue a job, starting the runner thread if needed."""
+        job = Job(source_sub, year, force)
+        self.jobs.append(job)
+        self._queue.put(job)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="map-jobs", daemon=True)
+            self._thread.start()
+        return job
+
+    def cancel(self, job: Optional[Job] = None):
+        """Cancel a queued job, or stop the running one at its next stage boundary."""
+        job = job or self.current
+        if job is None:
+            return
+        if job.status == QUEUED:
+            job.status = CANCELLED
+            self.events.put({'type': 'finished', 'job': job})
+        elif job.status == RUNNING:
+            logger.info(f"Cancelling {job.source_sub} at the next stage")
+            self.cancel_event.set()
+
+    @property
+    def busy(self) -> bool:
+        return any(job.status in (QUEUED, RUNNING) for job in self.jobs)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every submitted job has finished; False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.busy:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def stop(self, timeout: Optional[float] = None):
+        """Cancel everything and wait up to timeout for the runner thread to exit."""
+        for job in self.jobs:
+            self.cancel(job)
+        self._queue.put(None)
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _get_generator(self):
+        if self._generator is None:
+            # arcpy is only loaded once the first job starts
+            from scripts.map_generator import MapGenerator
+            from scripts.helpers.config_utils import load_config
+            from scripts.source_mirror import refresh_mirror
+            # Once per session; the generator itself only reads the mirror
+            refresh_mirror(load_config())
+            self._generator = MapGenerator(self.workspace, cancel_event=self.cancel_event)
+        return self._generator
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            if job.status == QUEUED:
+                self._run_job(job)
+
+    def _run_job(self, job: Job):
+        from scripts.map_generator import GenerationCancelled
+
+        self.cancel_event.clear()
+        self.current = job
+        job.status = RUNNING
+        self.events.put({'type': 'started', 'job': job})
+        progress = Progress("Map Generation", sinks=[CallbackSink(
+            lambda event: self.events.put({'type': 'progress', 'job': job,
+                                           'step': event.step, 'message': event.message})
+        )] + get_sinks())
+        start = time.time()
+
+        try:
+            if self.daemon is not None:
+                self._run_on_daemon(job, progress)
+            else:
+                generator = self._get_generator()
+                generator.progress = progress
+                progress.update(0, "Processing intersections...")
+                if not generator.process_intersections(job.force):
+                    job.status, job.error = FAILED, "Failed to process intersections"
+                elif not generator.generate_maps(job.source_sub, job.year, force=job.force):
+                    job.status, job.error = FAILED, "Failed to generate maps"
+                else:
+                    job.status = SUCCESS
+        except GenerationCancelled as e:
+            job.status, job.error = CANCELLED, str(e)
+        except Exception as e:
+            logger.error(f"Job for {job.source_sub} failed: {e}")
+            logger.error(traceback.format_exc())
+            job.status, job.error = FAILED, str(e)
+
+        job.duration = round(time.time() - start, 2)
+        self.current = None
+        self.events.put({'type': 'finished', 'job': job})
+
+    def _run_on_daemon(self, job: Job, progress: Progress):
+        """Run a job on the map daemon and wait for it, passing on its status."""
+        remote = self.daemon.submit('generate', source_sub=job.source_sub, year=job.year,
+                                    force=job.force)
+        progress.update(0, f"Queued on the map daemon (job {remote['id']})")
+        cancel_sent = False
+        while remote['status'] in (QUEUED, RUNNING):
+            if self.cancel_event.is_set() and not cancel_sent:
+                remote = self.daemon.cancel(remote['id'])
+                cancel_sent = True
+                if remote['status'] == RUNNING:
+                    logger.info(f"{job.source_sub} already started on the map daemon, it will finish")
+                continue
+            time.sleep(DAEMON_POLL_INTERVAL)
+            remote, = self.daemon.status(remote['id'])
+            if remote['status'] == RUNNING:
+                progress.update(progress.current_step, "Generating maps on the map daemon...")
+        job.status, job.error = remote['status'], remote['error']
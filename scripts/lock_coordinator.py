@@ -0,0 +1,260 @@
+"""Coordinates concurrent runs against the shared working geodatabase.
+
+    locks = LockCoordinator.from_config(settings)
+    locks.wait_for(lambda: backend.test_schema_lock(dataset), f"a schema lock on {dataset}")
+    with locks.exclusive(workspace, "intersections"):
+        locks.retry(rebuild, description="Rebuilding the intersections")
+
+retry and wait_for back off exponentially with jitter, so several
+analysts hitting the same geodatabase spread their attempts out instead
+of failing or retrying in lockstep. exclusive holds an advisory lock file
+next to the geodatabase while a dataset is rebuilt; other runs take a
+ticket and wait their turn in arrival order. Locks and tickets are kept
+fresh by a heartbeat, so those of a crashed run are abandoned after
+stale_after seconds.
+"""
+import os
+import json
+import time
+import uuid
+import random
+import socket
+import getpass
+import itertools
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Optional, Union
+from scripts.helpers.logging_utils import get_logger
+from scripts.intermediate import is_memory
+
+logger = get_logger(__name__)
+
+# Cannot acquire a schema lock / cannot delete (in use) / cannot acquire a lock
+LOCK_ERRORS = ('000464', '000601', '160706')
+
+# Overridden by the locks section of settings.yaml
+DEFAULT_OPTIONS = {
+    'max_wait': 1800.0,     # seconds to wait for a lock before giving up
+    'backoff_base': 1.0,    # first retry delay in seconds, doubled per attempt
+    'backoff_cap': 60.0,    # longest retry delay
+    'stale_after': 600.0    # a lock or ticket not refreshed for this long is abandoned
+}
+
+# The next run in line checks the lock at least this often
+HEAD_POLL = 2.0
+
+class LockTimeout(Exception):
+    """Raised when a lock could not be acquired within max_wait."""
+    pass
+
+def is_lock_error(error: Exception) -> bool:
+    """True if a geoprocessing error was caused by another process's lock."""
+    message = str(error)
+    return any(code in message for code in LOCK_ERRORS)
+
+class Backoff:
+    """Exponential delays with equal jitter: half fixed, half random."""
+
+    def __init__(self, base: float = DEFAULT_OPTIONS['backoff_base'],
+                 cap: float = DEFAULT_OPTIONS['backoff_cap'], factor: float = 2.0):
+        self.base = base
+        self.cap = cap
+        self.factor = factor
+
+    def delay(self, attempt: int) -> float:
+        delay = min(self.cap, self.base * self.factor ** min(attempt, 32))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+class AdvisoryLock:
+    """A lock file other runs respect, with a ticket queue of waiters.
+
+    The lock is taken by creating directory/name.lock exclusively; waiters
+    hold ticket files in directory/name.queue named by arrival time, and
+    only the oldest ticket's owner tries to take the lock.
+    """
+
+    def __init__(self, directory: Union[str, Path], name: str,
+                 stale_after: float = DEFAULT_OPTIONS['stale_after']):
+        self.path = Path(directory) / f"{name}.lock"
+        self.queue_dir = Path(directory) / f"{name}.queue"
+        self.name = name
+        self.stale_after = stale_after
+        self.owner = {
+            'token': uuid.uuid4().hex,
+            'host': socket.gethostname(),
+            'user': getpass.getuser(),
+            'pid': os.getpid()
+        }
+        self.ticket: Optional[Path] = None
+        self.held = False
+        self._stop = threading.Event()
+        self._heartbeat: Optional[threading.Thread] = None
+
+    def holder(self) -> Dict:
+        """Owner details of the current lock file, if readable."""
+        try:
+            return json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return {}
+
+    def take_ticket(self):
+        self.queue_dir.mkdir(parents=True, exist_ok=True)
+        self.ticket = self.queue_dir / f"{time.time_ns():020d}_{self.owner['token']}"
+        self.ticket.touch()
+        self._start_heartbeat()
+
+    def position(self) -> int:
+        """Number of live tickets ahead of ours."""
+        if not self.ticket.exists():
+            # Taken for abandoned (e.g. clock skew between hosts); the name keeps our place
+            self.ticket.touch()
+        tickets = sorted(p for p in self.queue_dir.iterdir() if not self._expired(p))
+        return tickets.index(self.ticket) if self.ticket in tickets else 0
+
+    def try_acquire(self) -> bool:
+        """Create the lock file, breaking it first if its holder has gone."""
+        if self._expired(self.path):
+            logger.warning(f"Breaking abandoned lock on {self.name}: {self.holder()}")
+            self._unlink(self.path)
+        try:
+            fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_EXCL)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(dict(self.owner, since=time.time()), f)
+        self.held = True
+        self._leave_queue()
+        return True
+
+    def release(self):
+        if self.held and self.holder().get('token') == self.owner['token']:
+            self._unlink(self.path)
+        self.held = False
+        self._leave_queue()
+        self._stop.set()
+
+    def _leave_queue(self):
+        if self.ticket is not None:
+            self._unlink(self.ticket)
+            self.ticket = None
+
+    def _expired(self, path: Path) -> bool:
+        try:
+            expired = time.time() - path.stat().st_mtime > self.stale_after
+        except OSError:
+            return False
+        if expired and path.parent == self.queue_dir:
+            # A waiter that stopped refreshing its ticket has gone
+            self._unlink(path)
+        return expired
+
+    def _start_heartbeat(self):
+        def beat():
+            while not self._stop.wait(self.stale_after / 4):
+                for path in (self.ticket, self.path if self.held else None):
+                    if path is not None:
+                        try:
+                            os.utime(path)
+                        except OSError:
+                            pass
+        self._heartbeat = threading.Thread(target=beat, name=f"lock-{self.name}", daemon=True)
+        self._heartbeat.start()
+
+    @staticmethod
+    def _unlink(path: Path):
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+class LockCoordinator:
+    """Waits for locks on shared datasets with backoff, queueing and a time limit.
+
+    on_wait, when given, is called before every wait, e.g. to stop waiting
+    by raising once a run is cancelled.
+    """
+
+    def __init__(self, max_wait: float = DEFAULT_OPTIONS['max_wait'],
+                 backoff: Optional[Backoff] = None,
+                 stale_after: float = DEFAULT_OPTIONS['stale_after'],
+                 sleep: Callable[[float], None] = time.sleep):
+        self.max_wait = max_wait
+        self.backoff = backoff or Backoff()
+        self.stale_after = stale_after
+        self.sleep = sleep
+
+    @classmethod
+    def from_config(cls, config: Dict) -> "LockCoordinator":
+        options = dict(DEFAULT_OPTIONS, **(config.get('locks') or {}))
+        return cls(options['max_wait'], Backoff(options['backoff_base'], options['backoff_cap']),
+                   options['stale_after'])
+
+    def _wait(self, attempt: int, deadline: float, what: str, on_wait: Optional[Callable],
+              cap: Optional[float] = None):
+        delay = self.backoff.delay(attempt)
+        if cap is not None:
+            delay = min(delay, cap)
+        if time.monotonic() + delay > deadline:
+            raise LockTimeout(f"Gave up waiting for {what} after {self.max_wait:.0f}s")
+        if on_wait is not None:
+            on_wait()
+        self.sleep(delay)
+
+    def retry(self, fn: Callable, *args, description: str = "", on_wait: Optional[Callable] = None,
+              **kwargs):
+        """Call fn, retrying with backoff while it fails because of a lock."""
+        deadline = time.monotonic() + self.max_wait
+        description = description or getattr(fn, '__name__', 'operation')
+        for attempt in itertools.count():
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                if not is_lock_error(e):
+                    raise
+                logger.info(f"{description} hit a lock, retrying (attempt {attempt + 1}): {e}")
+                try:
+                    self._wait(attempt, deadline, f"{description} to get past a lock", on_wait)
+                except LockTimeout as timeout:
+                    raise timeout from e
+
+    def wait_for(self, test: Callable[[], bool], what: str, on_wait: Optional[Callable] = None):
+        """Wait with backoff until test() is true, e.g. until a schema lock is available."""
+        deadline = time.monotonic() + self.max_wait
+        for attempt in itertools.count():
+            if test():
+                return
+            if attempt == 0:
+                logger.info(f"Waiting for {what}")
+            self._wait(attempt, deadline, what, on_wait)
+
+    @contextmanager
+    def exclusive(self, workspace: Union[str, Path], name: str,
+                  on_wait: Optional[Callable] = None):
+        """Hold the advisory lock on name in workspace, queueing behind earlier runs.
+
+        Memory workspaces belong to one process and need no lock.
+        """
+        if is_memory(workspace):
+            yield
+            return
+
+        workspace = Path(workspace)
+        lock = AdvisoryLock(workspace.parent / f"{workspace.name}.locks", name, self.stale_after)
+        deadline = time.monotonic() + self.max_wait
+        lock.take_ticket()
+        try:
+            for attempt in itertools.count():
+                ahead = lock.position()
+                if ahead == 0 and lock.try_acquire():
+                    break
+                if attempt == 0:
+                    holder = lock.holder()
+                    logger.info(f"Waiting for {name} in {workspace.name} "
+                                f"(held by {holder.get('user', '?')}@{holder.get('host', '?')}, "
+                                f"{ahead} waiting ahead)")
+                self._wait(attempt, deadline, f"the {name} lock", on_wait,
+                           cap=HEAD_POLL if ahead == 0 else None)
+            yield
+        finally:
+            lock.release()
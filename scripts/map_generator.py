@@ -1,85 +1,385 @@
-import arcpy
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 from scripts.helpers.logging_utils import get_logger
 from scripts.file_handler import FileHandler
+from scripts.document_cache import DEFAULT_CACHE_SIZE
+from scripts.build_manifest import BuildManifest, export_fingerprint
+from scripts.checkpoint import StageCheckpoint, VEGETATION, export_stage
+from scripts.helpers.fingerprint import compute_fingerprint, dataset_fingerprint
+from scripts.circuit_index import CircuitIndex, UNIVERSE
+from scripts.selection import SelectionBuilder
+from scripts.source_mirror import SourceMirror
+from scripts.backends import get_backend
+from config.fixed_paths import CIRCUIT_INDEX_PATH
 from scripts.vegetation_processor import VegetationProcessor
+from scripts.intermediate import IntermediateStore
+from scripts.lock_coordinator import LockCoordinator
+import os
+import time
 import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from scripts.export_worker import _init_worker as _init_export_worker, export_document
+from scripts.helpers.progress_tracker import ProgressTracker
+from scripts.run_history import get_history, track_stage_durations
+from scripts.helpers.tracing import span
 from scripts.helpers.config_utils import load_config, ConfigurationError, validate_substation
 
 logger = get_logger(__name__)
 
+class GenerationCancelled(Exception):
+    """Raised at a stage boundary once cancellation has been requested."""
+    pass
+
 class MapGenerator:
     """Handles the complete map generation pipeline."""
     
-    def __init__(self, workspace: Path):
-        """Initialize the map generator with workspace path."""
+    def __init__(self, workspace: Path, scratch_workspace: Optional[Path] = None, ledger=None,
+                 cancel_event=None, progress=None):
+        """Initialize the map generator with workspace path.
+        
+        Intermediate datasets (XFMR_MCD, PriCond_MCD, the summary tables)
+        are written to the options.intermediate tier (see scripts.intermediate),
+        using scratch_workspace when given so concurrent runs don't collide.
+        Each map export is recorded in ledger (a RunLedger) when given.
+        Once cancel_event (a threading.Event) is set, the run stops with
+        GenerationCancelled at the next stage boundary. progress, if given,
+        receives the updates otherwise logged by a ProgressTracker.
+        """
         try:
             self.workspace = workspace
+            self.ledger = ledger
+            self.cancel_event = cancel_event
+            self.progress = progress
+            # Export records of the last generate_maps call
+            self.last_exports: List[Dict] = []
+            # Selection key tables written for the substation in progress
+            self._key_tables: List[str] = []
             self.config = load_config()
-            self.file_handler = FileHandler()
-            self.veg_processor = VegetationProcessor(workspace)
-            arcpy.env.workspace = str(workspace)
-            arcpy.env.overwriteOutput = True
+            self.backend = get_backend()
+            self.intermediate = IntermediateStore.from_config(self.config, workspace, scratch_workspace)
+            self.scratch_workspace = self.intermediate.intersection_workspace
+            self.locks = LockCoordinator.from_config(self.config)
+            self.file_handler = FileHandler(
+                cache_size=self.config['options'].get('document_cache_size', DEFAULT_CACHE_SIZE)
+            )
+            self.mirror = SourceMirror.from_config(self.config)
+            self.veg_processor = VegetationProcessor(workspace, intermediate=self.intermediate)
+            self.circuit_index = CircuitIndex(
+                self.config['paths'].get('circuit_index', CIRCUIT_INDEX_PATH)
+            )
+            self.backend.env.workspace = str(workspace)
+            self.backend.env.overwriteOutput = True
+            # Stage durations feed batch scheduling and progress estimates
+            track_stage_durations()
             logger.info(f"Initialized MapGenerator with workspace: {self.workspace}")
             
         except Exception as e:
             logger.error(f"Failed to initialize MapGenerator: {e}")
             raise
     
-    def generate_maps(self, source_sub: str, year: str) -> bool:
-        """Generate all maps for a given substation with detailed logging."""
+    def generate_maps(self, source_sub: str, year: str, export_workers: Optional[int] = None,
+                      force: bool = False, resume: bool = False) -> bool:
+        """Generate all maps for a given substation with detailed logging.
+        
+        Maps whose template, export options and source data are unchanged
+        since the last successful export are skipped unless force is set.
+        With export_workers > 1 the map exports run concurrently in separate
+        processes. Export failures are collected and reported together.
+        Each completed stage is checkpointed (see scripts.checkpoint); with
+        resume, stages an earlier run of the substation and year completed
+        are skipped once their outputs are validated.
+        """
+        with span("generate_maps", substation=source_sub, year=year, resume=resume) as run_span:
+            success = self._generate_maps(source_sub, year, export_workers, force, resume)
+            run_span.set(success=success,
+                         exported=sum(1 for r in self.last_exports if r['status'] == 'Success'))
+            return success
+    
+    def _generate_maps(self, source_sub: str, year: str, export_workers: Optional[int],
+                       force: bool, resume: bool) -> bool:
+        """Body of generate_maps, traced as one generate_maps span."""
         logger.info(f"Starting map generation for {source_sub} (year: {year})")
-        progress = ProgressTracker(total_steps=100, operation_name="Map Generation")
+        progress = self.progress or ProgressTracker(total_steps=100, operation_name="Map Generation")
+        progress.expect(get_history().expected(source_sub.upper(), 'generate_maps'))
+        
+        if export_workers is None:
+            export_workers = self.config['options'].get('export_workers', 1)
+        self.last_exports = []
         
         try:
-            # Process vegetation data (30%)
-            progress.update(10, "Building SQL expression...")
-            expression = self._build_expression(source_sub)
-            logger.debug(f"SQL Expression: {expression}")
+            map_types = ['Internal', 'External', 'InternalOverview', 'ExternalOverview']
+            output_dir = self._get_output_dir(source_sub, year)
+            manifest = BuildManifest.for_directory(output_dir)
+            checkpoint = StageCheckpoint.for_directory(output_dir)
+            sources = self._source_fingerprints()
+            fingerprints = self._export_fingerprints(map_types, year, sources)
+            vegetation_fingerprint = compute_fingerprint(source_sub, sources)
             
-            progress.update(20, "Processing vegetation data...")
-            if not self.veg_processor.process_vegetation_data(source_sub, expression):
-                logger.error("Vegetation data processing failed")
-                return False
+            def exported(map_type: str):
+                output_path = self._get_output_path(source_sub, map_type, year)
+                manifest.record(output_path, fingerprints[map_type])
+                checkpoint.complete(export_stage(map_type), fingerprints[map_type], [str(output_path)])
             
-            # Process maps (70%)
-            map_types = ['Internal', 'External', 'InternalOverview', 'ExternalOverview']
-            maps_per_type = 70 / len(map_types)
+            vegetation_done = resume and checkpoint.is_complete(
+                VEGETATION, vegetation_fingerprint, self.backend.exists)
+            if vegetation_done:
+                # Maps are only valid on top of the summary tables they were made from
+                done = [m for m in map_types if checkpoint.is_complete(
+                    export_stage(m), fingerprints[m], self.backend.exists)]
+                logger.info(f"Resuming {source_sub} ({year}) after: "
+                            f"{', '.join([VEGETATION] + [export_stage(m) for m in done])}")
+                for map_type in done:
+                    self._record_export(self._export_record(source_sub, map_type, year, 'Skipped'))
+                map_types = [m for m in map_types if m not in done]
+            else:
+                if resume:
+                    logger.info(f"Nothing to resume for {source_sub} ({year}), starting over")
+                checkpoint.reset()
             
-            for i, map_type in enumerate(map_types):
-                current_progress = 30 + (i * maps_per_type)
-                progress.update(current_progress, f"Processing {map_type} map...")
+            if not force:
+                current = [m for m in map_types if manifest.is_current(
+                    self._get_output_path(source_sub, m, year), fingerprints[m])]
+                if current:
+                    logger.info(f"Skipping unchanged maps: {', '.join(current)}")
+                for map_type in current:
+                    self._record_export(self._export_record(source_sub, map_type, year, 'Skipped'))
+                map_types = [m for m in map_types if m not in current]
+            if not map_types:
+                progress.complete(f"All maps for {source_sub} are up to date")
+                return True
+            
+            # Process vegetation data (30%)
+            if not vegetation_done:
+                self.check_cancelled("building the SQL expression")
+                progress.update(10, "Building SQL expression...")
+                with span("build_expression", substation=source_sub) as expression_span:
+                    expression = self._build_expression(source_sub)
+                    expression_span.set(expression_length=len(expression))
+                logger.debug(f"SQL Expression: {expression}")
                 
-                if not self._process_map(source_sub, map_type, year):
-                    logger.error(f"Failed to process {map_type} map")
+                self.check_cancelled("processing vegetation data")
+                progress.update(20, "Processing vegetation data...")
+                try:
+                    with span("vegetation", substation=source_sub):
+                        veg_ok = self.veg_processor.process_vegetation_data(source_sub, expression)
+                finally:
+                    self._drop_key_tables()
+                if not veg_ok:
+                    logger.error("Vegetation data processing failed")
                     return False
-                    
-                progress.update(current_progress + maps_per_type - 1, 
-                              f"Completed {map_type} map")
+                # The summary tables are final: promote them before the maps read them
+                self.locks.retry(self.intermediate.flush, description="Promoting the summary tables",
+                                 on_wait=lambda: self.check_cancelled("promoting the summary tables"))
+                checkpoint.complete(VEGETATION, vegetation_fingerprint,
+                                    self.veg_processor.summary_tables(source_sub))
+            
+            # Process maps (70%)
+            if export_workers > 1:
+                failures = self._export_maps_concurrently(source_sub, map_types, year, 
+                                                          export_workers, progress, exported)
+            else:
+                failures = self._export_maps(source_sub, map_types, year, progress, exported)
+            
+            if failures:
+                logger.error(f"{len(failures)} of {len(map_types)} map exports failed for {source_sub}:")
+                for map_type, error in failures.items():
+                    logger.error(f"  {map_type}: {error}")
+                return False
             
             progress.complete(f"Map generation completed successfully for {source_sub}")
             return True
             
+        except GenerationCancelled as e:
+            logger.info(f"Map generation for {source_sub}: {e}")
+            raise
         except Exception as e:
             logger.error(f"Error in map generation pipeline: {e}")
             logger.error(traceback.format_exc())
             return False
     
+    def _export_maps(self, source_sub: str, map_types: List[str], year: str, 
+                     progress, exported: Callable[[str], None]) -> Dict[str, str]:
+        """Export each map type in turn, returning failures by map type.
+        
+        exported is called with each map type as soon as its export succeeds.
+        """
+        failures = {}
+        maps_per_type = 70 / len(map_types)
+        
+        for i, map_type in enumerate(map_types):
+            current_progress = 30 + (i * maps_per_type)
+            self.check_cancelled(f"exporting the {map_type} map")
+            progress.update(current_progress, f"Processing {map_type} map...")
+            
+            start = time.time()
+            success = self._process_map(source_sub, map_type, year)
+            self._record_export(self._export_record(
+                source_sub, map_type, year, 'Success' if success else 'Failed',
+                time.time() - start, None if success else "Export failed"
+            ))
+            if not success:
+                failures[map_type] = "Export failed"
+                continue
+            exported(map_type)
+                
+            progress.update(current_progress + maps_per_type - 1, 
+                          f"Completed {map_type} map")
+        return failures
+    
+    def _export_maps_concurrently(self, source_sub: str, map_types: List[str], year: str,
+                                  max_workers: int, progress,
+                                  exported: Callable[[str], None]) -> Dict[str, str]:
+        """Export map types in a process pool, returning failures by map type."""
+        resolution = self.config['options'].get('resolution', 300)
+        failures = {}
+        maps_per_type = 70 / len(map_types)
+        
+        progress.update(30, f"Exporting {len(map_types)} maps with {max_workers} workers...")
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(map_types)),
+                                 initializer=_init_export_worker, initargs=(self.config,)) as pool:
+            futures = {
+                pool.submit(
+                    export_document,
+                    str(self._get_template_path(map_type, year)),
+                    str(self._get_output_path(source_sub, map_type, year)),
+                    resolution,
+                    {'substation': source_sub, 'map_type': map_type}
+                ): map_type
+                for map_type in map_types
+            }
+            
+            for done, future in enumerate(as_completed(futures), start=1):
+                map_type = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # Worker process died before returning a record
+                    result = self._export_record(source_sub, map_type, year, 'Failed', error=str(e))
+                    result['worker'] = None
+                if result['status'] != 'Success':
+                    failures[map_type] = result['error']
+                else:
+                    exported(map_type)
+                self._record_export(result)
+                progress.update(30 + done * maps_per_type, f"Finished {map_type} map")
+                
+                if self.cancel_event is not None and self.cancel_event.is_set():
+                    # Exports already running are left to finish
+                    for pending in futures:
+                        pending.cancel()
+                    self.check_cancelled("the remaining map exports")
+        
+        return failures
+    
+    def check_cancelled(self, stage: str):
+        """Raise GenerationCancelled if cancellation was requested before stage."""
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise GenerationCancelled(f"Cancelled before {stage}")
+    
+    def _export_record(self, source_sub: str, map_type: str, year: str, status: str,
+                       duration: float = 0.0, error: Optional[str] = None) -> Dict:
+        """Result record in the format returned by export_document."""
+        return {
+            'input': str(self._get_template_path(map_type, year)),
+            'output': str(self._get_output_path(source_sub, map_type, year)),
+            'status': status,
+            'duration': round(duration, 2),
+            'worker': os.getpid(),
+            'error': error
+        }
+    
+    def _record_export(self, record: Dict):
+        """Keep an export record and append it to the ledger, if any."""
+        self.last_exports.append(record)
+        if self.ledger is not None:
+            self.ledger.record_result(record)
+    
+    def _source_fingerprints(self) -> List[Dict]:
+        """Fingerprint the source datasets, shared by every stage of a run."""
+        return [dataset_fingerprint(path) 
+                for _, path in sorted(self.config['paths']['source_data'].items())
+                if isinstance(path, str)]
+    
+    def _export_fingerprints(self, map_types: List[str], year: str,
+                             sources: List[Dict]) -> Dict[str, str]:
+        """Fingerprint the inputs of each map export for the build manifest."""
+        resolution = self.config['options'].get('resolution', 300)
+        return {
+            map_type: export_fingerprint(self._get_template_path(map_type, year), resolution,
+                                         {'format': 'PDF'}, sources)
+            for map_type in map_types
+        }
+    
     def _build_expression(self, source_sub: str) -> str:
         """Build SQL expression for feature selection."""
-        circuits = self._get_circuits(source_sub)
-        return f"ORIENTATION <> 'UNDERGROUND CABLE' and CIRCUIT1 in ({','.join(repr(c) for c in circuits)})"
+        circuits = self.get_circuits(source_sub)
+        # The memory workspace can't run the key table subquery
+        key_table_writer = None if self.intermediate.in_memory else \
+            (lambda keys: self._write_key_table(source_sub, keys))
+        builder = SelectionBuilder.from_config(self.config, key_table_writer=key_table_writer)
+        # The circuit universe is only needed to collapse large selections into ranges
+        universe = self._get_circuit_universe() if len(circuits) > builder.in_list_limit else None
+        selection = builder.build(circuits, universe)
+        return f"ORIENTATION <> 'UNDERGROUND CABLE' and {selection}"
+    
+    def _get_circuit_universe(self) -> List[str]:
+        """Every circuit in PriCond_MCD, cached in the circuit index."""
+        table = f"{self.scratch_workspace}\\PriCond_MCD"
+        # PriCond_MCD only changes when the intersections are rebuilt
+        fingerprint = compute_fingerprint(
+            self.file_handler.intersection_fingerprint(str(self.scratch_workspace)))
+        
+        if not self.circuit_index.is_current(UNIVERSE, fingerprint):
+            with self.backend.search_cursor(table, ["CIRCUIT1"]) as cursor:
+                self.circuit_index.set_universe({row[0] for row in cursor}, fingerprint)
+        
+        return self.circuit_index.universe()
+    
+    def _write_key_table(self, source_sub: str, keys: List[str]) -> str:
+        """Write selection keys to a table next to the data for a subquery join."""
+        name = f"SEL_{source_sub}_Keys"
+        table = f"{self.scratch_workspace}\\{name}"
+        
+        if self.backend.exists(table):
+            self.backend.delete(table)
+        self.backend.create_table(str(self.scratch_workspace), name)
+        self.backend.add_field(table, "CIRCUIT1", "TEXT", field_length=50)
+        
+        with self.backend.insert_cursor(table, ["CIRCUIT1"]) as cursor:
+            for key in keys:
+                cursor.insertRow((key,))
+        
+        logger.info(f"Wrote {len(keys)} selection keys to {table}")
+        self._key_tables.append(table)
+        return name
+    
+    def _drop_key_tables(self):
+        """Delete the selection key tables once vegetation processing has used them."""
+        for table in self._key_tables:
+            try:
+                if self.backend.exists(table):
+                    self.backend.delete(table)
+            except self.backend.ExecuteError as e:
+                logger.warning(f"Could not delete selection key table {table}: {e}")
+        self._key_tables = []
     
-    def _get_circuits(self, source_sub: str) -> List[str]:
-        """Get list of circuits for a substation."""
-        circuits = []
+    def get_circuits(self, source_sub: str) -> List[str]:
+        """Get list of circuits for a substation from the circuit index.
+        
+        The substation's circuit table (PriCond_MCD_{sub}_Sum, as written by
+        FileHandler.process_veg; not the PriCond_{sub}_MCD_Sum summary built
+        from the selection) is only scanned when its rows or schema changed
+        since the substation was last indexed.
+        """
         table = f"{self.workspace}/PriCond_MCD_{source_sub}_Sum"
-        with arcpy.da.SearchCursor(table, ["CIRCUIT1"]) as cursor:
-            for row in cursor:
-                if row[0] not in circuits:
-                    circuits.append(row[0])
-        return circuits
+        # Not path_fingerprint: the working gdb changes with every run's summaries
+        fingerprint = compute_fingerprint(dataset_fingerprint(table))
+        
+        if not self.circuit_index.is_current(source_sub, fingerprint):
+            with self.backend.search_cursor(table, ["CIRCUIT1", "MCD_CODE"]) as cursor:
+                self.circuit_index.update_substation(source_sub, cursor, fingerprint)
+        
+        return self.circuit_index.circuits(source_sub)
     
     def _process_map(self, source_sub: str, map_type: str, year: str) -> bool:
         """Process a single map type."""
@@ -91,49 +391,81 @@ class MapGenerator:
             return self.file_handler.process_file(
                 template_path,
                 output_path,
-                resolution=300
+                resolution=self.config['options'].get('resolution', 300),
+                trace_attrs={'substation': source_sub, 'map_type': map_type}
             )
             
         except Exception as e:
             logger.error(f"Error processing {map_type} map: {e}")
             return False
     
+    def open_templates(self, year: str):
+        """Open the year's map templates ahead of the first export."""
+        if self.file_handler.document_cache is None:
+            return
+        for map_type in self.config['options'].get('map_types', []):
+            template_path = self._get_template_path(map_type, year)
+            if template_path.exists():
+                self.file_handler.document_cache.get(template_path)
+
     def _get_template_path(self, map_type: str, year: str) -> Path:
-        """Get the template path for a map type."""
+        """Get the template path for a map type (the local mirror copy if enabled)."""
         template_dir = self.workspace.parent / "MXD" / year
-        return template_dir / f"Template{map_type}_{year}_11x17.mxd"
+        template_path = template_dir / f"Template{map_type}_{year}_11x17.mxd"
+        if self.mirror:
+            return self.mirror.resolve_template(template_path)
+        return template_path
     
-    def _get_output_path(self, source_sub: str, map_type: str, year: str) -> Path:
-        """Get the output path for a map."""
+    def _get_output_dir(self, source_sub: str, year: str) -> Path:
+        """Get (and create) the export directory for a substation."""
         output_dir = self.workspace.parent / "MXD" / year / "Export" / source_sub
         output_dir.mkdir(parents=True, exist_ok=True)
-        return output_dir / f"{source_sub}_{map_type}_{year}_11x17.pdf"
+        return output_dir
+    
+    def _get_output_path(self, source_sub: str, map_type: str, year: str) -> Path:
+        """Get the output path for a map."""
+        return self._get_output_dir(source_sub, year) / f"{source_sub}_{map_type}_{year}_11x17.pdf"
 
-    def process_intersections(self) -> bool:
-        """Process intersections for the workspace."""
+    def process_intersections(self, force: bool = False) -> bool:
+        """Process intersections for the workspace, reusing cached results unless forced."""
+        with span("process_intersections", force=force) as intersections_span:
+            success = self._process_intersections(force)
+            intersections_span.set(success=success)
+            return success
+    
+    def _process_intersections(self, force: bool) -> bool:
         try:
-            config = self.config['paths']['source_data']
+            self.check_cancelled("intersecting source data")
+            keep_waiting = lambda: self.check_cancelled("intersecting source data")
             
-            # Check if files are locked
-            if arcpy.TestSchemaLock(config['xfmr']):
-                logger.warning(f"Source file is locked: {config['xfmr']}")
-                return False
-            
-            # Process with retry logic for concurrent access
-            max_retries = 3
-            for attempt in range(max_retries):
-                try:
-                    return self.file_handler.process_intersections(
-                        config['xfmr'],
-                        config['pricond'],
-                        str(self.workspace)
-                    )
-                except arcpy.ExecuteError as e:
-                    if "ERROR 000464" in str(e):  # Cannot acquire lock
-                        if attempt < max_retries - 1:
-                            logger.info("File locked, retrying...")
-                            continue
-                    raise
+            if self.mirror:
+                # Refreshed by the entry points (refresh_mirror), never mid-read
+                with self.mirror.lock(on_wait=keep_waiting):
+                    return self._intersect(self.mirror.resolve('xfmr'), self.mirror.resolve('pricond'),
+                                           force, keep_waiting)
+            config = self.config['paths']['source_data']
+            return self._intersect(config['xfmr'], config['pricond'], force, keep_waiting)
+        except GenerationCancelled:
+            raise
         except Exception as e:
             logger.error(f"Failed to process intersections: {e}")
             return False
+    
+    def _intersect(self, in_xfmr: str, in_pricond: str, force: bool, keep_waiting: Callable) -> bool:
+        # TestSchemaLock is True when the lock *can* be acquired; wait
+        # (with backoff) while someone else has the source locked
+        self.locks.wait_for(lambda: self.backend.test_schema_lock(in_xfmr),
+                            f"a schema lock on {in_xfmr}", on_wait=keep_waiting)
+        
+        # One run at a time rebuilds the intersections; the others queue
+        # and then find them current
+        with self.locks.exclusive(self.scratch_workspace, "intersections", on_wait=keep_waiting):
+            return self.locks.retry(
+                self.file_handler.process_intersections,
+                in_xfmr,
+                in_pricond,
+                str(self.scratch_workspace),
+                force=force,
+                description="Processing intersections",
+                on_wait=keep_waiting
+            )
@@ -1,7 +1,7 @@
-import arcpy
 from pathlib import Path
 from typing import Optional
 from scripts.helpers.logging_utils import get_logger
+from scripts.backends import get_backend
 
 logger = get_logger(__name__)
 
@@ -12,13 +12,15 @@ class APRXProcessor:
         self.aprx_path = Path(aprx_path)
         self.aprx = None
         self.layout = None
+        self.backend = None
     
     def open_file(self):
         """Opens the APRX file."""
         try:
-            self.aprx = arcpy.mp.ArcGISProject(str(self.aprx_path))
+            self.backend = get_backend()
+            self.aprx = self.backend.open_document(self.aprx_path)
             # Get the first layout (usually the one we want)
-            self.layout = self.aprx.listLayouts()[0]
+            self.layout = self.backend.list_layouts(self.aprx)[0]
             logger.info(f"Opened APRX file: {self.aprx_path}")
         except Exception as e:
             logger.error(f"Failed to open APRX file: {e}")
@@ -30,7 +32,7 @@ class APRXProcessor:
             if not self.layout:
                 raise ValueError("No layout found in APRX file")
                 
-            self.layout.exportToPDF(str(output_path), resolution=resolution)
+            self.backend.export_pdf(self.layout, output_path, resolution=resolution)
             logger.info(f"Exported PDF to: {output_path}")
             return output_path
         except Exception as e:
@@ -40,4 +42,6 @@ class APRXProcessor:
     def close(self):
         """Closes the APRX file."""
         if self.aprx:
-            del self.aprx
+            self.layout = None
+            # Drop the reference so the backend releases the document
+            self.aprx = None
@@ -1,8 +1,7 @@
-import arcpy
 from pathlib import Path
 from typing import Optional
 from scripts.helpers.logging_utils import get_logger
-from scripts.helpers.arcpy_helpers import setup_arcpy_env
+from scripts.backends import get_backend
 
 logger = get_logger(__name__)
 
@@ -12,20 +11,25 @@ class MXDProcessor:
     def __init__(self, mxd_path: Path):
         self.mxd_path = mxd_path
         self.mxd = None
+        self.backend = None
     
-    def open_mxd(self):
+    def open_file(self):
         """Opens the MXD file."""
         try:
-            self.mxd = arcpy.mapping.MapDocument(str(self.mxd_path))
+            self.backend = get_backend()
+            self.mxd = self.backend.open_document(self.mxd_path)
             logger.info(f"Opened MXD file: {self.mxd_path}")
         except Exception as e:
             logger.error(f"Failed to open MXD file: {e}")
             raise
     
+    # Kept for callers written against the original name
+    open_mxd = open_file
+    
     def export_to_pdf(self, output_path: Path, resolution: int = 300) -> Optional[Path]:
         """Exports the MXD to PDF format."""
         try:
-            arcpy.mapping.ExportToPDF(self.mxd, str(output_path), resolution=resolution)
+            self.backend.export_pdf(self.mxd, output_path, resolution=resolution)
             logger.info(f"Exported PDF to: {output_path}")
             return output_path
         except Exception as e:
@@ -35,4 +39,5 @@ class MXDProcessor:
     def close(self):
         """Closes the MXD file."""
         if self.mxd:
-            del self.mxd
+            # Drop the reference so the backend releases the document
+            self.mxd = None
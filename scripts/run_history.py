@@ -0,0 +1,129 @@
+import time
+import sqlite3
+import statistics
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+from scripts.helpers.logging_utils import get_logger
+from config.fixed_paths import HISTORY_PATH
+
+logger = get_logger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS durations (
+    job TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    duration REAL NOT NULL,
+    recorded_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS durations_job_stage ON durations (job, stage, recorded_at);
+"""
+
+# Spans whose durations are kept, per substation (see record_span)
+RECORDED_SPANS = ('generate_maps', 'build_expression', 'vegetation', 'pdf_export')
+
+# Runs used for an expected duration, and runs kept per job and stage
+SAMPLES = 5
+KEEP = 20
+
+class RunHistory:
+    """Durations of past jobs and their stages, stored in SQLite.
+    
+    A job is a substation (stages are span names such as 'generate_maps'
+    or 'pdf_export/Internal') or an exported document (stage 'export').
+    The expected duration is the median of the last few successful runs,
+    so one slow outlier doesn't reorder a schedule.
+    """
+    
+    def __init__(self, db_path: Union[str, Path] = HISTORY_PATH):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # Spans may finish on any thread (e.g. the GUI's job runner)
+        self.conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def from_config(cls, config: Dict) -> "RunHistory":
+        """History at paths.history, or the default location."""
+        return cls(config['paths'].get('history') or HISTORY_PATH)
+    
+    def record(self, job: str, stage: str, duration: float):
+        """Add one successful run of a job's stage, dropping the oldest beyond KEEP."""
+        with self._lock, self.conn:
+            self.conn.execute("INSERT INTO durations VALUES (?, ?, ?, ?)",
+                              (job, stage, duration, time.time()))
+            self.conn.execute(
+                "DELETE FROM durations WHERE job = ? AND stage = ? AND rowid NOT IN "
+                "(SELECT rowid FROM durations WHERE job = ? AND stage = ? "
+                "ORDER BY recorded_at DESC LIMIT ?)",
+                (job, stage, job, stage, KEEP)
+            )
+    
+    def expected(self, job: str, stage: str) -> Optional[float]:
+        """Median duration of the last SAMPLES runs, or None without history."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT duration FROM durations WHERE job = ? AND stage = ? "
+                "ORDER BY recorded_at DESC LIMIT ?", (job, stage, SAMPLES)
+            ).fetchall()
+        return statistics.median(r[0] for r in rows) if rows else None
+    
+    def expected_all(self, jobs: Iterable[str], stage: str) -> Dict[str, float]:
+        """Expected durations of the jobs that have history."""
+        expected = {}
+        for job in jobs:
+            duration = self.expected(job, stage)
+            if duration is not None:
+                expected[job] = duration
+        return expected
+    
+    def record_span(self, span):
+        """Tracer listener keeping the durations of substation stages."""
+        substation = span.attrs.get('substation')
+        if span.status != 'ok' or not substation or span.name not in RECORDED_SPANS:
+            return
+        if span.name == 'generate_maps' and not (span.attrs.get('success') and span.attrs.get('exported')):
+            # Failed runs and reruns with every map up to date would drag the
+            # median towards zero
+            return
+        stage = span.name
+        if span.attrs.get('map_type'):
+            stage = f"{stage}/{span.attrs['map_type']}"
+        self.record(str(substation).upper(), stage, span.duration)
+    
+    def close(self):
+        self.conn.close()
+
+def longest_first(jobs: Iterable[str], expected: Dict[str, float]) -> List[str]:
+    """Order jobs so the longest expected start first.
+    
+    Jobs without history are assumed to take the median of those with it.
+    With no history at all the order is left unchanged.
+    """
+    jobs = list(jobs)
+    if not expected:
+        return jobs
+    default = statistics.median(expected.values())
+    # sorted() is stable, so ties keep their given order
+    return sorted(jobs, key=lambda job: expected.get(job, default), reverse=True)
+
+# History for this process, opened on first use
+_history: Optional[RunHistory] = None
+_listening = False
+
+def get_history() -> RunHistory:
+    """The process-wide history store, at the location configured in settings."""
+    global _history
+    if _history is None:
+        from scripts.helpers.config_utils import load_config
+        _history = RunHistory.from_config(load_config())
+    return _history
+
+def track_stage_durations():
+    """Record substation stage durations from this process's trace spans."""
+    global _listening
+    if not _listening:
+        from scripts.helpers.tracing import get_tracer
+        get_tracer().add_listener(get_history().record_span)
+        _listening = True
@@ -0,0 +1,191 @@
+import os
+import csv
+import statistics
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+from scripts.helpers.logging_utils import get_logger
+from config.fixed_paths import LEDGER_PATH
+
+logger = get_logger(__name__)
+
+LEDGER_FIELDS = ['run_id', 'timestamp', 'input', 'output', 'status', 'duration',
+                 'output_bytes', 'worker_id', 'error']
+
+def new_run_id() -> str:
+    return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}"
+
+class RunLedger:
+    """Append-only CSV record of every processed file, shared by all runs.
+
+    Each record is written and flushed as soon as its file is done, so a
+    crash loses at most the file in progress and memory use does not grow
+    with the run. Records of different runs are told apart by run_id.
+    """
+
+    def __init__(self, path: Union[str, Path] = LEDGER_PATH, run_id: Optional[str] = None):
+        self.path = Path(path)
+        self.run_id = run_id or new_run_id()
+        self.count = 0
+        self._file = None
+        self._writer = None
+
+    @classmethod
+    def from_config(cls, config: Dict, run_id: Optional[str] = None) -> "RunLedger":
+        """Ledger at paths.ledger, or the default location."""
+        return cls(config['paths'].get('ledger') or LEDGER_PATH, run_id)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        new_file = not self.path.exists() or self.path.stat().st_size == 0
+        self._file = open(self.path, 'a', newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(self._file, fieldnames=LEDGER_FIELDS)
+        if new_file:
+            self._writer.writeheader()
+
+    def record(self, input_path: Union[str, Path], output_path: Union[str, Path, None],
+               status: str, duration: float, output_bytes: Optional[int] = None,
+               worker_id: Optional[int] = None, error: Optional[str] = None) -> Dict:
+        """Append one record; output_bytes is read from disk when not given."""
+        if output_bytes is None and output_path and status == 'Success':
+            try:
+                output_bytes = Path(output_path).stat().st_size
+            except OSError:
+                pass
+
+        row = {
+            'run_id': self.run_id,
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'input': str(input_path),
+            'output': str(output_path) if output_path else '',
+            'status': status,
+            'duration': round(duration, 3),
+            'output_bytes': output_bytes if output_bytes is not None else '',
+            'worker_id': worker_id if worker_id is not None else os.getpid(),
+            'error': error or ''
+        }
+        if self._file is None:
+            self._open()
+        self._writer.writerow(row)
+        self._file.flush()
+        self.count += 1
+        return row
+
+    def record_result(self, result: Dict) -> Dict:
+        """Append an export_document style result record."""
+        return self.record(result['input'], result['output'], result['status'],
+                           result['duration'], result.get('output_bytes'),
+                           result.get('worker'), result.get('error'))
+
+    def close(self, compact: bool = False):
+        """Close the file; with compact, also rewrite the ledger as Parquet."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._writer = None
+        if compact:
+            compact_ledger(self.path)
+
+def read_ledger(path: Union[str, Path] = LEDGER_PATH,
+                run_ids: Optional[Iterable[str]] = None) -> List[Dict]:
+    """Read ledger records (optionally only some runs) with numeric fields converted."""
+    path = Path(path)
+    if not path.exists():
+        return []
+    wanted = set(run_ids) if run_ids is not None else None
+
+    records = []
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            if wanted is not None and row['run_id'] not in wanted:
+                continue
+            try:
+                row['duration'] = float(row['duration'])
+            except (TypeError, ValueError):
+                # Torn final line after a crash
+                continue
+            row['output_bytes'] = int(row['output_bytes']) if row['output_bytes'] else None
+            records.append(row)
+    return records
+
+def compact_ledger(path: Union[str, Path] = LEDGER_PATH,
+                   output_path: Optional[Union[str, Path]] = None) -> Optional[Path]:
+    """Write the ledger as Parquet for columnar queries.
+
+    Needs pandas with pyarrow (or fastparquet); without them this logs a
+    warning and returns None, and the CSV remains the only copy.
+    """
+    path = Path(path)
+    output_path = Path(output_path) if output_path else path.with_suffix('.parquet')
+    try:
+        import pandas as pd  # imported on use; pandas is slow to load
+        df = pd.DataFrame(read_ledger(path), columns=LEDGER_FIELDS)
+        df['output_bytes'] = df['output_bytes'].astype('Int64')
+        df.to_parquet(output_path, index=False)
+    except ImportError as e:
+        logger.warning(f"Parquet output needs pandas and pyarrow: {e}")
+        return None
+    logger.info(f"Compacted {len(df)} ledger records to {output_path}")
+    return output_path
+
+def list_runs(records: Iterable[Dict]) -> List[str]:
+    """Run ids in the order they first appear in the ledger."""
+    return list(dict.fromkeys(r['run_id'] for r in records))
+
+def summarize_runs(records: Iterable[Dict]) -> List[Dict]:
+    """Per-run totals: files, failures, total and median duration, output bytes."""
+    runs: Dict[str, List[Dict]] = {}
+    for r in records:
+        runs.setdefault(r['run_id'], []).append(r)
+
+    summary = []
+    for run_id, rows in runs.items():
+        durations = [r['duration'] for r in rows if r['status'] == 'Success']
+        summary.append({
+            'run_id': run_id,
+            'files': len(rows),
+            'failed': sum(1 for r in rows if r['status'] == 'Failed'),
+            'skipped': sum(1 for r in rows if r['status'] == 'Skipped'),
+            'total_duration': round(sum(durations), 2),
+            'median_duration': round(statistics.median(durations), 2) if durations else None,
+            'output_bytes': sum(r['output_bytes'] or 0 for r in rows)
+        })
+    return summary
+
+def compare_runs(records: Iterable[Dict], baseline: str, candidate: str,
+                 threshold: float = 1.25, min_duration: float = 0.5) -> List[Dict]:
+    """Files that got slower from the baseline run to the candidate run.
+
+    Files are matched by output path (input path when there is no output),
+    since one template is exported for many substations. Only successful
+    exports present in both runs are compared. A file is a
+    slowdown when its duration grew by at least threshold times and it now
+    takes at least min_duration seconds. Worst slowdowns come first.
+    """
+    base: Dict[str, float] = {}
+    cand: Dict[str, float] = {}
+    for r in records:
+        if r['status'] != 'Success':
+            continue
+        key = r['output'] or r['input']
+        if r['run_id'] == baseline:
+            base[key] = r['duration']
+        elif r['run_id'] == candidate:
+            cand[key] = r['duration']
+
+    slowdowns = []
+    for key, duration in cand.items():
+        before = base.get(key)
+        if before is None or duration < min_duration:
+            continue
+        ratio = duration / before if before > 0 else float('inf')
+        if ratio >= threshold:
+            slowdowns.append({'file': key, 'baseline': before,
+                              'candidate': duration, 'ratio': round(ratio, 2)})
+    return sorted(slowdowns, key=lambda s: s['ratio'], reverse=True)
@@ -0,0 +1,139 @@
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from scripts.helpers.logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+# Defaults, overridable through options.selection in settings.yaml
+IN_LIST_LIMIT = 500
+CHUNK_SIZE = 500
+MAX_RANGES = 50
+JOIN_THRESHOLD = 5000
+
+def quote(value) -> str:
+    """Render a value as an SQL literal."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+def in_list(field: str, values: Sequence) -> str:
+    """Single IN list: field IN (v1,v2,...)."""
+    return f"{field} IN ({','.join(quote(v) for v in values)})"
+
+def chunked_in_list(field: str, values: Sequence, chunk_size: int = CHUNK_SIZE) -> str:
+    """Several bounded IN lists joined with OR."""
+    chunks = [values[i:i + chunk_size] for i in range(0, len(values), chunk_size)]
+    if len(chunks) == 1:
+        return in_list(field, chunks[0])
+    return "(" + " OR ".join(in_list(field, chunk) for chunk in chunks) + ")"
+
+def contiguous_runs(values: Iterable, universe: Iterable) -> List[Tuple]:
+    """Collapse values into (first, last) runs of consecutive universe members.
+
+    A run is only contiguous if no value outside the selection sorts between
+    its ends, which is why the full universe of keys is needed.
+    """
+    selected = set(values)
+    runs = []
+    start = end = None
+    for value in sorted(set(universe) | selected):
+        if value in selected:
+            if start is None:
+                start = value
+            end = value
+        elif start is not None:
+            runs.append((start, end))
+            start = None
+    if start is not None:
+        runs.append((start, end))
+    return runs
+
+def range_predicate(field: str, runs: Sequence[Tuple]) -> str:
+    """OR of equality / BETWEEN-style predicates, one per run."""
+    parts = []
+    for first, last in runs:
+        if first == last:
+            parts.append(f"{field} = {quote(first)}")
+        else:
+            parts.append(f"({field} >= {quote(first)} AND {field} <= {quote(last)})")
+    return "(" + " OR ".join(parts) + ")"
+
+def key_table_predicate(field: str, key_table: str, key_field: Optional[str] = None) -> str:
+    """Subquery against a key table in the same workspace as the data."""
+    return f"{field} IN (SELECT {key_field or field} FROM {key_table})"
+
+def _collation_safe(values: Iterable) -> bool:
+    """True if the database sorts these keys the same way Python does.
+
+    Integers always qualify. Strings qualify when they share one length and
+    contain no letters (e.g. '13-01'), so case-insensitive collations and
+    varying padding cannot reorder them.
+    """
+    values = list(values)
+    if all(isinstance(v, int) for v in values):
+        return True
+    if not all(isinstance(v, str) for v in values):
+        return False
+    return len({len(v) for v in values}) <= 1 and not any(c.isalpha() for v in values for c in v)
+
+class SelectionBuilder:
+    """Builds a where clause for a key selection, picking a strategy by size.
+
+    - in:      one IN list, for small selections
+    - range:   range predicates on sorted keys, when the selection collapses
+               into few contiguous runs of the key universe
+    - join:    subquery against a temporary key table, for very large
+               selections (needs key_table_writer)
+    - chunked: several bounded IN lists otherwise
+    """
+
+    def __init__(self, field: str = 'CIRCUIT1', in_list_limit: int = IN_LIST_LIMIT,
+                 chunk_size: int = CHUNK_SIZE, max_ranges: int = MAX_RANGES,
+                 join_threshold: int = JOIN_THRESHOLD,
+                 key_table_writer: Optional[Callable[[List], str]] = None):
+        self.field = field
+        self.in_list_limit = in_list_limit
+        self.chunk_size = chunk_size
+        self.max_ranges = max_ranges
+        self.join_threshold = join_threshold
+        self.key_table_writer = key_table_writer
+
+    @classmethod
+    def from_config(cls, config: Dict, **kwargs) -> "SelectionBuilder":
+        """Create a builder using options.selection overrides."""
+        options = dict(config.get('options', {}).get('selection') or {})
+        options.update(kwargs)
+        return cls(**options)
+
+    def choose_strategy(self, values: Sequence, universe: Optional[Sequence] = None) -> str:
+        """Pick the cheapest strategy for this selection."""
+        if len(values) <= self.in_list_limit:
+            return 'in'
+        if universe is not None and _collation_safe(universe) and _collation_safe(values):
+            if len(contiguous_runs(values, universe)) <= self.max_ranges:
+                return 'range'
+        if self.key_table_writer is not None and len(values) >= self.join_threshold:
+            return 'join'
+        return 'chunked'
+
+    def build(self, values: Iterable, universe: Optional[Iterable] = None,
+              strategy: Optional[str] = None) -> str:
+        """Build the predicate for values, optionally forcing a strategy."""
+        values = sorted(set(values))
+        universe = list(universe) if universe is not None else None
+        strategy = strategy or self.choose_strategy(values, universe)
+        logger.debug(f"Selecting {len(values)} keys on {self.field} using '{strategy}'")
+
+        if not values:
+            # Valid SQL that matches nothing
+            return "1 = 0"
+        if strategy == 'in':
+            return in_list(self.field, values)
+        if strategy == 'range':
+            return range_predicate(self.field, contiguous_runs(values, universe or values))
+        if strategy == 'join':
+            if self.key_table_writer is None:
+                raise ValueError("The join strategy needs a key_table_writer")
+            return key_table_predicate(self.field, self.key_table_writer(values))
+        if strategy == 'chunked':
+            return chunked_in_list(self.field, values, self.chunk_size)
+        raise ValueError(f"Unknown selection strategy: {strategy}")
@@ -0,0 +1,187 @@
+import os
+import time
+import shutil
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+from scripts.helpers.logging_utils import get_logger
+from scripts.helpers.fingerprint import (FingerprintStore, compute_fingerprint, dataset_fingerprint,
+                                        path_fingerprint)
+from scripts.backends import get_backend
+from scripts.lock_coordinator import LockCoordinator
+from config.fixed_paths import CACHE_DIR
+
+logger = get_logger(__name__)
+
+MIRROR_GDB = "mirror.gdb"
+
+def refresh_mirror(config: Dict) -> Optional["SourceMirror"]:
+    """Refresh the configured mirror, if enabled.
+
+    Called by the entry points at the start of a run, and by long-lived
+    workers between jobs; MapGenerator only resolve()s paths. The refresh
+    holds the mirror lock, which readers of the mirror datasets hold too.
+    """
+    mirror = SourceMirror.from_config(config)
+    if mirror:
+        mirror.refresh()
+    return mirror
+
+class SourceMirror:
+    """Local copies of the network source datasets and map templates.
+
+    Each item is refreshed only when the fingerprint of its source changes:
+    row count and schema for datasets, size and mtime for templates.
+    Readers use resolve()/resolve_template() and fall back to the source
+    path for anything that has not been mirrored. refresh() holds lock(),
+    so a reader holding it never has a dataset copied over mid-read.
+    """
+
+    def __init__(self, mirror_dir: Union[str, Path], datasets: Dict[str, str],
+                 locks: Optional[LockCoordinator] = None):
+        self.mirror_dir = Path(mirror_dir)
+        self.gdb = self.mirror_dir / MIRROR_GDB
+        self.templates_dir = self.mirror_dir / "templates"
+        self.datasets = dict(datasets)
+        self.state = FingerprintStore(self.mirror_dir / "mirror_state.json")
+        self.backend = get_backend()
+        self.locks = locks or LockCoordinator()
+
+    @classmethod
+    def from_config(cls, config: Dict) -> Optional["SourceMirror"]:
+        """Create the mirror described by the mirror section, or None if disabled."""
+        settings = config.get('mirror') or {}
+        if not settings.get('enabled', False):
+            return None
+        datasets = {name: path for name, path in config['paths']['source_data'].items()
+                    if isinstance(path, str)}
+        return cls(settings.get('path') or CACHE_DIR / "mirror", datasets,
+                   LockCoordinator.from_config(config))
+
+    def lock(self, on_wait=None):
+        """The lock held while the mirror datasets are copied or read."""
+        return self.locks.exclusive(self.gdb, "mirror", on_wait=on_wait)
+
+    def _reload(self):
+        # Other processes update the store too; never save over their entries
+        self.state = FingerprintStore(self.state.path)
+
+    def _local_dataset(self, name: str) -> str:
+        return str(self.gdb / Path(self.datasets[name].replace('\\', '/')).name)
+
+    def _source_fingerprint(self, source: str) -> str:
+        return compute_fingerprint(dataset_fingerprint(source))
+
+    def refresh(self, names: Optional[Iterable[str]] = None, force: bool = False) -> Dict[str, str]:
+        """Copy changed source datasets into the mirror.
+
+        Returns 'refreshed', 'current' or 'failed' for each dataset.
+        """
+        with self.lock():
+            return self._refresh(names, force)
+
+    def _refresh(self, names: Optional[Iterable[str]], force: bool) -> Dict[str, str]:
+        if not self.backend.exists(str(self.gdb)):
+            self.mirror_dir.mkdir(parents=True, exist_ok=True)
+            self.backend.create_file_gdb(str(self.mirror_dir), MIRROR_GDB)
+
+        results = {}
+        for name in names or self.datasets:
+            source = self.datasets[name]
+            local = self._local_dataset(name)
+            try:
+                fingerprint = self._source_fingerprint(source)
+                self._reload()
+                entry = self.state.get(name)
+                if (not force and entry and entry['fingerprint'] == fingerprint
+                        and self.backend.exists(local)):
+                    results[name] = 'current'
+                    continue
+
+                logger.info(f"Refreshing mirror of {name}: {source}")
+                start = time.time()
+                if self.backend.exists(local):
+                    self.backend.delete(local)
+                self.backend.copy(source, local)
+
+                self._reload()
+                self.state.set(name, {
+                    'source': source,
+                    'local': local,
+                    'fingerprint': fingerprint,
+                    'refreshed_at': time.time()
+                })
+                self.state.save()
+                results[name] = 'refreshed'
+                logger.info(f"Mirrored {name} in {time.time() - start:.1f}s")
+
+            except Exception as e:
+                logger.error(f"Failed to mirror {name}: {e}")
+                results[name] = 'failed'
+        return results
+
+    def resolve(self, name: str) -> str:
+        """Path to read dataset name from: the mirror copy if present, else the source."""
+        self._reload()
+        entry = self.state.get(name)
+        if entry and entry['source'] == self.datasets[name] and self.backend.exists(entry['local']):
+            return entry['local']
+        logger.warning(f"{name} is not mirrored, reading from source: {self.datasets[name]}")
+        return self.datasets[name]
+
+    def resolve_template(self, template_path: Union[str, Path]) -> Path:
+        """Local copy of a template, refreshed when its size or mtime changes."""
+        template_path = Path(template_path)
+        key = f"template:{template_path}"
+        local = self.templates_dir / template_path.name
+
+        try:
+            fingerprint = compute_fingerprint(path_fingerprint(template_path))
+            entry = self.state.get(key)
+            if entry and entry['fingerprint'] == fingerprint and local.exists():
+                return local
+
+            # Copy then rename, so concurrent workers never see a partial file
+            self.templates_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = local.with_name(f"{local.name}.{os.getpid()}.tmp")
+            shutil.copy2(template_path, tmp_path)
+            os.replace(tmp_path, local)
+
+            self._reload()
+            self.state.set(key, {
+                'source': str(template_path),
+                'local': str(local),
+                'fingerprint': fingerprint,
+                'refreshed_at': time.time()
+            })
+            self.state.save()
+            logger.info(f"Mirrored template {template_path.name}")
+            return local
+
+        except Exception as e:
+            logger.warning(f"Using template from source, mirror failed: {e}")
+            return template_path
+
+    def status(self, check_sources: bool = True) -> List[Dict[str, Any]]:
+        """Describe every mirrored item: age and whether its source has changed."""
+        rows = []
+        now = time.time()
+        items = [(name, self.datasets[name], True) for name in self.datasets]
+        items += [(key, entry['source'], False) for key, entry in self.state.items()
+                  if key.startswith('template:')]
+
+        for name, source, is_dataset in items:
+            entry = self.state.get(name)
+            row = {'name': name, 'source': source, 'mirrored': entry is not None,
+                   'age': now - entry['refreshed_at'] if entry else None, 'stale': None}
+
+            if entry and check_sources:
+                try:
+                    if is_dataset:
+                        current = self._source_fingerprint(source)
+                    else:
+                        current = compute_fingerprint(path_fingerprint(source))
+                    row['stale'] = current != entry['fingerprint']
+                except Exception as e:
+                    logger.warning(f"Could not check source of {name}: {e}")
+            rows.append(row)
+        return rows
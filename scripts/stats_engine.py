@@ -0,0 +1,157 @@
+from typing import Dict, List, Optional
+import numpy as np
+from scripts.helpers.logging_utils import get_logger
+from scripts.helpers.tracing import span
+from scripts.helpers.progress import Progress
+
+logger = get_logger(__name__)
+
+GROUP_FIELDS = ['CIRCUIT1', 'MCD_CODE', 'MCD_NAME']
+FEET_PER_MILE = 5280
+
+# Fields added to every summary table: (name, type, length)
+DERIVED_FIELDS = [
+    ("Circuit_MCD", "TEXT", 150),
+    ("Miles", "DOUBLE", None),
+    ("SUB", "TEXT", 20)
+]
+
+def summarize_arrays(columns: Dict[str, np.ndarray], value_field: str, source_sub: str,
+                     to_miles: bool = False) -> np.ndarray:
+    """Group rows by CIRCUIT1/MCD_CODE/MCD_NAME and sum value_field.
+
+    Returns a structured array laid out like the Statistics_analysis output
+    plus the derived fields: CIRCUIT1, MCD_CODE, MCD_NAME, FREQUENCY,
+    SUM_<value_field>, Circuit_MCD, Miles and SUB. Miles is NaN (null)
+    unless to_miles is set.
+    """
+    keys = [np.asarray(columns[field]) for field in GROUP_FIELDS]
+    values = np.asarray(columns[value_field], dtype='f8')
+    sum_field = f"SUM_{value_field}"
+
+    # Encode each case field as integer codes, then combine them into one group id
+    codes, sizes = [], []
+    for key in keys:
+        uniques, inverse = np.unique(key, return_inverse=True)
+        codes.append(inverse.ravel())
+        sizes.append(max(len(uniques), 1))
+    combined = np.ravel_multi_index(codes, sizes) if len(values) else np.empty(0, dtype='i8')
+    _, first, group_idx = np.unique(combined, return_index=True, return_inverse=True)
+    group_idx = group_idx.ravel()
+
+    frequency = np.bincount(group_idx, minlength=len(first))
+    sums = np.bincount(group_idx, weights=values, minlength=len(first))
+
+    circuits, mcd_codes, mcd_names = (key[first] for key in keys)
+    circuit_mcd = np.char.add(np.char.add(circuits.astype(str), "_"), mcd_names.astype(str))
+    miles = np.round(sums / FEET_PER_MILE, 2) if to_miles else np.full(len(first), np.nan)
+
+    dtype = [
+        ('CIRCUIT1', circuits.dtype),
+        ('MCD_CODE', mcd_codes.dtype),
+        ('MCD_NAME', mcd_names.dtype),
+        ('FREQUENCY', 'i4'),
+        (sum_field, 'f8'),
+        ('Circuit_MCD', 'U150'),
+        ('Miles', 'f8'),
+        ('SUB', 'U20')
+    ]
+    result = np.empty(len(first), dtype=dtype)
+    result['CIRCUIT1'] = circuits
+    result['MCD_CODE'] = mcd_codes
+    result['MCD_NAME'] = mcd_names
+    result['FREQUENCY'] = frequency
+    result[sum_field] = sums
+    result['Circuit_MCD'] = circuit_mcd
+    result['Miles'] = miles
+    result['SUB'] = source_sub
+    return result
+
+class ArcpyStatsEngine:
+    """Summaries via Statistics_analysis followed by AddField and an UpdateCursor."""
+
+    def summarize_table(self, in_table: str, out_table: str, value_field: str,
+                        source_sub: str, to_miles: bool = False):
+        from scripts.backends import get_backend
+        backend = get_backend()
+
+        with span("statistics", engine='arcpy', substation=source_sub, dataset=str(in_table),
+                  output=out_table, value_field=value_field):
+            backend.statistics(
+                in_table,
+                out_table,
+                [[value_field, "SUM"]],
+                GROUP_FIELDS
+            )
+
+        with span("field_update", substation=source_sub, dataset=out_table) as update_span:
+            for field_name, field_type, field_length in DERIVED_FIELDS:
+                if not backend.list_fields(out_table, field_name):
+                    backend.add_field(out_table, field_name, field_type, field_length)
+
+            # Row count isn't known without an extra GetCount, so no percentage
+            progress = Progress("Field update", total_steps=None)
+            progress.update(0, f"Updating {out_table}")
+            updated = 0
+            if to_miles:
+                with backend.update_cursor(out_table,
+                    ['Circuit_MCD', 'CIRCUIT1', 'MCD_NAME', 'Miles', f'SUM_{value_field}', 'SUB']) as cursor:
+                    for row in cursor:
+                        row[0] = f"{row[1]}_{row[2]}"  # Circuit_MCD
+                        row[3] = round(row[4] / FEET_PER_MILE, 2)  # Miles
+                        row[5] = source_sub  # SUB
+                        cursor.updateRow(row)
+                        updated += 1
+                        progress.advance()
+            else:
+                with backend.update_cursor(out_table,
+                    ['Circuit_MCD', 'CIRCUIT1', 'MCD_NAME', 'SUB']) as cursor:
+                    for row in cursor:
+                        row[0] = f"{row[1]}_{row[2]}"  # Circuit_MCD
+                        row[3] = source_sub  # SUB
+                        cursor.updateRow(row)
+                        updated += 1
+                        progress.advance()
+            progress.complete(f"Updated {updated} rows in {out_table}")
+            update_span.set(rows=updated)
+
+class NumpyStatsEngine:
+    """Summaries computed in memory: one columnar read, one bulk table write."""
+
+    def summarize_table(self, in_table: str, out_table: str, value_field: str,
+                        source_sub: str, to_miles: bool = False):
+        from scripts.backends import get_backend
+        backend = get_backend()
+
+        fields = GROUP_FIELDS + [value_field]
+        with span("statistics", engine='numpy', substation=source_sub, dataset=str(in_table),
+                  output=out_table, value_field=value_field) as stats_span:
+            rows = backend.table_to_numpy(in_table, fields,
+                                          null_value=self._null_values(backend, in_table, fields))
+            summary = summarize_arrays({f: rows[f] for f in fields}, value_field, source_sub, to_miles)
+            stats_span.set(input_rows=len(rows), rows=len(summary))
+
+        # Derived fields are computed with the sums, so this is a single bulk write
+        with span("table_write", substation=source_sub, dataset=out_table, rows=len(summary)):
+            if backend.exists(out_table):
+                backend.delete(out_table)
+            backend.numpy_to_table(summary, out_table)
+        logger.debug(f"Wrote {len(summary)} summary rows to {out_table}")
+
+    @staticmethod
+    def _null_values(backend, in_table: str, fields: List[str]) -> Dict[str, object]:
+        """NumPy has no null, so nulls are read as '' for text and 0 for numbers."""
+        field_types = {f.name: f.type for f in backend.list_fields(in_table)}
+        return {f: '' if field_types.get(f) == 'String' else 0 for f in fields}
+
+STATS_ENGINES = {
+    'arcpy': ArcpyStatsEngine,
+    'numpy': NumpyStatsEngine
+}
+
+def get_stats_engine(config: Optional[Dict] = None):
+    """Return the statistics engine selected by options.stats_engine."""
+    name = 'arcpy'
+    if config is not None:
+        name = config.get('options', {}).get('stats_engine', 'arcpy')
+    return STATS_ENGINES[name]()
@@ -1,28 +1,30 @@
 from pathlib import Path
-from typing import List, Dict
-import pandas as pd
+from typing import Optional, Union
 from scripts.helpers.logging_utils import get_logger
+from scripts.run_ledger import RunLedger, read_ledger, LEDGER_PATH
 
 logger = get_logger(__name__)
 
-class TableBuilder:
-    """Builds summary tables from processed map files."""
+class TableBuilder(RunLedger):
+    """Builds summary tables from processed map files.
     
-    def __init__(self):
-        self.data: List[Dict] = []
+    Entries stream straight into the run ledger (see scripts.run_ledger);
+    nothing is held in memory, and the tables are read back from the ledger.
+    """
+    
+    def __init__(self, path: Union[str, Path] = LEDGER_PATH, run_id: Optional[str] = None):
+        super().__init__(path, run_id)
     
     def add_entry(self, input_file: Path, output_file: Path, status: str, processing_time: float):
         """Adds a processing entry to the table."""
-        self.data.append({
-            'Input File': str(input_file),
-            'Output File': str(output_file),
-            'Status': status,
-            'Processing Time (s)': processing_time
-        })
+        self.record(input_file, output_file, status, processing_time)
     
-    def build_summary_table(self) -> pd.DataFrame:
-        """Creates a summary DataFrame from the collected data."""
-        return pd.DataFrame(self.data)
+    def build_summary_table(self) -> "pd.DataFrame":
+        """Creates a summary DataFrame of this run's entries."""
+        import pandas as pd  # imported on use; pandas is slow to load
+        if self._file is not None:
+            self._file.flush()
+        return pd.DataFrame(read_ledger(self.path, [self.run_id]))
     
     def export_to_csv(self, output_path: Path):
         """Exports the summary table to a CSV file."""
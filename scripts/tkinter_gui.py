@@ -2,16 +2,21 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 from pathlib import Path
 from typing import Optional, Dict, List
-from scripts.map_generator import MapGenerator
 from scripts.helpers.config_utils import load_config
 from scripts.helpers.logging_utils import get_logger
 from scripts.helpers.progress_bar import ProgressBar
+import queue
 import traceback
 from scripts.helpers.config_utils import ConfigurationError
 from scripts.helpers.config_utils import validate_substation
+from scripts.job_runner import JobRunner, QUEUED, RUNNING, SUCCESS
+from scripts.daemon import connect as daemon_connect
 
 logger = get_logger(__name__)
 
+# Milliseconds between checks for job events
+POLL_INTERVAL = 100
+
 class MapProcessorGUI:
     """Main GUI for the map processing application."""
     
@@ -25,8 +30,15 @@ class MapProcessorGUI:
         self.resolution_var = tk.StringVar(value='300')
         self.source_sub_var = tk.StringVar()
         
+        # Jobs run on a background thread (on the map daemon's warm workers
+        # if one is running); the Tk loop polls its events
+        self.runner = JobRunner(Path(self.config['paths']['workspace']), daemon=daemon_connect())
+        self._reported = set()
+        
         self._create_widgets()
         self._setup_layout()
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+        self.root.after(POLL_INTERVAL, self._poll_events)
     
     def _create_widgets(self):
         """Create all GUI widgets."""
@@ -54,7 +66,13 @@ class MapProcessorGUI:
         # Buttons
         button_frame = ttk.Frame(self.root, padding=10)
         ttk.Button(button_frame, text="Process Maps", command=self.process_maps).pack(side=tk.LEFT, padx=5)
-        ttk.Button(button_frame, text="Exit", command=self.root.quit).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Cancel", command=self.cancel).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Exit", command=self.close).pack(side=tk.LEFT, padx=5)
+        
+        # Queued and finished jobs of this session
+        queue_frame = ttk.LabelFrame(self.root, text="Jobs", padding=10)
+        self.job_list = tk.Listbox(queue_frame, height=6)
+        self.job_list.pack(fill=tk.X)
         
         # Status
         self.status_var = tk.StringVar(value="Ready")
@@ -66,7 +84,7 @@ class MapProcessorGUI:
         
         # Store frames for layout
         self.frames = [year_frame, sub_frame, res_frame, options_frame, 
-                      button_frame, self.progress.frame, status_frame]
+                      button_frame, queue_frame, self.progress.frame, status_frame]
     
     def _setup_layout(self):
         """Set up the GUI layout."""
@@ -74,33 +92,87 @@ class MapProcessorGUI:
             frame.pack(fill=tk.X, padx=10, pady=5)
     
     def process_maps(self):
-        """Process maps based on user input."""
+        """Queue map generation for the entered substation.
+        
+        The run happens on the job runner's thread, so the window stays
+        responsive; several substations can be queued one after another.
+        """
+        if not self._validate_inputs():
+            return
+        
+        params = self._get_processing_params()
+        job = self.runner.submit(params['source_sub'].upper(), params['year'])
+        self.job_list.insert(tk.END, self._describe(job))
+        self.source_sub_var.set("")
+    
+    def cancel(self):
+        """Cancel the selected queued job, or else the running one."""
+        selection = self.job_list.curselection()
+        jobs = [self.runner.jobs[i] for i in selection]
+        job = next((j for j in jobs if j.status in (QUEUED, RUNNING)), None)
+        if job is None and self.runner.current is None:
+            self.status_var.set("Nothing to cancel")
+            return
+        self.runner.cancel(job)
+        if job is None or job.status == RUNNING:
+            self.status_var.set("Cancelling after the current stage...")
+    
+    def close(self):
+        """Stop any running job (at its next stage) and close the window."""
+        if self.runner.busy and not messagebox.askyesno(
+                "Jobs running", "Cancel the remaining jobs and exit?"):
+            return
+        self.runner.stop(timeout=0)
+        self.root.quit()
+    
+    def _poll_events(self):
+        """Apply job events posted by the runner thread, then poll again."""
         try:
-            source_sub = self.source_sub_var.get().strip()
-            year = self.year_var.get().strip()
-            
-            config = load_config()
-            if not validate_substation(source_sub, config):
-                self.show_error("Invalid substation")
-                return
-            
-            workspace = Path(config['paths']['workspace'])
-            generator = MapGenerator(workspace)
-            
-            # Process intersections first
-            if not generator.process_intersections():
-                raise Exception("Failed to process intersections")
-                
-            # Then generate maps
-            if not generator.generate_maps(source_sub, year):
-                raise Exception("Failed to generate maps")
-                
-            self.show_success("Maps generated successfully!")
-            
-        except Exception as e:
-            logger.error(f"Error in GUI processing: {e}")
-            logger.error(f"Traceback:\n{traceback.format_exc()}")
-            self.show_error(f"Error: {str(e)}")
+            while True:
+                self._handle_event(self.runner.events.get_nowait())
+        except queue.Empty:
+            pass
+        self.root.after(POLL_INTERVAL, self._poll_events)
+    
+    def _handle_event(self, event: Dict):
+        job = event['job']
+        if event['type'] == 'progress':
+            self.progress.update(event['step'], f"{job.source_sub}: {event['message']}")
+        elif event['type'] == 'started':
+            self.progress.reset()
+            self.status_var.set(f"Processing {job.source_sub}...")
+        elif event['type'] == 'finished':
+            self.status_var.set(f"{job.source_sub}: {job.status}" +
+                                (f" ({job.error})" if job.error else ""))
+            if not self.runner.busy:
+                self._show_summary()
+        self._refresh_job(job)
+    
+    def _refresh_job(self, job):
+        index = self.runner.jobs.index(job)
+        self.job_list.delete(index)
+        self.job_list.insert(index, self._describe(job))
+    
+    def _describe(self, job) -> str:
+        text = f"{job.source_sub} ({job.year}): {job.status}"
+        if job.status not in (QUEUED, RUNNING):
+            text += f" in {job.duration:.0f}s"
+        return text
+    
+    def _show_summary(self):
+        """Report the outcome of the jobs finished since the last summary."""
+        finished = [j for j in self.runner.jobs if j.job_id not in self._reported]
+        self._reported.update(j.job_id for j in finished)
+        failed = [j for j in finished if j.status != SUCCESS]
+        if not failed:
+            self.progress.update(100, "All queued maps generated")
+            return
+        messagebox.showerror(
+            "Error",
+            "Some jobs did not complete:\n\n" +
+            "\n".join(f"{j.source_sub}: {j.status} - {j.error or ''}" for j in failed) +
+            "\n\nCheck the logs for more details."
+        )
     
     def _validate_inputs(self) -> bool:
         """Validate user inputs."""
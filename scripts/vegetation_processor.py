@@ -1,78 +1,86 @@
-import arcpy
 from pathlib import Path
 from typing import Dict, List, Optional
 from scripts.helpers.logging_utils import get_logger
 from scripts.helpers.config_utils import load_config
-from scripts.file_handler import FileHandler  # Add this import
+from scripts.stats_engine import get_stats_engine
+from scripts.backends import get_backend
+from scripts.helpers.tracing import span
+from scripts.intermediate import IntermediateStore
 
 logger = get_logger(__name__)
 
 class VegetationProcessor:
     """Handles vegetation management data processing."""
     
-    def __init__(self, workspace: Path):
+    def __init__(self, workspace: Path, scratch_workspace: Optional[Path] = None,
+                 intermediate: Optional[IntermediateStore] = None):
+        """Intermediate datasets go where intermediate (default: options.intermediate) says."""
         self.workspace = workspace
         self.config = load_config()
-        self.file_handler = FileHandler()
-        arcpy.env.workspace = str(workspace)
-        arcpy.env.overwriteOutput = True
+        self.backend = get_backend()
+        self.intermediate = intermediate or IntermediateStore.from_config(
+            self.config, workspace, scratch_workspace)
+        self.scratch_workspace = self.intermediate.intersection_workspace
+        self.stats_engine = get_stats_engine(self.config)
+        self.backend.env.workspace = str(workspace)
+        self.backend.env.overwriteOutput = True
         
     def process_vegetation_data(self, source_sub: str, expression: str) -> bool:
         """Process vegetation management data for a given substation."""
         try:
             # Save current workspace
-            original_workspace = arcpy.env.workspace
+            original_workspace = self.backend.env.workspace
             
             # Use our workspace temporarily
-            arcpy.env.workspace = str(self.workspace)
+            self.backend.env.workspace = str(self.workspace)
             
             logger.info(f"Processing vegetation data for {source_sub}")
             logger.debug(f"Using workspace: {self.workspace}")
             logger.debug(f"SQL Expression: {expression}")
             
             # Validate workspace
-            if not self.workspace.exists():
+            if not self.backend.exists(str(self.workspace)):
                 logger.error(f"Workspace does not exist: {self.workspace}")
                 return False
                 
+            # MapGenerator.process_intersections builds the intersections,
+            # under the intersections lock, before any substation is processed
+            missing = [name for name in ("XFMR_MCD", "PriCond_MCD")
+                       if not self.backend.exists(f"{self.scratch_workspace}\\{name}")]
+            if missing:
+                logger.error(f"Intersections missing from {self.scratch_workspace}: {', '.join(missing)}")
+                return False
+                
             # Create feature layers
             logger.info("Creating feature layers...")
             xfmr_layer = f"XFMR_MCD_{source_sub}"
             pricond_layer = f"PriCond_MCD_{source_sub}"
             
             try:
-                in_xfmr_lyr = arcpy.MakeFeatureLayer_management(
-                    "XFMR_MCD",
+                in_xfmr_lyr = self._make_layer(
+                    f"{self.scratch_workspace}\\XFMR_MCD",
                     xfmr_layer,
-                    expression
+                    expression,
+                    source_sub
                 )
                 
-                in_pricond_lyr = arcpy.MakeFeatureLayer_management(
-                    "PriCond_MCD",
+                in_pricond_lyr = self._make_layer(
+                    f"{self.scratch_workspace}\\PriCond_MCD",
                     pricond_layer,
-                    expression
+                    expression,
+                    source_sub
                 )
-            except arcpy.ExecuteError:
-                logger.error(f"Failed to create feature layers: {arcpy.GetMessages(2)}")
-                return False
-                
-            # Process intersections
-            logger.info("Processing intersections...")
-            if not self.file_handler.process_intersections(
-                xfmr_layer, 
-                pricond_layer, 
-                str(self.workspace)
-            ):
-                logger.error("Failed to process intersections")
+            except self.backend.ExecuteError:
+                logger.error(f"Failed to create feature layers: {self.backend.get_messages(2)}")
                 return False
                 
-            # Process statistics
+            # Process statistics and calculated fields
             logger.info("Processing statistics...")
-            self._process_statistics(in_pricond_lyr, in_xfmr_lyr, source_sub)
-            
-            # Update fields
-            logger.info("Updating fields...")
-            self._update_fields(source_sub)
+            try:
+                self._process_statistics(in_pricond_lyr, in_xfmr_lyr, source_sub)
+            finally:
+                # Drop the layers, even on failure, so nothing keeps the selection key table locked
+                self._delete_layers(in_xfmr_lyr, in_pricond_lyr)
             
             logger.info(f"Successfully processed vegetation data for {source_sub}")
             return True
@@ -84,57 +92,51 @@ class VegetationProcessor:
         
         finally:
             # Restore original workspace
-            arcpy.env.workspace = original_workspace
+            self.backend.env.workspace = original_workspace
+    
+    def _delete_layers(self, *layers: str):
+        for layer in layers:
+            try:
+                self.backend.delete(layer)
+            except self.backend.ExecuteError as e:
+                logger.warning(f"Could not delete layer {layer}: {e}")
+    
+    def _make_layer(self, dataset: str, layer_name: str, expression: str, source_sub: str):
+        """Create a feature layer of the selected features, traced as feature_layer."""
+        with span("feature_layer", substation=source_sub, dataset=dataset,
+                  expression_length=len(expression)) as layer_span:
+            layer = self.backend.make_feature_layer(dataset, layer_name, expression)
+            if layer_span.recording:
+                layer_span.set(rows=self.backend.get_count(layer))
+            return layer
+    
+    @staticmethod
+    def _summary_names(source_sub: str) -> List[str]:
+        return [f"PriCond_{source_sub}_MCD_Sum", f"XFMR_{source_sub}_MCD_Sum"]
+    
+    def summary_tables(self, source_sub: str) -> List[str]:
+        """The substation's summary tables in the working geodatabase, once promoted."""
+        return [f"{self.workspace}\\{name}" for name in self._summary_names(source_sub)]
     
     def _process_statistics(self, pricond_lyr: str, xfmr_lyr: str, source_sub: str):
-        """Process statistics for primary conductor and transformer layers."""
-        # Process primary conductor statistics
-        arcpy.Statistics_analysis(
+        """Build the primary conductor and transformer summary tables."""
+        pricond_sum, xfmr_sum = map(self.intermediate.table, self._summary_names(source_sub))
+        
+        # Primary conductor lengths are summarised in miles
+        self.stats_engine.summarize_table(
             pricond_lyr,
-            f"PriCond_{source_sub}_MCD_Sum",
-            [["SHAPE_Length", "SUM"]],
-            ["CIRCUIT1", "MCD_CODE", "MCD_NAME"]
+            pricond_sum,
+            "SHAPE_Length",
+            source_sub,
+            to_miles=True
         )
         
-        # Process transformer statistics
-        arcpy.Statistics_analysis(
+        self.stats_engine.summarize_table(
             xfmr_lyr,
-            f"XFMR_{source_sub}_MCD_Sum",
-            [["CUSTOMER_COUNT", "SUM"]],
-            ["CIRCUIT1", "MCD_CODE", "MCD_NAME"]
+            xfmr_sum,
+            "CUSTOMER_COUNT",
+            source_sub
         )
-    
-    def _update_fields(self, source_sub: str):
-        """Update fields with calculated values."""
-        pricond_sum = f"PriCond_{source_sub}_MCD_Sum"
-        xfmr_sum = f"XFMR_{source_sub}_MCD_Sum"
-        
-        # Add fields if they don't exist
-        field_definitions = [
-            ("Circuit_MCD", "TEXT", 150),
-            ("Miles", "DOUBLE"),
-            ("SUB", "TEXT", 20)
-        ]
-        
-        for table in [pricond_sum, xfmr_sum]:
-            for field_name, field_type, field_length in field_definitions:
-                if not arcpy.ListFields(table, field_name):
-                    arcpy.AddField_management(table, field_name, field_type, 
-                                           field_length=field_length)
-        
-        # Update primary conductor fields
-        with arcpy.da.UpdateCursor(pricond_sum, 
-            ['Circuit_MCD', 'CIRCUIT1', 'MCD_NAME', 'Miles', 'SUM_SHAPE_Length', 'SUB']) as cursor:
-            for row in cursor:
-                row[0] = f"{row[1]}_{row[2]}"  # Circuit_MCD
-                row[3] = round(row[4] / 5280, 2)  # Convert to miles
-                row[5] = source_sub
-                cursor.updateRow(row)
         
-        # Update transformer fields
-        with arcpy.da.UpdateCursor(xfmr_sum, 
-            ['Circuit_MCD', 'CIRCUIT1', 'MCD_NAME', 'SUB']) as cursor:
-            for row in cursor:
-                row[0] = f"{row[1]}_{row[2]}"
-                row[3] = source_sub
-                cursor.updateRow(row)
+        self.intermediate.promote(pricond_sum)
+        self.intermediate.promote(xfmr_sum)
@@ -0,0 +1,378 @@
+"""Work queue on shared storage for running map jobs on several hosts.
+
+    python -m scripts.cli queue enqueue --year 2025      # every configured substation
+    python -m scripts.cli worker                          # on each host, as many as wanted
+    python -m scripts.cli queue status
+
+The queue is a folder every host can reach (queue.path in settings.yaml)
+with one JSON file per job in pending, leased, done and failed. A worker
+claims a job by renaming it from pending into leased under its own token,
+which only one worker can do, and holds it under a lease it renews by
+touching the file. A job whose lease ran out (the worker crashed or lost
+the share) is put back in pending by the next worker to look, up to
+max_attempts times. Renames are atomic on local disks and SMB/NFS shares
+alike, which SQLite's file locking on network shares is not.
+"""
+import os
+import json
+import time
+import uuid
+import socket
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+from scripts.helpers.logging_utils import get_logger
+from scripts.daemon import JOB_TYPES
+from config.fixed_paths import QUEUE_DIR
+
+logger = get_logger(__name__)
+
+PENDING, LEASED, DONE, FAILED = 'pending', 'leased', 'done', 'failed'
+STATES = (PENDING, LEASED, DONE, FAILED)
+
+# Overridden by the queue section of settings.yaml
+DEFAULT_OPTIONS = {
+    'lease_seconds': 600.0,   # a job not heartbeated for this long is reclaimed
+    'max_attempts': 3,        # leases a job may lose before it is failed
+    'poll_interval': 10.0     # how often an idle worker looks for work
+}
+
+class QueueError(Exception):
+    """Raised for malformed jobs or an unreachable queue folder."""
+    pass
+
+def _slug(text: str) -> str:
+    return ''.join(c if c.isalnum() or c in '-_' else '_' for c in text)[:60]
+
+class Lease:
+    """A claimed job. The lease is lost once the file leaves leased under our name."""
+
+    def __init__(self, queue: "WorkQueue", job: Dict, path: Path):
+        self.queue = queue
+        self.job = job
+        self.path = path
+        self.lost = False
+
+    def heartbeat(self) -> bool:
+        """Renew the lease; False if it has already been reclaimed."""
+        try:
+            os.utime(self.path)
+            return True
+        except OSError:
+            self.lost = True
+            return False
+
+    def complete(self, status: str, result: Dict) -> bool:
+        """File the job under done or failed with its result record.
+
+        Returns False, and records nothing, if the lease was lost meanwhile:
+        the job has gone back to pending and its next run will be recorded.
+        """
+        job = dict(self.job, status=status, result=result, error=result.get('error'),
+                   finished=time.time())
+        return self.queue._move(self.path, DONE if status == 'Success' else FAILED, job)
+
+    def release(self) -> bool:
+        """Give an unfinished job back, e.g. when the worker is stopped."""
+        job = dict(self.job)
+        job.pop('lease', None)
+        return self.queue._move(self.path, PENDING, job)
+
+class WorkQueue:
+    """Jobs as JSON files in root/{pending,leased,done,failed}.
+
+    Job files are named <enqueue time>-<queue token>-<type>-<name>.json so
+    sorting them gives the order they were queued in; a leased job's file
+    also carries the token of the worker holding it.
+    """
+
+    def __init__(self, root: Union[str, Path] = QUEUE_DIR,
+                 lease_seconds: float = DEFAULT_OPTIONS['lease_seconds'],
+                 max_attempts: int = DEFAULT_OPTIONS['max_attempts']):
+        self.root = Path(root)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.token = uuid.uuid4().hex[:12]
+        try:
+            for state in STATES:
+                (self.root / state).mkdir(parents=True, exist_ok=True)
+        except OSError as e:
+            raise QueueError(f"Cannot open the queue at {self.root}: {e}")
+
+    @classmethod
+    def from_config(cls, config: Dict) -> "WorkQueue":
+        """Queue at queue.path (default: data/queue, which only this host can see)."""
+        options = dict(DEFAULT_OPTIONS, **(config.get('queue') or {}))
+        return cls(options.get('path') or QUEUE_DIR, options['lease_seconds'],
+                   options['max_attempts'])
+
+    def enqueue(self, job_type: str, **args) -> Dict:
+        """Add a 'generate' (source_sub, year, force, resume) or 'export' (input_path, output_path, resolution) job."""
+        if job_type not in JOB_TYPES:
+            raise QueueError(f"Unknown job type: {job_type}")
+        missing = [name for name in JOB_TYPES[job_type] if not args.get(name)]
+        if missing:
+            raise QueueError(f"Missing {', '.join(missing)} for a {job_type} job")
+
+        name = args.get('source_sub') or Path(str(args['input_path']).replace('\\', '/')).stem
+        job = {
+            'id': f"{time.time_ns():020d}-{self.token}-{job_type}-{_slug(name)}",
+            'type': job_type,
+            'args': args,
+            'attempts': 0,
+            'enqueued': time.time(),
+            'enqueued_by': socket.gethostname()
+        }
+        self._write(self.root / PENDING / f"{job['id']}.json", job)
+        return job
+
+    def claim(self, worker: str) -> Optional[Lease]:
+        """Lease the oldest pending job, or return None if there is none."""
+        for path in sorted(self._files(PENDING)):
+            leased = self.root / LEASED / f"{path.stem}.{self.token}.json"
+            try:
+                # Renaming keeps the modification time, which starts the lease,
+                # so touch first; then only one worker's rename can succeed
+                os.utime(path)
+                os.rename(path, leased)
+            except (FileNotFoundError, FileExistsError, PermissionError):
+                continue
+            try:
+                job = json.loads(leased.read_text(encoding='utf-8'))
+            except (OSError, ValueError) as e:
+                logger.error(f"Unreadable job {path.name}, failing it: {e}")
+                self._move(leased, FAILED, {'id': path.stem, 'error': f"Unreadable job file: {e}"})
+                continue
+            job['attempts'] = job.get('attempts', 0) + 1
+            job['lease'] = {'worker': worker, 'token': self.token, 'since': time.time()}
+            self._write(leased, job)
+            return Lease(self, job, leased)
+        return None
+
+    def reclaim_expired(self) -> List[str]:
+        """Put jobs whose lease ran out back in pending, or fail them after max_attempts."""
+        reclaimed = []
+        now = self._server_time()
+        for path in self._files(LEASED):
+            try:
+                expired = now - path.stat().st_mtime > self.lease_seconds
+            except OSError:
+                continue
+            if not expired:
+                continue
+            # Move it aside first so only one worker reclaims it
+            claimed = self.root / PENDING / f".{path.name}.{self.token}.reclaim"
+            try:
+                os.rename(path, claimed)
+            except OSError:
+                continue
+            job_id = path.name.split('.', 1)[0]
+            try:
+                job = json.loads(claimed.read_text(encoding='utf-8'))
+            except (OSError, ValueError):
+                job = {'id': job_id}
+            lease = job.pop('lease', {})
+            logger.warning(f"Lease on {job_id} held by {lease.get('worker', '?')} expired")
+            if 'type' not in job or job.get('attempts', 0) >= self.max_attempts:
+                job['error'] = f"Lease expired {job.get('attempts', 0)} times"
+                self._move(claimed, FAILED, job)
+            else:
+                self._move(claimed, PENDING, job, name=f"{job_id}.json")
+            reclaimed.append(job_id)
+        return reclaimed
+
+    def jobs(self, state: str) -> List[Dict]:
+        """Jobs in one state, oldest first."""
+        jobs = []
+        for path in sorted(self._files(state)):
+            try:
+                job = json.loads(path.read_text(encoding='utf-8'))
+            except (OSError, ValueError):
+                # Mid-rename or being rewritten by its worker
+                continue
+            if state == LEASED:
+                try:
+                    job['heartbeat'] = path.stat().st_mtime
+                except OSError:
+                    continue
+            jobs.append(job)
+        return jobs
+
+    def counts(self) -> Dict[str, int]:
+        return {state: len(self._files(state)) for state in STATES}
+
+    def retry_failed(self) -> int:
+        """Move every failed job back to pending for another round of attempts."""
+        count = 0
+        for path in self._files(FAILED):
+            try:
+                job = json.loads(path.read_text(encoding='utf-8'))
+            except (OSError, ValueError):
+                continue
+            if 'type' not in job:
+                continue
+            job.update(attempts=0, error=None)
+            for key in ('status', 'result', 'finished'):
+                job.pop(key, None)
+            if self._move(path, PENDING, job):
+                count += 1
+        return count
+
+    def _files(self, state: str) -> List[Path]:
+        try:
+            return [path for path in (self.root / state).iterdir()
+                    if path.suffix == '.json' and not path.name.startswith('.')]
+        except OSError as e:
+            raise QueueError(f"Cannot read the queue at {self.root}: {e}")
+
+    def _server_time(self) -> float:
+        """Current time by the file server's clock, which lease times are measured in."""
+        probe = self.root / f".clock.{self.token}"
+        try:
+            probe.touch()
+            now = probe.stat().st_mtime
+            probe.unlink()
+            return now
+        except OSError:
+            return time.time()
+
+    def _write(self, path: Path, job: Dict):
+        # Write then rename, so readers never see a half-written job
+        tmp = path.with_name(f".{path.name}.{self.token}.tmp")
+        tmp.write_text(json.dumps(job, indent=1, default=str), encoding='utf-8')
+        os.replace(tmp, path)
+
+    def _move(self, source: Path, state: str, job: Dict, name: Optional[str] = None) -> bool:
+        """Rewrite job into state under name (default: its id); False if source has gone."""
+        # Claim the source with a rename first: if the lease was reclaimed
+        # meanwhile, this fails and the job is left to its new owner
+        moving = source.with_name(f".{source.name}.{self.token}.moving")
+        try:
+            os.rename(source, moving)
+        except FileNotFoundError:
+            return False
+        self._write(self.root / state / (name or f"{job['id']}.json"), job)
+        moving.unlink()
+        return True
+
+def run_job(job: Dict, workspace: Union[str, Path]) -> Dict:
+    """Run a queued job in this process and return its result record.
+
+    A generate job whose earlier lease expired resumes where that run stopped.
+    """
+    if job['type'] == 'generate':
+        from scripts.batch_runner import run_substation
+        resume = job['args'].get('resume', False) or job.get('attempts', 1) > 1
+        return run_substation(workspace=workspace, **dict(job['args'], resume=resume))
+    from scripts.export_worker import export_document
+    return export_document(**job['args'])
+
+class QueueWorker:
+    """Claims jobs from a WorkQueue one at a time and runs them here.
+
+    Run several workers on a host to use more of its cores. Each keeps its
+    MapGenerator, and so its open templates, from one job to the next.
+    """
+
+    def __init__(self, queue: WorkQueue, workspace: Union[str, Path],
+                 settings: Optional[Dict] = None, poll_interval: float = DEFAULT_OPTIONS['poll_interval'],
+                 runner: Callable[[Dict, Union[str, Path]], Dict] = run_job):
+        from scripts.helpers.config_utils import load_config
+
+        self.queue = queue
+        self.workspace = Path(workspace)
+        self.settings = settings if settings is not None else load_config()
+        self.poll_interval = poll_interval
+        self.runner = runner
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self.completed = 0
+        self._stop = threading.Event()
+
+    def stop(self):
+        """Stop once the current job is done."""
+        self._stop.set()
+
+    def run(self, max_jobs: Optional[int] = None, exit_when_empty: bool = False) -> int:
+        """Run jobs until stopped, max_jobs are done or, with exit_when_empty, the queue is empty.
+
+        Returns the number of jobs completed.
+        """
+        from scripts import batch_runner, export_worker
+        from scripts.run_ledger import RunLedger
+        from scripts.run_history import RunHistory
+
+        scratch_root = tempfile.mkdtemp(prefix="mapgen_queue_")
+        ledger = RunLedger.from_config(self.settings, run_id=f"queue_{self.name.replace(':', '_')}")
+        history = RunHistory.from_config(self.settings)
+        logger.info(f"Worker {self.name} taking jobs from {self.queue.root}")
+        try:
+            batch_runner._init_worker(scratch_root, self.settings)
+            export_worker._init_worker()
+            while not self._stop.is_set() and (max_jobs is None or self.completed < max_jobs):
+                self.queue.reclaim_expired()
+                lease = self.queue.claim(self.name)
+                if lease is None:
+                    if exit_when_empty and not self.queue.counts()[LEASED]:
+                        break
+                    self._stop.wait(self.poll_interval)
+                    continue
+                self._run(lease, ledger, history)
+        finally:
+            ledger.close()
+            history.close()
+            shutil.rmtree(scratch_root, ignore_errors=True)
+        logger.info(f"Worker {self.name} stopping after {self.completed} jobs")
+        return self.completed
+
+    def _refresh_mirror(self):
+        """Bring the mirror up to date before a job; other workers' reads hold its lock."""
+        from scripts.source_mirror import refresh_mirror
+        try:
+            refresh_mirror(self.settings)
+        except Exception as e:
+            # The job then reads the previous copies, or the sources
+            logger.error(f"Could not refresh the mirror: {e}")
+
+    def _run(self, lease: Lease, ledger, history):
+        job = lease.job
+        logger.info(f"Running {job['id']} (attempt {job['attempts']})")
+        done = threading.Event()
+
+        def beat():
+            while not done.wait(self.queue.lease_seconds / 4):
+                if not lease.heartbeat():
+                    logger.warning(f"Lost the lease on {job['id']}")
+                    return
+        heartbeat = threading.Thread(target=beat, name="lease-heartbeat", daemon=True)
+        heartbeat.start()
+
+        try:
+            if job['type'] == 'generate':
+                self._refresh_mirror()
+            result = self.runner(job, self.workspace)
+        except BaseException:
+            # Stopped mid-job (Ctrl+C): let another worker start it straight away
+            done.set()
+            lease.release()
+            raise
+        done.set()
+        heartbeat.join()
+
+        status = 'Success' if result.get('status') == 'Success' else 'Failed'
+        if not lease.complete(status, result):
+            logger.warning(f"{job['id']} finished after its lease was reclaimed; result discarded")
+            return
+        self.completed += 1
+        logger.info(f"{job['id']}: {status} in {result.get('duration', 0.0):.1f}s")
+        try:
+            if job['type'] == 'export':
+                ledger.record_result(result)
+                if status == 'Success':
+                    history.record(result['input'], 'export', result['duration'])
+            else:
+                for record in result.get('exports', []):
+                    ledger.record_result(record)
+        except Exception as e:
+            logger.error(f"Could not record {job['id']}: {e}")
@@ -0,0 +1,23 @@
+import csv
+import pytest
+from scripts.batch_runner import format_report, export_report
+
+RESULTS = [
+    {'substation': 'EMILIE', 'year': '2025', 'status': 'Success', 'duration': 12.5, 'worker': 101, 'error': None},
+    {'substation': 'WOODBOURNE', 'year': '2025', 'status': 'Failed', 'duration': 3.0, 'worker': 102,
+     'error': 'Failed to generate maps'}
+]
+
+def test_format_report():
+    report = format_report(RESULTS)
+    assert 'EMILIE' in report
+    assert 'Failed to generate maps' in report
+    assert '1/2 substations succeeded' in report
+
+def test_export_report(tmp_path):
+    output_path = tmp_path / "report.csv"
+    export_report(RESULTS, output_path)
+    with open(output_path, newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 2
+    assert rows[1]['status'] == 'Failed'
@@ -0,0 +1,80 @@
+import os
+import pytest
+from pathlib import Path
+from scripts.build_manifest import BuildManifest, export_fingerprint
+from scripts.backends.memory_backend import InMemoryBackend
+from scripts.helpers.fingerprint import dataset_fingerprint, path_fingerprint
+
+def test_unchanged_output_is_current(tmp_path):
+    template = tmp_path / "Template.mxd"
+    template.touch()
+    output = tmp_path / "out.pdf"
+    output.touch()
+
+    manifest = BuildManifest.for_directory(tmp_path)
+    fingerprint = export_fingerprint(template, 300)
+    manifest.record(output, fingerprint)
+
+    reloaded = BuildManifest.for_directory(tmp_path)
+    assert reloaded.is_current(output, export_fingerprint(template, 300))
+
+def test_changes_invalidate_output(tmp_path):
+    template = tmp_path / "Template.mxd"
+    template.touch()
+    output = tmp_path / "out.pdf"
+    output.touch()
+
+    manifest = BuildManifest.for_directory(tmp_path)
+    manifest.record(output, export_fingerprint(template, 300))
+
+    assert not manifest.is_current(output, export_fingerprint(template, 150))
+
+    mtime = template.stat().st_mtime
+    os.utime(template, (mtime + 10, mtime + 10))
+    assert not manifest.is_current(output, export_fingerprint(template, 300))
+
+def test_missing_output_is_not_current(tmp_path):
+    template = tmp_path / "Template.mxd"
+    template.touch()
+    manifest = BuildManifest.for_directory(tmp_path)
+    fingerprint = export_fingerprint(template, 300)
+    manifest.record(tmp_path / "out.pdf", fingerprint)
+    assert not manifest.is_current(tmp_path / "out.pdf", fingerprint)
+
+def test_dataset_in_gdb_uses_gdb_folder(tmp_path):
+    gdb = tmp_path / "Source.gdb"
+    gdb.mkdir()
+    (gdb / "a00000001.gdbtable").write_bytes(b"data")
+    fingerprint = path_fingerprint(gdb / "V_XFMR_PT")
+    assert fingerprint['exists']
+    assert fingerprint['size'] == 4
+
+def test_gdb_lock_files_do_not_change_fingerprint(tmp_path):
+    gdb = tmp_path / "Source.gdb"
+    gdb.mkdir()
+    table = gdb / "a00000001.gdbtable"
+    table.write_bytes(b"data")
+    before = path_fingerprint(gdb / "V_XFMR_PT")
+
+    # ArcGIS drops a shared lock like this whenever someone reads the gdb
+    lock = gdb / "_gdb.GISAPP01.1234.5678.sr.lock"
+    lock.write_bytes(b"")
+    mtime = table.stat().st_mtime + 10
+    os.utime(lock, (mtime, mtime))
+    assert path_fingerprint(gdb / "V_XFMR_PT") == before
+
+def test_source_fingerprint_ignores_other_datasets_in_the_gdb(tmp_path, monkeypatch):
+    backend = InMemoryBackend()
+    monkeypatch.setattr("scripts.backends._backend", backend)
+    gdb = tmp_path / "Electric.gdb"
+    gdb.mkdir()
+    xfmr = f"{gdb}/V_XFMR_PT"
+    backend.load_table(xfmr, [("CIRCUIT1", "String", 20)], [("13-01",)])
+    before = dataset_fingerprint(xfmr)
+
+    # Someone edits an unrelated feature class in the live geodatabase
+    (gdb / "a00000009.gdbtable").write_bytes(b"edited")
+    assert dataset_fingerprint(xfmr) == before
+
+    backend.load_table(xfmr, [("CIRCUIT1", "String", 20)], [("13-01",), ("13-02",)])
+    assert dataset_fingerprint(xfmr) != before
@@ -0,0 +1,35 @@
+from scripts.checkpoint import StageCheckpoint, VEGETATION, export_stage, valid_pdf
+
+TABLES = [r"C:\data\Working.gdb\PriCond_EMILIE_MCD_Sum", r"C:\data\Working.gdb\XFMR_EMILIE_MCD_Sum"]
+
+def test_valid_pdf(tmp_path):
+    good, empty, broken = tmp_path / "good.pdf", tmp_path / "empty.pdf", tmp_path / "broken.pdf"
+    good.write_bytes(b"%PDF-1.7\n...")
+    empty.touch()
+    broken.write_bytes(b"<html>Proxy error</html>")
+    assert valid_pdf(good)
+    assert not valid_pdf(empty)
+    assert not valid_pdf(broken)
+    assert not valid_pdf(tmp_path / "missing.pdf")
+
+def test_completed_stages_survive_a_restart(tmp_path):
+    pdf = tmp_path / "EMILIE_Internal_2025_11x17.pdf"
+    pdf.write_bytes(b"%PDF-1.7\n...")
+    checkpoint = StageCheckpoint.for_directory(tmp_path)
+    checkpoint.complete(VEGETATION, "sources-1", TABLES)
+    checkpoint.complete(export_stage('Internal'), "template-1", [str(pdf)])
+
+    resumed = StageCheckpoint.for_directory(tmp_path)
+    exists = lambda table: table in TABLES
+    assert resumed.is_complete(VEGETATION, "sources-1", exists)
+    assert resumed.is_complete(export_stage('Internal'), "template-1", exists)
+    assert not resumed.is_complete(export_stage('External'), "template-1", exists)
+
+    # Changed inputs, a dropped table or a truncated PDF mean the stage is redone
+    assert not resumed.is_complete(VEGETATION, "sources-2", exists)
+    assert not resumed.is_complete(VEGETATION, "sources-1", lambda table: False)
+    pdf.write_bytes(b"")
+    assert not resumed.is_complete(export_stage('Internal'), "template-1", exists)
+
+    resumed.reset()
+    assert not StageCheckpoint.for_directory(tmp_path).is_complete(VEGETATION, "sources-1", exists)
@@ -0,0 +1,32 @@
+import pytest
+from scripts.circuit_index import CircuitIndex
+
+ROWS = [('13-02', '101'), ('13-01', '101'), ('13-01', '102'), ('13-01', '101')]
+
+def test_update_and_query(tmp_path):
+    index = CircuitIndex(tmp_path / "index.sqlite")
+    index.update_substation('emilie', ROWS, 'fp1')
+
+    assert index.circuits('EMILIE') == ['13-01', '13-02']
+    assert index.mcd_codes('EMILIE', '13-01') == ['101', '102']
+    assert index.mcd_codes('EMILIE') == ['101', '102']
+    assert index.substations() == ['EMILIE']
+    assert 'emilie' in index
+
+def test_index_persists_with_fingerprint(tmp_path):
+    db_path = tmp_path / "index.sqlite"
+    index = CircuitIndex(db_path)
+    index.update_substation('EMILIE', ROWS, 'fp1')
+    index.close()
+
+    reopened = CircuitIndex(db_path)
+    assert reopened.is_current('EMILIE', 'fp1')
+    assert not reopened.is_current('EMILIE', 'fp2')
+    assert reopened.circuits('EMILIE') == ['13-01', '13-02']
+
+def test_update_replaces_substation(tmp_path):
+    index = CircuitIndex(tmp_path / "index.sqlite")
+    index.update_substation('EMILIE', ROWS, 'fp1')
+    index.update_substation('EMILIE', [('13-03', '103')], 'fp2')
+    assert index.circuits('EMILIE') == ['13-03']
+    assert index.circuits('WOODBOURNE') == []
@@ -0,0 +1,35 @@
+import os
+import sys
+import time
+import subprocess
+import pytest
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+# Seconds allowed for `python -m scripts.cli --help`; override on slow hosts
+STARTUP_BUDGET = float(os.environ.get("CLI_STARTUP_BUDGET", "2.0"))
+HEAVY_MODULES = ('arcpy', 'pandas', 'numpy')
+
+def run_python(*args):
+    return subprocess.run([sys.executable, *args], cwd=PROJECT_ROOT,
+                          capture_output=True, text=True)
+
+def test_cli_help_within_budget():
+    timings = []
+    for _ in range(3):
+        start = time.perf_counter()
+        result = run_python("-m", "scripts.cli", "--help")
+        timings.append(time.perf_counter() - start)
+        assert result.returncode == 0, result.stderr
+
+    assert min(timings) < STARTUP_BUDGET, (
+        f"CLI startup took {min(timings):.2f}s, budget is {STARTUP_BUDGET:.2f}s"
+    )
+
+@pytest.mark.parametrize("module", ["scripts.cli", "scripts.tkinter_gui", "run_pipeline"])
+def test_entry_points_do_not_import_heavy_modules(module):
+    result = run_python("-c", f"import sys, {module}; "
+                              f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == ""
@@ -0,0 +1,71 @@
+import os
+import pickle
+import pytest
+from scripts.helpers.config_utils import (
+    load_config,
+    validate_substation,
+    clear_config_cache,
+    Settings,
+    ConfigurationError
+)
+
+SETTINGS_YAML = """
+paths:
+  workspace: "{root}/Working.gdb"
+  mxd_input: "{root}"
+  aprx_input: "{root}"
+  pdf_output: "{root}"
+  logs: "{root}"
+options:
+  default_year: "2025"
+  resolution: 300
+substations:
+  - WOODBOURNE
+  - Emilie
+"""
+
+@pytest.fixture
+def settings_file(tmp_path):
+    path = tmp_path / "settings.yaml"
+    path.write_text(SETTINGS_YAML.format(root=tmp_path.as_posix()))
+    clear_config_cache()
+    yield path
+    clear_config_cache()
+
+def test_load_config_is_cached(settings_file):
+    first = load_config(settings_file)
+    assert load_config(settings_file) is first
+    assert first['options']['resolution'] == 300
+
+def test_load_config_reloads_on_mtime_change(settings_file):
+    first = load_config(settings_file)
+    settings_file.write_text(settings_file.read_text().replace("300", "150"))
+    mtime = first.mtime + 10
+    os.utime(settings_file, (mtime, mtime))
+
+    reloaded = load_config(settings_file)
+    assert reloaded is not first
+    assert reloaded['options']['resolution'] == 150
+
+def test_settings_are_immutable(settings_file):
+    settings = load_config(settings_file)
+    with pytest.raises(AttributeError):
+        settings.mtime = 0
+    with pytest.raises(TypeError):
+        settings['options']['resolution'] = 150
+    assert isinstance(settings.substations, tuple)
+
+def test_settings_pickle_round_trip(settings_file):
+    settings = load_config(settings_file)
+    copy = pickle.loads(pickle.dumps(settings))
+    assert copy.to_dict() == settings.to_dict()
+    assert copy.substation_set == frozenset({'WOODBOURNE', 'EMILIE'})
+
+def test_validate_substation_uses_lookup(settings_file):
+    settings = load_config(settings_file)
+    assert validate_substation('emilie', settings)
+    assert not validate_substation('NOWHERE', settings)
+
+def test_missing_file_raises(tmp_path):
+    with pytest.raises(ConfigurationError):
+        load_config(tmp_path / "missing.yaml")
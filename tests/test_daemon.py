@@ -0,0 +1,86 @@
+import threading
+from concurrent.futures import Future
+import pytest
+from scripts.daemon import MapDaemon, DaemonClient, DaemonError, connect, parse_address
+from scripts.helpers.config_utils import Settings
+from scripts.job_runner import QUEUED, RUNNING, SUCCESS, FAILED, CANCELLED
+
+def _settings(tmp_path):
+    return Settings({'paths': {'ledger': str(tmp_path / "ledger.csv"),
+                               'history': str(tmp_path / "history.sqlite")}})
+
+def test_parse_address():
+    assert parse_address("localhost:6120") == ("localhost", 6120)
+    assert parse_address("/tmp/mapgen.sock") == "/tmp/mapgen.sock"
+    assert parse_address(r"\\.\pipe\mapgen") == r"\\.\pipe\mapgen"
+
+def test_jobs_wait_for_a_free_worker(tmp_path):
+    daemon = MapDaemon(tmp_path, workers=1, settings=_settings(tmp_path), key_path=tmp_path / "key")
+    futures = {}
+    daemon._submit = lambda job: futures.setdefault(job['id'], Future())
+
+    first = daemon.submit('generate', source_sub='EMILIE', year='2025')
+    second = daemon.submit('generate', source_sub='WOODBOURNE', year='2025')
+    third = daemon.submit('generate', source_sub='FALLSINGTON', year='2025')
+    assert [j['status'] for j in daemon.status()] == [RUNNING, QUEUED, QUEUED]
+    assert daemon.cancel(third['id'])['status'] == CANCELLED
+
+    futures[first['id']].set_result({'status': 'Success', 'exports': []})
+    assert daemon.status(second['id'])[0]['status'] == RUNNING
+
+    # Draining refuses new jobs and finishes once the running one is done
+    assert [j['id'] for j in daemon.stop()] == [second['id']]
+    with pytest.raises(DaemonError):
+        daemon.submit('generate', source_sub='EMILIE', year='2025')
+    futures[second['id']].set_exception(RuntimeError("worker died"))
+    assert daemon._drained.is_set()
+    assert [j['status'] for j in daemon.status()] == [SUCCESS, FAILED, CANCELLED]
+
+def test_serves_clients(tmp_path, monkeypatch):
+    monkeypatch.setenv('MAPGEN_BACKEND', 'memory')
+    key_path = tmp_path / "key"
+    daemon = MapDaemon(tmp_path, workers=1, address=str(tmp_path / "daemon.sock"),
+                       settings=_settings(tmp_path), key_path=key_path)
+    daemon.start()
+    server = threading.Thread(target=daemon.serve_forever)
+    server.start()
+    try:
+        client = connect(key_path)
+        assert client is not None
+        with pytest.raises(DaemonError, match="Missing output_path"):
+            client.submit('export', input_path="map.mxd")
+
+        job = client.submit('export', input_path=str(tmp_path / "missing.mxd"),
+                            output_path=str(tmp_path / "missing.pdf"))
+        job = client.wait(job['id'], timeout=30)
+        assert job['status'] == FAILED
+        assert job['result']['error']
+    finally:
+        DaemonClient(key_path).stop()
+        server.join(30)
+
+    assert not server.is_alive()
+    assert not key_path.exists()
+    assert connect(key_path) is None
+
+def test_mirror_is_refreshed_between_jobs(tmp_path, monkeypatch):
+    daemon = MapDaemon(tmp_path, workers=2, settings=_settings(tmp_path), key_path=tmp_path / "key")
+    futures = {}
+    daemon._submit = lambda job: futures.setdefault(job['id'], Future())
+    refreshes = []
+    monkeypatch.setattr("scripts.source_mirror.refresh_mirror", lambda settings: refreshes.append(1))
+
+    first = daemon.submit('generate', source_sub='EMILIE', year='2025')
+    daemon.submit('generate', source_sub='WOODBOURNE', year='2025')
+    assert len(refreshes) == 1
+
+    # Not while the other job may still be reading the mirror
+    futures[first['id']].set_result({'status': 'Success', 'exports': []})
+    daemon.submit('generate', source_sub='FALLSINGTON', year='2025')
+    assert len(refreshes) == 1
+
+    for future in list(futures.values()):
+        if not future.done():
+            future.set_result({'status': 'Success', 'exports': []})
+    daemon.submit('generate', source_sub='EMILIE', year='2025')
+    assert len(refreshes) == 2
@@ -0,0 +1,51 @@
+import os
+import pytest
+from pathlib import Path
+from unittest.mock import Mock
+from scripts.document_cache import DocumentCache
+
+def make_templates(tmp_path, count):
+    paths = []
+    for i in range(count):
+        path = tmp_path / f"Template{i}.mxd"
+        path.touch()
+        paths.append(path)
+    return paths
+
+def test_cache_hit_reuses_document(tmp_path):
+    template, = make_templates(tmp_path, 1)
+    opener = Mock(side_effect=lambda path: Mock())
+    cache = DocumentCache(opener, max_size=2)
+
+    first = cache.get(template)
+    second = cache.get(template)
+
+    assert first is second
+    assert opener.call_count == 1
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+def test_lru_eviction_closes_oldest(tmp_path):
+    templates = make_templates(tmp_path, 3)
+    cache = DocumentCache(lambda path: Mock(), max_size=2)
+
+    oldest = cache.get(templates[0])
+    cache.get(templates[1])
+    cache.get(templates[2])
+
+    assert len(cache) == 2
+    assert templates[0] not in cache
+    oldest.close.assert_called_once()
+
+def test_modified_template_is_reopened(tmp_path):
+    template, = make_templates(tmp_path, 1)
+    cache = DocumentCache(lambda path: Mock(), max_size=2)
+
+    stale = cache.get(template)
+    mtime = template.stat().st_mtime
+    os.utime(template, (mtime + 10, mtime + 10))
+    fresh = cache.get(template)
+
+    assert fresh is not stale
+    assert len(cache) == 1
+    stale.close.assert_called_once()
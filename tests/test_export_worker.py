@@ -0,0 +1,39 @@
+from scripts.backends.memory_backend import InMemoryBackend
+from scripts.export_worker import _init_worker, largest_first
+from scripts.helpers.tracing import Tracer
+from scripts.run_history import RunHistory
+
+def _documents(tmp_path, sizes):
+    paths = {}
+    for name, size in sizes.items():
+        paths[name] = tmp_path / f"{name}.mxd"
+        paths[name].write_bytes(b"0" * size)
+    return paths
+
+def test_largest_first_by_size(tmp_path):
+    docs = _documents(tmp_path, {"small": 10, "large": 1000, "medium": 100})
+    order = largest_first(docs.values())
+    assert order == [docs["large"], docs["medium"], docs["small"]]
+
+def test_largest_first_prefers_history(tmp_path):
+    docs = _documents(tmp_path, {"small": 10, "large": 1000, "medium": 100, "new": 500})
+    # The small document is slow in practice; the new one has no history and
+    # is estimated at the median 0.01 s/byte, i.e. 5 s
+    durations = {str(docs["small"]): 60.0, str(docs["large"]): 10.0, str(docs["medium"]): 1.0}
+    order = largest_first(docs.values(), durations)
+    assert order == [docs["small"], docs["large"], docs["new"], docs["medium"]]
+
+def test_workers_record_export_durations(tmp_path, monkeypatch):
+    monkeypatch.setattr("scripts.backends._backend", InMemoryBackend())
+    tracer = Tracer()
+    monkeypatch.setattr("scripts.helpers.tracing.get_tracer", lambda: tracer)
+    history = RunHistory(tmp_path / "history.sqlite")
+    monkeypatch.setattr("scripts.run_history._history", history)
+    monkeypatch.setattr("scripts.run_history._listening", False)
+    monkeypatch.setattr("scripts.export_worker._file_handler", None)
+
+    _init_worker()
+    with tracer.span("pdf_export", substation="EMILIE", map_type="Internal"):
+        pass
+    assert history.expected("EMILIE", "pdf_export/Internal") is not None
+    history.close()
@@ -1,7 +1,11 @@
 import pytest
 from pathlib import Path
+from scripts.backends.memory_backend import InMemoryBackend
 from scripts.file_handler import FileHandler
 
+SOURCE = "/gisdata/share/Electric.gdb"
+XFMR_FIELDS = [("CIRCUIT1", "String", 20), ("CUSTOMER_COUNT", "Integer", 4)]
+
 def test_file_handler_initialization():
     handler = FileHandler()
     assert '.mxd' in handler.supported_extensions
@@ -12,3 +16,40 @@ def test_validate_file(tmp_path):
     test_file = tmp_path / "test.mxd"
     test_file.touch()
     assert handler.validate_file(test_file)
+
+@pytest.fixture
+def backend(monkeypatch, tmp_path):
+    backend = InMemoryBackend()
+    backend.load_table(f"{SOURCE}/XFMR", XFMR_FIELDS, [("13-01", 5), ("13-02", 7)])
+    backend.load_table(f"{SOURCE}/PriCond", [("CIRCUIT1", "String", 20), ("MCD_CODE", "String", 10)],
+                       [("13-01", "101"), ("13-02", "102")])
+    backend.register_workspace(str(tmp_path / "Working.gdb"))
+    monkeypatch.setattr("scripts.backends._backend", backend)
+    return backend
+
+def _intersect(tmp_path, force=False):
+    return FileHandler(cache_size=0).process_intersections(
+        f"{SOURCE}/XFMR", f"{SOURCE}/PriCond", str(tmp_path / "Working.gdb"), force=force)
+
+def test_unchanged_inputs_reuse_intersections(backend, tmp_path):
+    assert _intersect(tmp_path)
+    assert _intersect(tmp_path)
+    assert backend.call_counts['intersect'] == 1
+    assert (tmp_path / "Working_intersections.json").exists()
+
+    assert _intersect(tmp_path, force=True)
+    assert backend.call_counts['intersect'] == 2
+
+def test_changed_input_rebuilds_intersections(backend, tmp_path):
+    assert _intersect(tmp_path)
+    backend.load_table(f"{SOURCE}/XFMR", XFMR_FIELDS, [("13-01", 5), ("13-02", 7), ("13-02", 3)])
+    assert _intersect(tmp_path)
+    assert backend.call_counts['intersect'] == 2
+    assert backend.get_count(f"{tmp_path / 'Working.gdb'}\\XFMR_MCD") == 3
+
+def test_missing_output_rebuilds_intersections(backend, tmp_path):
+    assert _intersect(tmp_path)
+    backend.delete(f"{tmp_path / 'Working.gdb'}\\PriCond_MCD")
+    assert _intersect(tmp_path)
+    assert backend.call_counts['intersect'] == 2
+    assert backend.exists(f"{tmp_path / 'Working.gdb'}\\PriCond_MCD")
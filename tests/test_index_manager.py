@@ -0,0 +1,26 @@
+from scripts.backends.memory_backend import InMemoryBackend
+from scripts.helpers.index_manager import ensure_indexes, required_fields, missing_fields
+
+GDB = r"C:\work\Working2025.gdb"
+
+def test_required_fields_by_dataset_name():
+    assert 'ORIENTATION' in required_fields(r"C:\work\Working2025.gdb\XFMR_MCD")
+    assert required_fields("PriCond_EMILIE_MCD_Sum") == ['CIRCUIT1', 'MCD_CODE']
+    assert required_fields("SomethingElse") == []
+
+def test_missing_fields_is_case_insensitive():
+    assert missing_fields(['CIRCUIT1', 'MCD_CODE'], ['circuit1']) == ['MCD_CODE']
+
+def test_ensure_indexes(monkeypatch):
+    backend = InMemoryBackend()
+    monkeypatch.setattr("scripts.backends._backend", backend)
+    table = rf"{GDB}\PriCond_EMILIE_MCD_Sum"
+    backend.load_table(table, [("CIRCUIT1", "String", 20), ("MILES", "Double", 8)])
+    backend.add_index(table, ["CIRCUIT1"], "IDX_CIRCUIT1")
+
+    assert ensure_indexes(table) == {'CIRCUIT1': 'hit', 'MCD_CODE': 'no field'}
+
+    backend.add_field(table, "MCD_CODE", "TEXT", field_length=10)
+    assert ensure_indexes(table) == {'CIRCUIT1': 'hit', 'MCD_CODE': 'created'}
+    assert ensure_indexes(table) == {'CIRCUIT1': 'hit', 'MCD_CODE': 'hit'}
+    assert backend.call_counts['add_index'] == 2
@@ -0,0 +1,46 @@
+import pytest
+from scripts.backends.memory_backend import InMemoryBackend
+from scripts.helpers.config_utils import ConfigurationError
+from scripts.intermediate import IntermediateStore, is_memory
+
+GDB = r"C:\data\Working.gdb"
+SCRATCH = r"C:\temp\scratch.gdb"
+FIELDS = [("CIRCUIT1", "String", 20), ("MCD_CODE", "String", 10)]
+
+@pytest.fixture
+def backend(monkeypatch):
+    backend = InMemoryBackend()
+    backend.register_workspace(GDB)
+    monkeypatch.setattr("scripts.backends._backend", backend)
+    return backend
+
+def test_is_memory():
+    assert is_memory(r"memory\XFMR_MCD")
+    assert is_memory("in_memory/PriCond_MCD")
+    assert not is_memory(rf"{GDB}\XFMR_MCD")
+
+def test_workspace_tier_writes_tables_in_place(backend):
+    store = IntermediateStore(GDB, 'workspace', SCRATCH)
+    assert store.intersection_workspace == SCRATCH
+    assert store.table("XFMR_EMILIE_MCD_Sum") == rf"{GDB}\XFMR_EMILIE_MCD_Sum"
+    store.promote(store.table("XFMR_EMILIE_MCD_Sum"))
+    assert store.flush() == []
+
+def test_promotes_tables_in_one_copy(backend):
+    store = IntermediateStore(GDB, 'memory')
+    old = backend.load_table(rf"{GDB}\XFMR_EMILIE_MCD_Sum", FIELDS, [("13-01", "101")])
+    for name in ("XFMR_EMILIE_MCD_Sum", "PriCond_EMILIE_MCD_Sum"):
+        backend.load_table(store.table(name), FIELDS, [("13-02", "102")])
+        store.promote(store.table(name))
+
+    targets = store.flush()
+    assert targets == [rf"{GDB}\XFMR_EMILIE_MCD_Sum", rf"{GDB}\PriCond_EMILIE_MCD_Sum"]
+    assert backend.call_counts['table_to_geodatabase'] == 1
+    # The previous run's table is replaced, not kept beside a renamed copy
+    assert backend._table(targets[0]) is not old
+    assert not backend.exists(rf"{GDB}\XFMR_EMILIE_MCD_Sum_1")
+    assert store.pending == []
+
+def test_unknown_tier(backend):
+    with pytest.raises(ConfigurationError):
+        IntermediateStore(GDB, 'ramdisk')
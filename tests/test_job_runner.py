@@ -0,0 +1,79 @@
+import threading
+from scripts.job_runner import JobRunner, SUCCESS, FAILED, CANCELLED
+from scripts.map_generator import GenerationCancelled
+
+class FakeGenerator:
+    """Generator whose BLOCK substation runs until it is cancelled."""
+
+    def __init__(self, cancel_event):
+        self.cancel_event = cancel_event
+        self.progress = None
+        self.started = threading.Event()
+
+    def process_intersections(self, force=False):
+        return True
+
+    def generate_maps(self, source_sub, year, force=False):
+        self.progress.update(50, "Exporting")
+        if source_sub == 'BLOCK':
+            self.started.set()
+            self.cancel_event.wait(5)
+            raise GenerationCancelled("Cancelled before exporting")
+        return source_sub != 'BAD'
+
+def _runner(tmp_path):
+    runner = JobRunner(tmp_path)
+    generator = FakeGenerator(runner.cancel_event)
+    runner._get_generator = lambda: generator
+    return runner, generator
+
+def _drain(runner):
+    assert runner.wait(timeout=5)
+    runner.stop(timeout=5)
+    events = []
+    while not runner.events.empty():
+        events.append(runner.events.get())
+    return events
+
+def test_jobs_run_in_order(tmp_path):
+    runner, _ = _runner(tmp_path)
+    good = runner.submit('EMILIE', '2025')
+    bad = runner.submit('BAD', '2025')
+    events = _drain(runner)
+
+    assert (good.status, bad.status) == (SUCCESS, FAILED)
+    assert [e['type'] for e in events if e['job'] is good] == ['started', 'progress', 'progress', 'finished']
+
+def test_cancel_running_and_queued_jobs(tmp_path):
+    runner, generator = _runner(tmp_path)
+    running = runner.submit('BLOCK', '2025')
+    queued = runner.submit('EMILIE', '2025')
+    assert generator.started.wait(5)
+
+    runner.cancel(queued)
+    runner.cancel()
+    _drain(runner)
+    assert running.status == CANCELLED
+    assert queued.status == CANCELLED
+
+class FakeDaemon:
+    """Daemon client whose jobs finish on the second status query."""
+
+    def __init__(self):
+        self.queries = 0
+
+    def submit(self, job_type, **args):
+        return {'id': 1, 'status': 'Queued', 'error': None}
+
+    def status(self, job_id):
+        self.queries += 1
+        status = 'Running' if self.queries < 2 else 'Failed'
+        return [{'id': job_id, 'status': status, 'error': "Failed to generate maps"}]
+
+def test_jobs_run_on_daemon(tmp_path, monkeypatch):
+    monkeypatch.setattr('scripts.job_runner.DAEMON_POLL_INTERVAL', 0.01)
+    runner = JobRunner(tmp_path, daemon=FakeDaemon())
+    job = runner.submit('EMILIE', '2025')
+    _drain(runner)
+    assert job.status == FAILED
+    assert job.error == "Failed to generate maps"
@@ -0,0 +1,86 @@
+import os
+import time
+import threading
+import pytest
+from scripts.lock_coordinator import (
+    AdvisoryLock,
+    Backoff,
+    LockCoordinator,
+    LockTimeout,
+    is_lock_error
+)
+
+class LockError(Exception):
+    pass
+
+def _coordinator(**kwargs):
+    delays = []
+    coordinator = LockCoordinator(backoff=Backoff(base=0.01, cap=0.05), sleep=delays.append, **kwargs)
+    return coordinator, delays
+
+def test_backoff_grows_with_jitter_up_to_cap():
+    backoff = Backoff(base=1.0, cap=8.0)
+    for attempt, full in enumerate([1.0, 2.0, 4.0, 8.0, 8.0]):
+        delay = backoff.delay(attempt)
+        assert full / 2 <= delay <= full
+    assert backoff.delay(5000) <= 8.0
+
+def test_retry_only_lock_errors():
+    assert is_lock_error(LockError("ERROR 000464: Cannot get exclusive schema lock"))
+    coordinator, delays = _coordinator()
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise LockError("ERROR 160706: Cannot acquire a lock.")
+        return "done"
+
+    assert coordinator.retry(flaky) == "done"
+    assert len(delays) == 2
+    with pytest.raises(ValueError):
+        coordinator.retry(lambda: (_ for _ in ()).throw(ValueError("ERROR 000732")))
+
+def test_retry_gives_up_after_max_wait():
+    coordinator = LockCoordinator(max_wait=0.05, backoff=Backoff(base=0.02, cap=0.02))
+
+    def locked():
+        raise LockError("ERROR 000601: Failed to delete")
+
+    with pytest.raises(LockTimeout):
+        coordinator.retry(locked)
+
+def test_exclusive_queues_in_arrival_order(tmp_path):
+    coordinator = LockCoordinator(backoff=Backoff(base=0.01, cap=0.02))
+    workspace = tmp_path / "Working.gdb"
+    order = []
+
+    def run(name, delay, hold):
+        time.sleep(delay)
+        with coordinator.exclusive(workspace, "intersections"):
+            order.append(name)
+            time.sleep(hold)
+
+    threads = [threading.Thread(target=run, args=("first", 0, 0.3)),
+               threading.Thread(target=run, args=("second", 0.05, 0)),
+               threading.Thread(target=run, args=("third", 0.1, 0))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert order == ["first", "second", "third"]
+    lock_dir = tmp_path / "Working.gdb.locks"
+    assert not (lock_dir / "intersections.lock").exists()
+    assert list((lock_dir / "intersections.queue").iterdir()) == []
+
+def test_abandoned_lock_is_broken(tmp_path):
+    crashed = AdvisoryLock(tmp_path / "Working.gdb.locks", "intersections", stale_after=60)
+    crashed.take_ticket()
+    assert crashed.try_acquire()
+    old = time.time() - 120
+    os.utime(crashed.path, (old, old))
+
+    coordinator = LockCoordinator(max_wait=5, stale_after=60)
+    with coordinator.exclusive(tmp_path / "Working.gdb", "intersections"):
+        assert crashed.holder()['token'] != crashed.owner['token']
@@ -0,0 +1,62 @@
+import os
+import gzip
+import time
+import logging
+from scripts.helpers.logging_utils import (
+    BatchingRotatingFileHandler,
+    get_logger,
+    add_log_file,
+    flush_logs,
+    housekeep_logs,
+    _get_listener
+)
+
+def _record(message):
+    return logging.LogRecord("test", logging.INFO, __file__, 1, message, None, None)
+
+def test_records_are_written_in_batches(tmp_path):
+    path = tmp_path / "run.log"
+    handler = BatchingRotatingFileHandler(path, batch_size=3)
+    handler.emit(_record("one"))
+    handler.emit(_record("two"))
+    assert not path.exists()
+    handler.emit(_record("three"))
+    assert path.read_text().count("\n") == 3
+
+def test_rotates_by_size_and_compresses(tmp_path):
+    path = tmp_path / "run.log"
+    handler = BatchingRotatingFileHandler(path, max_bytes=200, batch_size=1)
+    for i in range(10):
+        handler.emit(_record(f"message {i:02d} " + "x" * 40))
+
+    deadline = time.time() + 5
+    while not list(tmp_path.glob("run.*.log.gz")) and time.time() < deadline:
+        time.sleep(0.05)
+    rotated = list(tmp_path.glob("run.*.log.gz"))
+    assert rotated
+    assert b"message" in gzip.open(rotated[0]).read()
+    assert path.stat().st_size <= 200
+
+def test_housekeeping_deletes_expired_logs(tmp_path):
+    old = tmp_path / "pipeline_20240101_000000.log"
+    recent = tmp_path / "pipeline_20990101_000000.log"
+    old.write_text("old")
+    recent.write_text("recent")
+    month_ago = time.time() - 30 * 86400
+    os.utime(old, (month_ago, month_ago))
+
+    housekeep_logs(tmp_path, "pipeline_*.log*", retention_days=14, compress=True,
+                   compress_after=86400)
+    assert not old.exists()
+    # Too recent to compress: another run may still be writing it
+    assert recent.exists()
+
+def test_logger_writes_through_the_queue(tmp_path):
+    path = tmp_path / "queued.log"
+    handler = add_log_file(path)
+    try:
+        get_logger("tests.queued").info("queued message")
+        flush_logs()
+        assert "queued message" in path.read_text()
+    finally:
+        _get_listener().remove_handler(handler)
@@ -0,0 +1,78 @@
+import pytest
+import yaml
+from scripts.backends.memory_backend import InMemoryBackend
+from scripts.backends.synthetic import PRICOND_FIELDS, seed_network
+from scripts.map_generator import MapGenerator
+
+@pytest.fixture
+def generator(tmp_path, monkeypatch):
+    workspace = tmp_path / "GDB" / "Working.gdb"
+    workspace.mkdir(parents=True)
+    settings = {
+        'paths': {
+            'workspace': workspace.as_posix(),
+            'mxd_input': tmp_path.as_posix(),
+            'aprx_input': tmp_path.as_posix(),
+            'pdf_output': tmp_path.as_posix(),
+            'logs': tmp_path.as_posix(),
+            'circuit_index': (tmp_path / "circuit_index.sqlite").as_posix(),
+            'history': (tmp_path / "run_history.sqlite").as_posix(),
+            'source_data': {
+                'xfmr': (tmp_path / "source" / "Electric.gdb" / "V_XFMR_PT").as_posix(),
+                'pricond': (tmp_path / "source" / "Electric.gdb" / "PriCond").as_posix(),
+                'mcd': (tmp_path / "source" / "Base.gdb" / "MCD").as_posix()
+            }
+        },
+        'options': {'default_year': "2025", 'resolution': 300},
+        'substations': ['EMILIE', 'WOODBOURNE']
+    }
+    settings_path = tmp_path / "settings.yaml"
+    settings_path.write_text(yaml.safe_dump(settings))
+    monkeypatch.setenv('MAPGEN_SETTINGS', str(settings_path))
+
+    backend = InMemoryBackend()
+    seed_network(backend, settings, circuits_per_substation=5)
+    monkeypatch.setattr("scripts.backends._backend", backend)
+    return MapGenerator(workspace)
+
+def test_circuit_lookup_does_not_rescan_after_other_runs(generator):
+    backend = generator.backend
+    circuits = generator.get_circuits('EMILIE')
+    assert len(circuits) == 5
+    assert backend.call_counts['search_cursor'] == 1
+
+    # Another substation's run writes its summaries into the working gdb
+    (generator.workspace / "a0000000b.gdbtable").write_bytes(b"WOODBOURNE summaries")
+    generator.get_circuits('WOODBOURNE')
+    assert generator.get_circuits('EMILIE') == circuits
+    assert backend.call_counts['search_cursor'] == 2
+
+def test_circuit_universe_follows_the_intersections(generator):
+    backend = generator.backend
+    assert generator.process_intersections()
+    universe = generator._get_circuit_universe()
+    assert len(universe) == 10
+    scans = backend.call_counts['search_cursor']
+
+    # Selection key tables come and go in the same gdb for every substation
+    generator._write_key_table('EMILIE', universe[:5])
+    (generator.workspace / "a0000000c.gdbtable").write_bytes(b"SEL_EMILIE_Keys")
+    generator._drop_key_tables()
+    assert generator._get_circuit_universe() == universe
+    assert backend.call_counts['search_cursor'] == scans
+
+    pricond = generator.config['paths']['source_data']['pricond']
+    backend.load_table(pricond, PRICOND_FIELDS,
+                       [("99-001", "00001", "MCD 1", "OVERHEAD", 100.0)])
+    assert generator.process_intersections()
+    assert generator._get_circuit_universe() == ["99-001"]
+    assert backend.call_counts['search_cursor'] == scans + 1
+
+def test_failed_statistics_release_the_layers(generator, monkeypatch):
+    assert generator.process_intersections()
+    def fail(*args, **kwargs):
+        raise generator.backend.ExecuteError("ERROR 999999: statistics failed")
+    monkeypatch.setattr(generator.veg_processor.stats_engine, 'summarize_table', fail)
+
+    assert not generator.veg_processor.process_vegetation_data('EMILIE', "CIRCUIT1 = '01-001'")
+    assert generator.backend.layers == {}
@@ -0,0 +1,67 @@
+import pytest
+from scripts.backends.base import GeoprocessingBackend
+from scripts.backends.memory_backend import InMemoryBackend, LatencyModel
+from scripts.stats_engine import ArcpyStatsEngine, NumpyStatsEngine
+
+GDB = r"C:\data\Electric.gdb"
+
+@pytest.fixture
+def backend():
+    backend = InMemoryBackend()
+    backend.load_table(f"{GDB}\\PriCond", [
+        ("CIRCUIT1", "String", 20), ("MCD_CODE", "String", 10),
+        ("MCD_NAME", "String", 50), ("SHAPE_Length", "Double", 8)
+    ], [
+        ("13-01", "101", "BRISTOL", 5280.0),
+        ("13-01", "101", "BRISTOL", 2640.0),
+        ("13-02", "102", "LOWER MAKEFIELD", 1000.0)
+    ])
+    backend.load_table(f"{GDB}\\XFMR", [("CIRCUIT1", "String", 20), ("CUSTOMER_COUNT", "Integer", 4)],
+                       [("13-01", 5), ("13-02", 7), ("99-99", 1)])
+    return backend
+
+def test_intersect_joins_on_circuit(backend):
+    backend.intersect([f"{GDB}\\XFMR", f"{GDB}\\PriCond"], f"{GDB}\\XFMR_MCD")
+    with backend.search_cursor(f"{GDB}\\XFMR_MCD", ["CIRCUIT1", "MCD_CODE", "CUSTOMER_COUNT"]) as cursor:
+        assert sorted(cursor) == [("13-01", "101", 5), ("13-02", "102", 7)]
+
+def test_layers_filter_and_relative_names(backend):
+    backend.env.workspace = GDB
+    backend.make_feature_layer("PriCond", "lyr", "CIRCUIT1 = '13-01'")
+    assert backend.get_count("lyr") == 2
+    backend.copy("lyr", "PriCond_Copy")
+    assert backend.exists(f"{GDB}\\pricond_copy")
+    backend.delete("PriCond_Copy")
+    assert not backend.exists("PriCond_Copy")
+    with pytest.raises(backend.ExecuteError):
+        backend.delete("PriCond_Copy")
+
+@pytest.mark.parametrize("engine", [ArcpyStatsEngine(), NumpyStatsEngine()])
+def test_stats_engines_agree(backend, engine, monkeypatch):
+    monkeypatch.setattr("scripts.backends._backend", backend)
+    out = f"{GDB}\\Sum"
+    engine.summarize_table(f"{GDB}\\PriCond", out, "SHAPE_Length", "EMILIE", to_miles=True)
+    with backend.search_cursor(out, ["CIRCUIT1", "FREQUENCY", "Miles", "Circuit_MCD", "SUB"]) as cursor:
+        rows = sorted(cursor)
+    assert rows == [("13-01", 2, 1.5, "13-01_BRISTOL", "EMILIE"),
+                    ("13-02", 1, 0.19, "13-02_LOWER MAKEFIELD", "EMILIE")]
+
+def test_latency_model():
+    model = LatencyModel.from_config({'scale': 2.0, 'operations': {'intersect': {'call': 1.0, 'per_row': 0.5}}})
+    assert model.cost('intersect', rows=4) == pytest.approx(6.0)
+    assert model.cost('copy') == 0.0
+
+def test_export_pdf_writes_placeholder(backend, tmp_path):
+    document = backend.open_document(tmp_path / "Template.aprx")
+    layout = backend.list_layouts(document)[0]
+    backend.export_pdf(layout, tmp_path / "out.pdf")
+    assert (tmp_path / "out.pdf").read_bytes().startswith(b"%PDF")
+    assert backend.call_counts['export_pdf'] == 1
+
+def test_incomplete_backend_fails_on_creation():
+    class PartialBackend(GeoprocessingBackend):
+        def exists(self, dataset):
+            return True
+
+    with pytest.raises(TypeError, match="abstract"):
+        PartialBackend()
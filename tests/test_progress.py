@@ -0,0 +1,68 @@
+import io
+import json
+import pytest
+from scripts.helpers.progress import (
+    Progress,
+    ProgressSink,
+    LogSink,
+    ConsoleSink,
+    NdjsonSink,
+    configure_progress,
+    get_sinks
+)
+
+class ListSink(ProgressSink):
+    def __init__(self, min_interval=60.0):
+        super().__init__(min_interval)
+        self.events = []
+
+    def emit(self, event):
+        self.events.append(event)
+
+def test_hot_loop_updates_are_coalesced():
+    sink = ListSink()
+    progress = Progress("Field update", total_steps=None, sinks=[sink])
+    progress.update(0, "Updating table")
+    for _ in range(10000):
+        progress.advance()
+    progress.complete("Updated 10000 rows")
+
+    # The first update and the final one; everything in between is dropped
+    assert [e.step for e in sink.events] == [0, 10000]
+    assert sink.events[-1].done
+
+def test_stage_changes_always_pass():
+    sink = ListSink()
+    progress = Progress("Map Generation", sinks=[sink])
+    progress.update(10, "Building SQL expression...")
+    progress.update(15, "Building SQL expression...")
+    progress.update(20, "Processing vegetation data...")
+    progress.complete()
+    assert [e.step for e in sink.events] == [10, 20, 100]
+
+def test_remaining_from_expected_duration():
+    progress = Progress("Map Generation", sinks=[], expected_duration=100.0)
+    progress.update(50)
+    # History says 100 s in total, regardless of the steps done
+    assert progress.remaining(10.0) == 90.0
+    # Overrun: fall back to extrapolating from the steps done
+    assert progress.remaining(120.0) == 120.0
+
+def test_ndjson_sink():
+    stream = io.StringIO()
+    progress = Progress("Export", total_steps=4, sinks=[NdjsonSink(stream)])
+    progress.update(1, "Exporting documents")
+    progress.complete("Exported 4 documents")
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [(r['step'], r['total'], r['done']) for r in records] == [(1, 4, False), (4, 4, True)]
+
+def test_configure_progress(monkeypatch):
+    # Restored afterwards by monkeypatch
+    monkeypatch.setenv('MAPGEN_PROGRESS', 'log')
+    configure_progress(['console', 'log'])
+    try:
+        assert [type(s) for s in get_sinks()] == [ConsoleSink, LogSink]
+        with pytest.raises(ValueError):
+            configure_progress(['fancy'])
+    finally:
+        configure_progress(['log'])
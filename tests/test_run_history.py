@@ -0,0 +1,57 @@
+from scripts.run_history import RunHistory, longest_first, KEEP
+from scripts.helpers.tracing import Tracer
+
+def test_expected_is_median_of_recent_runs(tmp_path):
+    history = RunHistory(tmp_path / "history.sqlite")
+    for duration in (10.0, 12.0, 100.0):
+        history.record("EMILIE", "generate_maps", duration)
+
+    assert history.expected("EMILIE", "generate_maps") == 12.0
+    assert history.expected("EMILIE", "vegetation") is None
+    assert history.expected_all(["EMILIE", "WOODBOURNE"], "generate_maps") == {"EMILIE": 12.0}
+    history.close()
+
+def test_old_runs_are_pruned(tmp_path):
+    history = RunHistory(tmp_path / "history.sqlite")
+    for i in range(KEEP + 5):
+        history.record("EMILIE", "generate_maps", float(i))
+    count, = history.conn.execute("SELECT COUNT(*) FROM durations").fetchone()
+    assert count == KEEP
+    history.close()
+
+def test_longest_first():
+    expected = {"A": 5.0, "B": 50.0, "C": 20.0}
+    # D has no history and is assumed to take the median, 20 s
+    assert longest_first(["A", "B", "C", "D"], expected) == ["B", "C", "D", "A"]
+    assert longest_first(["A", "B"], {}) == ["A", "B"]
+
+def test_records_substation_spans(tmp_path):
+    history = RunHistory(tmp_path / "history.sqlite")
+    tracer = Tracer()
+    tracer.add_listener(history.record_span)
+
+    with tracer.span("generate_maps", substation="emilie") as run_span:
+        with tracer.span("pdf_export", substation="emilie", map_type="Internal"):
+            pass
+        with tracer.span("statistics", substation="emilie"):
+            pass
+        run_span.set(success=True, exported=1)
+    with tracer.span("intersect"):
+        pass
+
+    stages = {row[0] for row in history.conn.execute("SELECT stage FROM durations WHERE job = 'EMILIE'")}
+    assert stages == {"generate_maps", "pdf_export/Internal"}
+    history.close()
+
+def test_failed_and_up_to_date_runs_are_not_recorded(tmp_path):
+    history = RunHistory(tmp_path / "history.sqlite")
+    tracer = Tracer()
+    tracer.add_listener(history.record_span)
+
+    with tracer.span("generate_maps", substation="EMILIE") as run_span:
+        run_span.set(success=False, exported=2)
+    with tracer.span("generate_maps", substation="EMILIE") as run_span:
+        run_span.set(success=True, exported=0)
+
+    assert history.expected("EMILIE", "generate_maps") is None
+    history.close()
@@ -0,0 +1,74 @@
+import pytest
+from scripts.run_ledger import (
+    RunLedger,
+    read_ledger,
+    list_runs,
+    summarize_runs,
+    compare_runs,
+    compact_ledger
+)
+
+def _record_run(path, run_id, durations):
+    with RunLedger(path, run_id) as ledger:
+        for name, duration in durations.items():
+            ledger.record(f"{name}.mxd", f"{name}.pdf", "Success", duration, output_bytes=100)
+
+def test_records_are_streamed_with_one_header(tmp_path):
+    path = tmp_path / "ledger.csv"
+    ledger = RunLedger(path, "run1")
+    ledger.record("a.mxd", "a.pdf", "Success", 1.25, output_bytes=2048)
+    # Flushed before the ledger is closed
+    assert len(read_ledger(path)) == 1
+    ledger.close()
+
+    _record_run(path, "run2", {"a": 1.0})
+    assert path.read_text().count("run_id") == 1
+
+    records = read_ledger(path)
+    assert list_runs(records) == ["run1", "run2"]
+    assert records[0]["duration"] == 1.25
+    assert records[0]["output_bytes"] == 2048
+    assert [r["run_id"] for r in read_ledger(path, run_ids=["run2"])] == ["run2"]
+
+def test_output_size_read_from_disk(tmp_path):
+    output = tmp_path / "map.pdf"
+    output.write_bytes(b"%PDF-1.4" + b"0" * 92)
+    with RunLedger(tmp_path / "ledger.csv", "run1") as ledger:
+        row = ledger.record("map.mxd", output, "Success", 0.5)
+    assert row["output_bytes"] == 100
+
+def test_summarize_runs(tmp_path):
+    path = tmp_path / "ledger.csv"
+    with RunLedger(path, "run1") as ledger:
+        ledger.record("a.mxd", "a.pdf", "Success", 1.0, output_bytes=10)
+        ledger.record("b.mxd", "b.pdf", "Success", 3.0, output_bytes=20)
+        ledger.record("c.mxd", "c.pdf", "Failed", 0.2, error="boom")
+        ledger.record("d.mxd", "d.pdf", "Skipped", 0.0)
+
+    summary, = summarize_runs(read_ledger(path))
+    assert summary["files"] == 4
+    assert summary["failed"] == 1
+    assert summary["skipped"] == 1
+    assert summary["total_duration"] == 4.0
+    assert summary["median_duration"] == 2.0
+    assert summary["output_bytes"] == 30
+
+def test_compare_runs_reports_slowdowns(tmp_path):
+    path = tmp_path / "ledger.csv"
+    _record_run(path, "base", {"a": 2.0, "b": 2.0, "c": 0.1, "d": 1.0})
+    _record_run(path, "cand", {"a": 2.1, "b": 5.0, "c": 0.4, "e": 9.0})
+
+    slowdowns = compare_runs(read_ledger(path), "base", "cand", threshold=1.25, min_duration=0.5)
+    # c is below min_duration, e has no baseline
+    assert [s["file"] for s in slowdowns] == ["b.pdf"]
+    assert slowdowns[0]["ratio"] == 2.5
+
+def test_compact_ledger(tmp_path):
+    pytest.importorskip("pyarrow")
+    pd = pytest.importorskip("pandas")
+    path = tmp_path / "ledger.csv"
+    _record_run(path, "run1", {"a": 1.0, "b": 2.0})
+
+    parquet = compact_ledger(path)
+    assert parquet == tmp_path / "ledger.parquet"
+    assert len(pd.read_parquet(parquet)) == 2
@@ -0,0 +1,43 @@
+import pytest
+from scripts.selection import SelectionBuilder, contiguous_runs, quote
+
+UNIVERSE = [f"13-{i:03d}" for i in range(1000)]
+
+def test_small_selection_uses_in_list():
+    builder = SelectionBuilder()
+    assert builder.build(['13-002', '13-001']) == "CIRCUIT1 IN ('13-001','13-002')"
+
+def test_quote_escapes_strings():
+    assert quote("O'NEILL") == "'O''NEILL'"
+    assert quote(12) == "12"
+
+def test_contiguous_runs_respect_universe():
+    runs = contiguous_runs(['13-001', '13-002', '13-004'], ['13-001', '13-002', '13-003', '13-004'])
+    assert runs == [('13-001', '13-002'), ('13-004', '13-004')]
+
+def test_range_strategy_for_contiguous_selection():
+    builder = SelectionBuilder(in_list_limit=10)
+    selected = UNIVERSE[100:400]
+    assert builder.choose_strategy(selected, UNIVERSE) == 'range'
+    assert builder.build(selected, UNIVERSE) == \
+        "((CIRCUIT1 >= '13-100' AND CIRCUIT1 <= '13-399'))"
+
+def test_chunked_strategy_for_scattered_selection():
+    builder = SelectionBuilder(in_list_limit=10, chunk_size=100, max_ranges=5)
+    selected = UNIVERSE[::2]
+    expression = builder.build(selected, UNIVERSE)
+    assert builder.choose_strategy(selected, UNIVERSE) == 'chunked'
+    assert expression.count(" IN (") == 5
+
+def test_join_strategy_uses_key_table():
+    written = []
+    builder = SelectionBuilder(in_list_limit=10, max_ranges=5, join_threshold=100,
+                               key_table_writer=lambda keys: written.append(keys) or "SEL_Keys")
+    expression = builder.build(UNIVERSE[::2], UNIVERSE)
+    assert expression == "CIRCUIT1 IN (SELECT CIRCUIT1 FROM SEL_Keys)"
+    assert len(written[0]) == 500
+
+def test_letters_disable_range_strategy():
+    universe = [f"A{i:03d}" for i in range(100)]
+    builder = SelectionBuilder(in_list_limit=10)
+    assert builder.choose_strategy(universe[:50], universe) == 'chunked'
@@ -0,0 +1,79 @@
+import os
+import pytest
+from scripts.backends.memory_backend import InMemoryBackend
+from scripts.helpers.fingerprint import FingerprintStore
+from scripts.lock_coordinator import Backoff, LockCoordinator, LockTimeout
+from scripts.source_mirror import SourceMirror
+
+SOURCE = r"\\gisdata\share\Electric.gdb\PriCond"
+FIELDS = [("CIRCUIT1", "String", 20), ("MCD_CODE", "String", 10)]
+
+@pytest.fixture
+def backend(monkeypatch):
+    backend = InMemoryBackend()
+    backend.load_table(SOURCE, FIELDS, [("13-01", "101"), ("13-02", "102")])
+    monkeypatch.setattr("scripts.backends._backend", backend)
+    return backend
+
+def test_refresh_copies_only_changed_sources(backend, tmp_path):
+    mirror = SourceMirror(tmp_path, {'pricond': SOURCE})
+    assert mirror.refresh() == {'pricond': 'refreshed'}
+    assert mirror.refresh() == {'pricond': 'current'}
+    assert backend.call_counts['copy'] == 1
+
+    backend.load_table(SOURCE, FIELDS, [("13-01", "101"), ("13-02", "102"), ("13-03", "103")])
+    assert mirror.refresh() == {'pricond': 'refreshed'}
+    assert backend.get_count(mirror.resolve('pricond')) == 3
+
+def test_resolve_falls_back_to_source(backend, tmp_path):
+    mirror = SourceMirror(tmp_path, {'pricond': SOURCE})
+    assert mirror.resolve('pricond') == SOURCE
+
+    mirror.refresh()
+    local = mirror.resolve('pricond')
+    assert local != SOURCE
+    backend.delete(local)
+    assert mirror.resolve('pricond') == SOURCE
+
+def test_resolve_sees_another_process_refresh(backend, tmp_path):
+    reader = SourceMirror(tmp_path, {'pricond': SOURCE})
+    SourceMirror(tmp_path, {'pricond': SOURCE}).refresh()
+    assert reader.resolve('pricond') != SOURCE
+
+def test_template_refresh(backend, tmp_path):
+    template = tmp_path / "source" / "TemplateInternal_2025_11x17.mxd"
+    template.parent.mkdir()
+    template.write_bytes(b"v1")
+    mirror = SourceMirror(tmp_path / "mirror", {'pricond': SOURCE})
+
+    local = mirror.resolve_template(template)
+    assert local != template and local.read_bytes() == b"v1"
+    assert mirror.resolve_template(template) == local
+
+    template.write_bytes(b"version 2")
+    mtime = template.stat().st_mtime + 10
+    os.utime(template, (mtime, mtime))
+    assert mirror.resolve_template(template).read_bytes() == b"version 2"
+
+    # A missing source is read in place rather than failing the export
+    missing = tmp_path / "source" / "Missing.mxd"
+    assert mirror.resolve_template(missing) == missing
+
+def test_refresh_keeps_entries_of_other_processes(backend, tmp_path):
+    template = tmp_path / "TemplateInternal_2025_11x17.mxd"
+    template.write_bytes(b"v1")
+    long_lived = SourceMirror(tmp_path / "mirror", {'pricond': SOURCE})
+    SourceMirror(tmp_path / "mirror", {'pricond': SOURCE}).resolve_template(template)
+
+    long_lived.refresh()
+    state = FingerprintStore(tmp_path / "mirror" / "mirror_state.json")
+    assert f"template:{template}" in state and 'pricond' in state
+
+def test_refresh_waits_for_readers(backend, tmp_path):
+    locks = LockCoordinator(max_wait=0.2, backoff=Backoff(0.01, 0.05))
+    reader = SourceMirror(tmp_path, {'pricond': SOURCE}, locks)
+    with reader.lock():
+        with pytest.raises(LockTimeout):
+            SourceMirror(tmp_path, {'pricond': SOURCE}, locks).refresh()
+    assert backend.call_counts['copy'] == 0
+    assert reader.refresh() == {'pricond': 'refreshed'}
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+from scripts.stats_engine import summarize_arrays, get_stats_engine, NumpyStatsEngine
+
+COLUMNS = {
+    'CIRCUIT1': np.array(['13-01', '13-01', '13-02', '13-01']),
+    'MCD_CODE': np.array([101, 101, 102, 102]),
+    'MCD_NAME': np.array(['BRISTOL', 'BRISTOL', 'LOWER MAKEFIELD', 'LOWER MAKEFIELD']),
+    'SHAPE_Length': np.array([5280.0, 2640.0, 1000.0, 528.0])
+}
+
+def test_grouped_sums_and_derived_fields():
+    summary = summarize_arrays(COLUMNS, 'SHAPE_Length', 'EMILIE', to_miles=True)
+
+    assert len(summary) == 3
+    first = summary[0]
+    assert first['CIRCUIT1'] == '13-01'
+    assert first['MCD_CODE'] == 101
+    assert first['FREQUENCY'] == 2
+    assert first['SUM_SHAPE_Length'] == pytest.approx(7920.0)
+    assert first['Miles'] == pytest.approx(1.5)
+    assert first['Circuit_MCD'] == '13-01_BRISTOL'
+    assert set(summary['SUB']) == {'EMILIE'}
+
+def test_miles_null_without_conversion():
+    columns = dict(COLUMNS, CUSTOMER_COUNT=np.array([3, 4, 5, 6]))
+    summary = summarize_arrays(columns, 'CUSTOMER_COUNT', 'EMILIE')
+    assert list(summary['SUM_CUSTOMER_COUNT']) == [7, 6, 5]
+    assert np.isnan(summary['Miles']).all()
+
+def test_empty_input():
+    empty = {field: values[:0] for field, values in COLUMNS.items()}
+    summary = summarize_arrays(empty, 'SHAPE_Length', 'EMILIE', to_miles=True)
+    assert len(summary) == 0
+
+def test_engine_selected_from_config():
+    assert isinstance(get_stats_engine({'options': {'stats_engine': 'numpy'}}), NumpyStatsEngine)
@@ -2,17 +2,21 @@ import pytest
 from pathlib import Path
 from scripts.table_builder import TableBuilder
 
-def test_table_builder_initialization():
-    builder = TableBuilder()
-    assert len(builder.data) == 0
+def test_table_builder_initialization(tmp_path):
+    builder = TableBuilder(tmp_path / "ledger.csv")
+    assert builder.count == 0
+    assert not (tmp_path / "ledger.csv").exists()
 
-def test_add_entry():
-    builder = TableBuilder()
+def test_add_entry(tmp_path):
+    builder = TableBuilder(tmp_path / "ledger.csv")
     builder.add_entry(
         Path("input.mxd"),
         Path("output.pdf"),
         "Success",
         1.5
     )
-    assert len(builder.data) == 1
-    assert builder.data[0]["Status"] == "Success"
+    assert builder.count == 1
+    table = builder.build_summary_table()
+    assert len(table) == 1
+    assert table["status"][0] == "Success"
+    builder.close()
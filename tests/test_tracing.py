@@ -0,0 +1,51 @@
+import json
+import pytest
+from scripts.helpers import tracing
+from scripts.helpers.tracing import Tracer, configure_tracing, disable_tracing, merge_trace, read_spans
+
+@pytest.fixture
+def tracer(monkeypatch):
+    monkeypatch.setattr(tracing, '_tracer', Tracer())
+    yield tracing.get_tracer()
+    disable_tracing()
+
+def test_spans_nest_and_reach_listeners(tracer):
+    finished = []
+    tracer.add_listener(finished.append)
+
+    with tracer.span("generate_maps", substation="EMILIE") as outer:
+        with tracer.span("intersect", rows=10) as inner:
+            inner.set(output_rows=8)
+
+    assert [s.name for s in finished] == ["intersect", "generate_maps"]
+    assert finished[0].parent_id == outer.span_id
+    assert finished[0].attrs == {'rows': 10, 'output_rows': 8}
+    assert finished[1].duration >= finished[0].duration
+
+def test_failed_span_records_error(tracer):
+    finished = []
+    tracer.add_listener(finished.append)
+    with pytest.raises(ValueError):
+        with tracer.span("statistics"):
+            raise ValueError("bad field")
+    assert finished[0].status == 'error'
+    assert finished[0].error == "bad field"
+
+def test_jsonl_and_chrome_trace(tracer, tmp_path):
+    run_id = configure_tracing(tmp_path, "run1")
+    with tracer.span("pdf_export", map_type="Internal"):
+        pass
+
+    spans = read_spans(tmp_path.glob("run1.*.jsonl"))
+    assert spans[0]['attrs'] == {'map_type': 'Internal'}
+
+    trace = json.loads(merge_trace(tmp_path, run_id).read_text())
+    event = trace['traceEvents'][0]
+    assert event['ph'] == 'X' and event['name'] == 'pdf_export'
+    assert event['args'] == {'map_type': 'Internal'}
+
+def test_spans_are_timed_but_not_recorded_when_disabled(tracer):
+    with tracer.span("config_load") as span:
+        pass
+    assert not span.recording
+    assert span.duration is not None
@@ -0,0 +1,31 @@
+import pytest
+from scripts.backends.where_clause import compile_where, WhereClauseError
+
+ROWS = [
+    {'CIRCUIT1': '13-01', 'ORIENTATION': 'OVERHEAD', 'SHAPE_LENGTH': 100.0},
+    {'CIRCUIT1': '13-02', 'ORIENTATION': 'UNDERGROUND CABLE', 'SHAPE_LENGTH': 250.0},
+    {'CIRCUIT1': '14-01', 'ORIENTATION': None, 'SHAPE_LENGTH': 50.0}
+]
+
+def select(where, resolve_subquery=None):
+    predicate = compile_where(where, resolve_subquery)
+    return [row['CIRCUIT1'] for row in ROWS if predicate(row)]
+
+def test_pipeline_expression():
+    where = "ORIENTATION <> 'UNDERGROUND CABLE' and CIRCUIT1 IN ('13-01','13-02')"
+    assert select(where) == ['13-01']
+
+def test_ranges_and_nulls():
+    assert select("(CIRCUIT1 >= '13-01' AND CIRCUIT1 <= '13-99') OR ORIENTATION IS NULL") == \
+        ['13-01', '13-02', '14-01']
+    assert select("circuit1 between '13-02' and '14-01' and not Shape_Length > 200") == ['14-01']
+
+def test_subquery():
+    assert select("CIRCUIT1 IN (SELECT CIRCUIT1 FROM SEL_Keys)",
+                  lambda table, field: {'14-01'}) == ['14-01']
+
+def test_empty_selection_and_errors():
+    assert select("1 = 0") == []
+    assert select(None) == ['13-01', '13-02', '14-01']
+    with pytest.raises(WhereClauseError):
+        compile_where("CIRCUIT1 IN ('13-01'")
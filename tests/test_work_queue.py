@@ -0,0 +1,79 @@
+import os
+import time
+import pytest
+from scripts.backends.memory_backend import InMemoryBackend
+from scripts.helpers.config_utils import Settings
+from scripts.work_queue import WorkQueue, QueueWorker, QueueError, PENDING, LEASED, DONE, FAILED
+
+def _age(path, seconds):
+    stamp = time.time() - seconds
+    os.utime(path, (stamp, stamp))
+
+def test_jobs_are_claimed_once_in_order(tmp_path):
+    coordinator = WorkQueue(tmp_path)
+    for sub in ("EMILIE", "WOODBOURNE"):
+        coordinator.enqueue('generate', source_sub=sub, year='2025')
+    with pytest.raises(QueueError):
+        coordinator.enqueue('generate', source_sub='EMILIE')
+
+    host_a, host_b = WorkQueue(tmp_path), WorkQueue(tmp_path)
+    first = host_a.claim("gisapp-omf-01:100")
+    second = host_b.claim("gisapp-omf-02:200")
+    assert [first.job['args']['source_sub'], second.job['args']['source_sub']] == ["EMILIE", "WOODBOURNE"]
+    assert first.job['attempts'] == 1
+    assert host_a.claim("gisapp-omf-01:100") is None
+    assert host_a.counts() == {PENDING: 0, LEASED: 2, DONE: 0, FAILED: 0}
+
+    assert first.complete('Success', {'status': 'Success', 'duration': 1.0})
+    assert second.complete('Failed', {'status': 'Failed', 'error': "Failed to generate maps"})
+    assert [job['error'] for job in coordinator.jobs(FAILED)] == ["Failed to generate maps"]
+    assert coordinator.counts()[DONE] == 1
+
+def test_expired_leases_are_reclaimed(tmp_path):
+    work_queue = WorkQueue(tmp_path, lease_seconds=60, max_attempts=2)
+    work_queue.enqueue('export', input_path=r"C:\maps\EMILIE.mxd", output_path=r"C:\pdf\EMILIE.pdf")
+
+    crashed = work_queue.claim("gisapp-omf-01:100")
+    assert crashed.heartbeat()
+    assert work_queue.reclaim_expired() == []
+    _age(crashed.path, 120)
+    assert work_queue.reclaim_expired() == [crashed.job['id']]
+
+    # The crashed worker can no longer renew or finish the job
+    assert not crashed.heartbeat()
+    assert not crashed.complete('Success', {'status': 'Success'})
+
+    retry = work_queue.claim("gisapp-omf-02:200")
+    assert retry.job['attempts'] == 2
+    _age(retry.path, 120)
+    work_queue.reclaim_expired()
+    assert [job['error'] for job in work_queue.jobs(FAILED)] == ["Lease expired 2 times"]
+
+    assert work_queue.retry_failed() == 1
+    assert work_queue.claim("gisapp-omf-02:200").job['attempts'] == 1
+
+def test_worker_runs_until_empty(tmp_path, monkeypatch):
+    monkeypatch.setattr("scripts.backends._backend", InMemoryBackend())
+    settings = Settings({'paths': {'ledger': str(tmp_path / "ledger.csv"),
+                                   'history': str(tmp_path / "history.sqlite")}})
+    work_queue = WorkQueue(tmp_path / "queue")
+    for sub in ("EMILIE", "WOODBOURNE"):
+        work_queue.enqueue('generate', source_sub=sub, year='2025')
+
+    ran = []
+    def runner(job, workspace):
+        ran.append(job['args']['source_sub'])
+        export = {'input': f"{job['args']['source_sub']}.aprx", 'output': "out.pdf",
+                  'status': 'Success', 'duration': 0.5}
+        return {'status': 'Success', 'duration': 0.5, 'exports': [export]}
+
+    refreshes = []
+    monkeypatch.setattr("scripts.source_mirror.refresh_mirror", lambda settings: refreshes.append(1))
+
+    worker = QueueWorker(work_queue, tmp_path, settings=settings, poll_interval=0.01, runner=runner)
+    assert worker.run(exit_when_empty=True) == 2
+    assert ran == ["EMILIE", "WOODBOURNE"]
+    # Before each job rather than once per worker, so long-lived workers don't go stale
+    assert len(refreshes) == 2
+    assert work_queue.counts()[DONE] == 2
+    assert len((tmp_path / "ledger.csv").read_text().splitlines()) == 3